@@ -0,0 +1,42 @@
+"""Add retry state to mc_outbox and a mc_outbox_dead dead-letter table.
+
+A row whose delivery fails is put back with `available_at` pushed out by
+a backoff, so it no longer blocks the rows behind it; after the
+dispatcher's max attempts it moves to mc_outbox_dead for inspection.
+
+Revision ID: a2d5e6f7b8c9
+Revises: f9c4d5e6a7b8
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+revision = "a2d5e6f7b8c9"
+down_revision = "f9c4d5e6a7b8"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE mc_outbox ADD COLUMN attempts integer NOT NULL DEFAULT 0")
+    op.execute("ALTER TABLE mc_outbox ADD COLUMN last_error text")
+    op.execute("ALTER TABLE mc_outbox ADD COLUMN available_at timestamptz NOT NULL DEFAULT now()")
+    op.execute("""
+        CREATE TABLE mc_outbox_dead (
+            id bigint PRIMARY KEY,
+            topic text NOT NULL,
+            payload jsonb NOT NULL,
+            activity jsonb,
+            created_at timestamptz NOT NULL,
+            attempts integer NOT NULL,
+            last_error text,
+            failed_at timestamptz NOT NULL DEFAULT now()
+        )
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS mc_outbox_dead")
+    op.execute("ALTER TABLE mc_outbox DROP COLUMN IF EXISTS available_at")
+    op.execute("ALTER TABLE mc_outbox DROP COLUMN IF EXISTS last_error")
+    op.execute("ALTER TABLE mc_outbox DROP COLUMN IF EXISTS attempts")
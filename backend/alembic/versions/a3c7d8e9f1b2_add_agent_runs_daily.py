@@ -0,0 +1,118 @@
+"""Add agent_runs_daily — run counts, outcomes, tokens and duration per (UTC day, agent).
+
+Statement-level triggers fold every insert, update and delete on agent_runs
+into the rollup, one upsert per affected (day, agent) rather than per row,
+so the heatmap and day summaries never group raw runs.
+
+Revision ID: a3c7d8e9f1b2
+Revises: f2b6c7d8e9a1
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+revision = "a3c7d8e9f1b2"
+down_revision = "f2b6c7d8e9a1"
+branch_labels = None
+depends_on = None
+
+_MEASURES = ("runs", "succeeded", "failed", "timed_out", "tokens_used", "duration_ms")
+
+
+def _deltas(rows: str, sign: int) -> str:
+    """One signed rollup delta per run in `rows` (aliased r)."""
+    return f"""
+        SELECT (r.created_at AT TIME ZONE 'UTC')::date, r.agent_id,
+            {sign},
+            {sign} * CASE WHEN r.outcome = 'success' THEN 1 ELSE 0 END,
+            {sign} * CASE WHEN r.outcome IN ('error', 'failure') THEN 1 ELSE 0 END,
+            {sign} * CASE WHEN r.outcome = 'timeout' THEN 1 ELSE 0 END,
+            {sign} * COALESCE(r.tokens_used, 0)::bigint,
+            {sign} * COALESCE(r.duration_ms, 0)::bigint
+        FROM {rows}
+    """
+
+
+# Folds `deltas` into the rollup in key order, so concurrent statements lock rows consistently
+_UPSERT = f"""
+    INSERT INTO agent_runs_daily AS d (day, agent_id, {", ".join(_MEASURES)})
+    SELECT day, agent_id, {", ".join(f"sum({m})" for m in _MEASURES)}
+    FROM deltas
+    GROUP BY day, agent_id
+    HAVING {" OR ".join(f"sum({m}) <> 0" for m in _MEASURES)}
+    ORDER BY day, agent_id
+    ON CONFLICT (day, agent_id) DO UPDATE SET
+        {", ".join(f"{m} = d.{m} + EXCLUDED.{m}" for m in _MEASURES)}
+"""
+
+# Updated runs whose rollup inputs changed, as old and new versions
+_MOVED = """
+    SELECT {side}.* FROM old_rows o JOIN new_rows n USING (id)
+    WHERE (o.created_at, o.agent_id, o.outcome, o.tokens_used, o.duration_ms)
+        IS DISTINCT FROM (n.created_at, n.agent_id, n.outcome, n.tokens_used, n.duration_ms)
+"""
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE agent_runs_daily (
+            day date NOT NULL,
+            agent_id text NOT NULL,
+            runs bigint NOT NULL DEFAULT 0,
+            succeeded bigint NOT NULL DEFAULT 0,
+            failed bigint NOT NULL DEFAULT 0,
+            timed_out bigint NOT NULL DEFAULT 0,
+            tokens_used bigint NOT NULL DEFAULT 0,
+            duration_ms bigint NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, agent_id)
+        )
+    """)
+
+    columns = f"day, agent_id, {', '.join(_MEASURES)}"
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION agent_runs_daily_apply() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                WITH deltas ({columns}) AS ({_deltas("new_rows r", 1)})
+                {_UPSERT};
+            ELSIF TG_OP = 'DELETE' THEN
+                WITH deltas ({columns}) AS ({_deltas("old_rows r", -1)})
+                {_UPSERT};
+            ELSE
+                WITH deltas ({columns}) AS (
+                    {_deltas(f"({_MOVED.format(side='o')}) r", -1)}
+                    UNION ALL
+                    {_deltas(f"({_MOVED.format(side='n')}) r", 1)}
+                )
+                {_UPSERT};
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    for event, tables in (
+        ("INSERT", "NEW TABLE AS new_rows"),
+        ("UPDATE", "OLD TABLE AS old_rows NEW TABLE AS new_rows"),
+        ("DELETE", "OLD TABLE AS old_rows"),
+    ):
+        op.execute(f"""
+            CREATE TRIGGER agent_runs_daily_{event.lower()}
+            AFTER {event} ON agent_runs
+            REFERENCING {tables}
+            FOR EACH STATEMENT EXECUTE FUNCTION agent_runs_daily_apply()
+        """)
+
+    # CREATE TRIGGER holds off writes until commit, so the seed cannot miss any
+    op.execute(f"""
+        WITH deltas ({columns}) AS ({_deltas("agent_runs r", 1)})
+        INSERT INTO agent_runs_daily ({columns})
+        SELECT day, agent_id, {", ".join(f"sum({m})" for m in _MEASURES)}
+        FROM deltas GROUP BY day, agent_id
+    """)
+
+
+def downgrade() -> None:
+    for event in ("insert", "update", "delete"):
+        op.execute(f"DROP TRIGGER IF EXISTS agent_runs_daily_{event} ON agent_runs")
+    op.execute("DROP FUNCTION IF EXISTS agent_runs_daily_apply()")
+    op.execute("DROP TABLE IF EXISTS agent_runs_daily")
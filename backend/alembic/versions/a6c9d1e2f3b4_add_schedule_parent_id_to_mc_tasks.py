@@ -0,0 +1,37 @@
+"""Add schedule_parent_id to mc_tasks for cron-expanded task instances.
+
+Revision ID: a6c9d1e2f3b4
+Revises: f5b8c9d1e2a3
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+revision = "a6c9d1e2f3b4"
+down_revision = "f5b8c9d1e2a3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        ALTER TABLE mc_tasks ADD COLUMN schedule_parent_id integer
+        REFERENCES mc_tasks (id) ON DELETE SET NULL
+    """)
+    # One instance per template per fire time — makes expansion idempotent
+    op.execute("""
+        CREATE UNIQUE INDEX idx_mc_tasks_schedule_instance
+        ON mc_tasks (schedule_parent_id, scheduled_at)
+        WHERE schedule_parent_id IS NOT NULL
+    """)
+    # Scheduler startup load: backlog tasks waiting on a due time
+    op.execute("""
+        CREATE INDEX idx_mc_tasks_scheduled_backlog ON mc_tasks (scheduled_at)
+        WHERE state = 'backlog' AND scheduled_at IS NOT NULL
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_mc_tasks_scheduled_backlog")
+    op.execute("DROP INDEX IF EXISTS idx_mc_tasks_schedule_instance")
+    op.execute("ALTER TABLE mc_tasks DROP COLUMN IF EXISTS schedule_parent_id")
@@ -0,0 +1,31 @@
+"""Add lease_expires_at to mc_tasks for expiring claims.
+
+Revision ID: a9c3d4e5f6b7
+Revises: f8b2c3d4e5a6
+Create Date: 2026-10-17
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "a9c3d4e5f6b7"
+down_revision = "f8b2c3d4e5a6"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "mc_tasks",
+        sa.Column("lease_expires_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    # Give claims that predate leases one default TTL before the reaper may free them
+    op.execute(
+        "UPDATE mc_tasks SET lease_expires_at = now() + interval '15 minutes' "
+        "WHERE claimed_by IS NOT NULL AND state = 'in_progress'"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("mc_tasks", "lease_expires_at")
@@ -0,0 +1,25 @@
+"""Add composite index backing keyset pagination of the task list.
+
+Revision ID: b1d4e5f6a7c8
+Revises: a9c3d4e5f6b7
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+revision = "b1d4e5f6a7c8"
+down_revision = "a9c3d4e5f6b7"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Matches ORDER BY priority ASC, created_at DESC, id DESC in list_tasks_page
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_mc_tasks_list_keyset "
+        "ON mc_tasks (priority, created_at DESC, id DESC)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_mc_tasks_list_keyset")
@@ -0,0 +1,103 @@
+"""Add mc_task_archive_counters — the archived share of mc_task_counters.
+
+mc_task_counters covers both tiers, so dashboard totals include archived
+work. The board only pages the hot table by default, though, so its
+column totals subtract this rollup, kept the same way from statement-level
+triggers on mc_tasks_archive.
+
+Revision ID: b3e6f7a8c9d0
+Revises: a2d5e6f7b8c9
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+revision = "b3e6f7a8c9d0"
+down_revision = "a2d5e6f7b8c9"
+branch_labels = None
+depends_on = None
+
+
+def _key(alias: str = "") -> str:
+    """Rollup key for a task row, as in mc_task_counters."""
+    p = f"{alias}." if alias else ""
+    return f"COALESCE({p}state, ''), COALESCE({p}project, ''), COALESCE({p}agent_id, '')"
+
+
+_UPSERT = """
+    INSERT INTO mc_task_archive_counters AS c (state, project, agent_id, n)
+    {select}
+    ON CONFLICT (state, project, agent_id) DO UPDATE SET n = c.n + EXCLUDED.n;
+"""
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE mc_task_archive_counters (
+            state text NOT NULL,
+            project text NOT NULL,
+            agent_id text NOT NULL,
+            n bigint NOT NULL DEFAULT 0,
+            PRIMARY KEY (state, project, agent_id)
+        )
+    """)
+
+    inserted = f"SELECT {_key()}, count(*) FROM new_rows GROUP BY 1, 2, 3 ORDER BY 1, 2, 3"
+    deleted = f"SELECT {_key()}, -count(*) FROM old_rows GROUP BY 1, 2, 3 ORDER BY 1, 2, 3"
+    moved = f"""
+        SELECT state, project, agent_id, sum(d)
+        FROM (
+            SELECT {_key("o")}, -1 AS d
+            FROM old_rows o JOIN new_rows n USING (id)
+            WHERE (o.state, o.project, o.agent_id)
+                IS DISTINCT FROM (n.state, n.project, n.agent_id)
+            UNION ALL
+            SELECT {_key("n")}, 1
+            FROM old_rows o JOIN new_rows n USING (id)
+            WHERE (o.state, o.project, o.agent_id)
+                IS DISTINCT FROM (n.state, n.project, n.agent_id)
+        ) AS moves (state, project, agent_id, d)
+        GROUP BY 1, 2, 3
+        HAVING sum(d) <> 0
+        ORDER BY 1, 2, 3
+    """
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION mc_task_archive_counters_apply() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                {_UPSERT.format(select=inserted)}
+            ELSIF TG_OP = 'DELETE' THEN
+                {_UPSERT.format(select=deleted)}
+            ELSE
+                {_UPSERT.format(select=moved)}
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    for event, tables in (
+        ("INSERT", "NEW TABLE AS new_rows"),
+        ("UPDATE", "OLD TABLE AS old_rows NEW TABLE AS new_rows"),
+        ("DELETE", "OLD TABLE AS old_rows"),
+    ):
+        op.execute(f"""
+            CREATE TRIGGER mc_tasks_archive_tier_counters_{event.lower()}
+            AFTER {event} ON mc_tasks_archive
+            REFERENCING {tables}
+            FOR EACH STATEMENT EXECUTE FUNCTION mc_task_archive_counters_apply()
+        """)
+
+    # CREATE TRIGGER holds off writes until commit, so the seed cannot miss any
+    op.execute(f"""
+        INSERT INTO mc_task_archive_counters (state, project, agent_id, n)
+        SELECT {_key()}, count(*) FROM mc_tasks_archive GROUP BY 1, 2, 3
+    """)
+
+
+def downgrade() -> None:
+    for event in ("insert", "update", "delete"):
+        op.execute(
+            f"DROP TRIGGER IF EXISTS mc_tasks_archive_tier_counters_{event} ON mc_tasks_archive"
+        )
+    op.execute("DROP FUNCTION IF EXISTS mc_task_archive_counters_apply()")
+    op.execute("DROP TABLE IF EXISTS mc_task_archive_counters")
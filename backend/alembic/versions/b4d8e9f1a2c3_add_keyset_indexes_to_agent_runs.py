@@ -0,0 +1,36 @@
+"""Add keyset indexes on agent_runs for cursor-paged lists and timelines.
+
+(created_at DESC, id DESC) backs the run list and (agent_id, created_at
+DESC, id DESC) an agent's timeline, so each page is an index range scan
+from the cursor. The composite index makes the single-column agent_id
+index redundant, so it is dropped.
+
+Revision ID: b4d8e9f1a2c3
+Revises: a3c7d8e9f1b2
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+revision = "b4d8e9f1a2c3"
+down_revision = "a3c7d8e9f1b2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_agent_runs_created_id "
+        "ON agent_runs (created_at DESC, id DESC)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_agent_runs_agent_created "
+        "ON agent_runs (agent_id, created_at DESC, id DESC)"
+    )
+    op.execute("DROP INDEX IF EXISTS ix_agent_runs_agent_id")
+
+
+def downgrade() -> None:
+    op.execute("CREATE INDEX IF NOT EXISTS ix_agent_runs_agent_id ON agent_runs (agent_id)")
+    op.execute("DROP INDEX IF EXISTS ix_agent_runs_agent_created")
+    op.execute("DROP INDEX IF EXISTS ix_agent_runs_created_id")
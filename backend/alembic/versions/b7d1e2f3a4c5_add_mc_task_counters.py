@@ -0,0 +1,119 @@
+"""Add mc_task_counters — task counts per (state, project, agent_id).
+
+Statement-level triggers fold each insert, update and delete on mc_tasks
+into the rollup, one upsert per affected key rather than per row, so the
+dashboard counts never scan mc_tasks and writes that bypass the API are
+counted too.
+
+Revision ID: b7d1e2f3a4c5
+Revises: a6c9d1e2f3b4
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+revision = "b7d1e2f3a4c5"
+down_revision = "a6c9d1e2f3b4"
+branch_labels = None
+depends_on = None
+
+
+def _key(alias: str = "") -> str:
+    """Rollup key for a mc_tasks row; NULLs fold into '' so the key fits a primary key."""
+    p = f"{alias}." if alias else ""
+    return f"COALESCE({p}state, ''), COALESCE({p}project, ''), COALESCE({p}agent_id, '')"
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE mc_task_counters (
+            state text NOT NULL,
+            project text NOT NULL,
+            agent_id text NOT NULL,
+            n bigint NOT NULL DEFAULT 0,
+            PRIMARY KEY (state, project, agent_id)
+        )
+    """)
+
+    # Deltas are applied in key order so concurrent statements lock counter rows consistently
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION mc_task_counters_apply() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO mc_task_counters AS c (state, project, agent_id, n)
+                SELECT {_key()}, count(*) FROM new_rows GROUP BY 1, 2, 3 ORDER BY 1, 2, 3
+                ON CONFLICT (state, project, agent_id) DO UPDATE SET n = c.n + EXCLUDED.n;
+            ELSIF TG_OP = 'DELETE' THEN
+                INSERT INTO mc_task_counters AS c (state, project, agent_id, n)
+                SELECT {_key()}, -count(*) FROM old_rows GROUP BY 1, 2, 3 ORDER BY 1, 2, 3
+                ON CONFLICT (state, project, agent_id) DO UPDATE SET n = c.n + EXCLUDED.n;
+            ELSE
+                INSERT INTO mc_task_counters AS c (state, project, agent_id, n)
+                SELECT state, project, agent_id, sum(d)
+                FROM (
+                    SELECT {_key("o")}, -1 AS d
+                    FROM old_rows o JOIN new_rows n USING (id)
+                    WHERE (o.state, o.project, o.agent_id)
+                        IS DISTINCT FROM (n.state, n.project, n.agent_id)
+                    UNION ALL
+                    SELECT {_key("n")}, 1
+                    FROM old_rows o JOIN new_rows n USING (id)
+                    WHERE (o.state, o.project, o.agent_id)
+                        IS DISTINCT FROM (n.state, n.project, n.agent_id)
+                ) AS moves (state, project, agent_id, d)
+                GROUP BY 1, 2, 3
+                HAVING sum(d) <> 0
+                ORDER BY 1, 2, 3
+                ON CONFLICT (state, project, agent_id) DO UPDATE SET n = c.n + EXCLUDED.n;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    # Transition tables allow one event per trigger, hence three
+    for event, tables in (
+        ("INSERT", "NEW TABLE AS new_rows"),
+        ("UPDATE", "OLD TABLE AS old_rows NEW TABLE AS new_rows"),
+        ("DELETE", "OLD TABLE AS old_rows"),
+    ):
+        op.execute(f"""
+            CREATE TRIGGER mc_tasks_counters_{event.lower()}
+            AFTER {event} ON mc_tasks
+            REFERENCING {tables}
+            FOR EACH STATEMENT EXECUTE FUNCTION mc_task_counters_apply()
+        """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION mc_task_counters_truncate() RETURNS trigger AS $$
+        BEGIN
+            DELETE FROM mc_task_counters;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER mc_tasks_counters_truncate
+        AFTER TRUNCATE ON mc_tasks
+        FOR EACH STATEMENT EXECUTE FUNCTION mc_task_counters_truncate()
+    """)
+
+    # CREATE TRIGGER holds off writes until commit, so the seed cannot miss any
+    op.execute(f"""
+        INSERT INTO mc_task_counters (state, project, agent_id, n)
+        SELECT {_key()}, count(*) FROM mc_tasks GROUP BY 1, 2, 3
+    """)
+
+    # The standup's "done in the last 24h" is time-windowed, so it stays a
+    # query — an index-only range scan instead of a full-table count
+    op.execute("""
+        CREATE INDEX idx_mc_tasks_done_updated ON mc_tasks (updated_at)
+        WHERE state = 'done'
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_mc_tasks_done_updated")
+    for event in ("insert", "update", "delete", "truncate"):
+        op.execute(f"DROP TRIGGER IF EXISTS mc_tasks_counters_{event} ON mc_tasks")
+    op.execute("DROP FUNCTION IF EXISTS mc_task_counters_truncate()")
+    op.execute("DROP FUNCTION IF EXISTS mc_task_counters_apply()")
+    op.execute("DROP TABLE IF EXISTS mc_task_counters")
@@ -0,0 +1,46 @@
+"""Derive mc_tasks.blocks from blocked_by and clear finished blockers.
+
+blocks was maintained by hand; from here on the dependency index keeps it in
+step with blocked_by, so start from a consistent snapshot.
+
+Revision ID: c2e5f6a7b8d9
+Revises: b1d4e5f6a7c8
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+revision = "c2e5f6a7b8d9"
+down_revision = "b1d4e5f6a7c8"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Open tasks stop waiting on blockers that are already done or deleted
+    op.execute("""
+        UPDATE mc_tasks t
+        SET blocked_by = ARRAY(
+            SELECT b FROM unnest(t.blocked_by) AS b
+            WHERE EXISTS (
+                SELECT 1 FROM mc_tasks d WHERE d.id::text = b AND d.state <> 'done'
+            )
+        )
+        WHERE t.state <> 'done' AND t.blocked_by <> '{}'
+    """)
+    # blocks of open tasks = open tasks that list them in blocked_by
+    op.execute("""
+        UPDATE mc_tasks t
+        SET blocks = COALESCE(
+            (SELECT array_agg(d.id::text ORDER BY d.id)
+             FROM mc_tasks d
+             WHERE d.state <> 'done' AND t.id::text = ANY(d.blocked_by)),
+            '{}'
+        )
+        WHERE t.state <> 'done'
+    """)
+
+
+def downgrade() -> None:
+    # Data-only migration; the previous hand-maintained values are not recoverable
+    pass
@@ -0,0 +1,279 @@
+"""Partition agent_runs and agent_log by month on created_at.
+
+Both tables become RANGE-partitioned parents with one partition per UTC
+month, so time-bounded reads prune to the months they touch and retention
+drops whole partitions instead of deleting rows.
+
+The conversion is online: the existing table is not copied. It gets a
+NOT VALID check bounding created_at, validated outside the migration
+transaction (writes carry on meanwhile), along with concurrently built
+indexes matching the new parent's. The swap then renames it to
+`<table>_legacy` and attaches it as the partition for everything before
+the cutover month, which PostgreSQL accepts without a scan or index build
+because the check and indexes already prove it. Months from the cutover
+on get regular partitions. The legacy partition ages out under retention
+like any other once its last month does.
+
+Partitioned tables cannot enforce a unique index without the partition
+key, so agent_runs drops its primary key on id for a plain index; run ids
+are generated UUIDs. agent_log's id sequence moves to the new parent.
+
+`mc_month_partitions()` creates the coming months and
+`mc_drop_month_partitions()` detaches (and drops) expired ones; the runs
+module calls both from a background job.
+
+Revision ID: c6e1f2a3b4d5
+Revises: b4d8e9f1a2c3
+Create Date: 2026-10-17
+"""
+
+from datetime import datetime, timezone
+
+from alembic import op
+
+revision = "c6e1f2a3b4d5"
+down_revision = "b4d8e9f1a2c3"
+branch_labels = None
+depends_on = None
+
+# Indexes each parent carries; the legacy partition must have an equivalent of every one
+_INDEXES = {
+    "agent_runs": (
+        ("ix_agent_runs_id", "(id)"),
+        ("ix_agent_runs_created_id", "(created_at DESC, id DESC)"),
+        ("ix_agent_runs_agent_created", "(agent_id, created_at DESC, id DESC)"),
+        ("ix_agent_runs_created_at", "(created_at)"),
+        ("ix_agent_runs_status", "(status)"),
+        ("ix_agent_runs_outcome", "(outcome)"),
+        ("ix_agent_runs_channel", "(channel)"),
+    ),
+    "agent_log": (
+        ("ix_agent_log_id", "(id)"),
+        ("ix_agent_log_agent_created", "(agent, created_at DESC)"),
+        ("ix_agent_log_created_at", "(created_at)"),
+    ),
+}
+
+_ROLLUP_TRIGGERS = (
+    ("INSERT", "NEW TABLE AS new_rows"),
+    ("UPDATE", "OLD TABLE AS old_rows NEW TABLE AS new_rows"),
+    ("DELETE", "OLD TABLE AS old_rows"),
+)
+
+# Months ahead the migration creates; the runs module keeps the horizon from then on
+_MONTHS_AHEAD = 3
+
+
+def _cutover() -> str:
+    """Start of the UTC month after next — the first month not held by the legacy partition.
+
+    Two months out, so rows written while the migration runs always fall inside the check.
+    """
+    now = datetime.now(timezone.utc)
+    year, month = divmod(now.year * 12 + now.month - 1 + 2, 12)
+    return f"{year:04d}-{month + 1:02d}-01 00:00:00+00"
+
+
+def _legacy_index(table: str, name: str) -> str:
+    return name.replace(f"ix_{table}_", f"ix_{table}_legacy_", 1)
+
+
+def _swap(table: str, cutover: str) -> None:
+    legacy = f"{table}_legacy"
+    op.execute(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE")
+    if table == "agent_runs":
+        for event, _ in _ROLLUP_TRIGGERS:
+            op.execute(f"DROP TRIGGER IF EXISTS agent_runs_daily_{event.lower()} ON agent_runs")
+
+    op.execute(f"ALTER TABLE {table} RENAME TO {legacy}")
+    for name, _ in _INDEXES[table]:
+        op.execute(f"ALTER INDEX {name} RENAME TO {_legacy_index(table, name)}")
+    op.execute(f"""
+        CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING GENERATED)
+        PARTITION BY RANGE (created_at)
+    """)
+    for name, columns in _INDEXES[table]:
+        op.execute(f"CREATE INDEX {name} ON {table} {columns}")
+
+    # A serial sequence is re-owned by the parent; an identity one cannot be,
+    # so it is replaced by a plain sequence starting after the highest id
+    op.execute(f"""
+        DO $$
+        DECLARE
+            seq text := pg_get_serial_sequence('{legacy}', 'id');
+            next_id bigint;
+        BEGIN
+            IF seq IS NULL THEN
+                RETURN;
+            END IF;
+            IF (SELECT attidentity FROM pg_attribute
+                WHERE attrelid = '{legacy}'::regclass AND attname = 'id') = '' THEN
+                EXECUTE format('ALTER SEQUENCE %s OWNED BY {table}.id', seq);
+            ELSE
+                SELECT COALESCE(max(id), 0) + 1 INTO next_id FROM {legacy};
+                ALTER TABLE {legacy} ALTER COLUMN id DROP IDENTITY;
+                EXECUTE format(
+                    'CREATE SEQUENCE {table}_id_seq AS bigint START %s OWNED BY {table}.id',
+                    next_id
+                );
+                ALTER TABLE {table} ALTER COLUMN id SET DEFAULT nextval('{table}_id_seq');
+            END IF;
+        END;
+        $$
+    """)
+
+    op.execute(f"""
+        ALTER TABLE {table} ATTACH PARTITION {legacy}
+        FOR VALUES FROM (MINVALUE) TO ('{cutover}')
+    """)
+    op.execute(f"ALTER TABLE {legacy} DROP CONSTRAINT {legacy}_range")
+    op.execute(f"SELECT mc_month_partitions('{table}', {_MONTHS_AHEAD})")
+
+    if table == "agent_runs":
+        op.execute("ALTER TABLE agent_runs_legacy DROP CONSTRAINT IF EXISTS agent_runs_pkey")
+        # Statement triggers on the parent see writes routed to every partition
+        for event, tables in _ROLLUP_TRIGGERS:
+            op.execute(f"""
+                CREATE TRIGGER agent_runs_daily_{event.lower()}
+                AFTER {event} ON agent_runs
+                REFERENCING {tables}
+                FOR EACH STATEMENT EXECUTE FUNCTION agent_runs_daily_apply()
+            """)
+
+
+def upgrade() -> None:
+    op.execute(r"""
+        CREATE OR REPLACE FUNCTION mc_month_partitions(parent regclass, months_ahead integer)
+        RETURNS SETOF text AS $$
+        DECLARE
+            base text := (SELECT relname FROM pg_class WHERE oid = parent);
+            this_month timestamp := date_trunc('month', now() AT TIME ZONE 'UTC');
+            m timestamp;
+            part_name text;
+        BEGIN
+            FOR m IN
+                SELECT generate_series(
+                    this_month,
+                    this_month + make_interval(months => months_ahead),
+                    interval '1 month'
+                )
+            LOOP
+                part_name := base || '_' || to_char(m, 'YYYY_MM');
+                CONTINUE WHEN to_regclass(part_name) IS NOT NULL;
+                BEGIN
+                    EXECUTE format(
+                        'CREATE TABLE %I PARTITION OF %s FOR VALUES FROM (%L) TO (%L)',
+                        part_name, parent,
+                        m AT TIME ZONE 'UTC', (m + interval '1 month') AT TIME ZONE 'UTC'
+                    );
+                    RETURN NEXT part_name;
+                EXCEPTION
+                    -- The month is still held by the legacy partition, or another
+                    -- maintainer created it first
+                    WHEN invalid_object_definition OR duplicate_table THEN
+                        NULL;
+                END;
+            END LOOP;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    # Partitions wholly before the first kept month go; the default partition
+    # and open-ended bounds never match the upper-bound pattern, so never go
+    op.execute(r"""
+        CREATE OR REPLACE FUNCTION mc_drop_month_partitions(
+            parent regclass, keep_months integer, detach_only boolean
+        ) RETURNS SETOF text AS $$
+        DECLARE
+            cutoff timestamptz := (date_trunc('month', now() AT TIME ZONE 'UTC')
+                - make_interval(months => keep_months)) AT TIME ZONE 'UTC';
+            part record;
+        BEGIN
+            -- One maintainer at a time, so two never detach the same partition
+            PERFORM pg_advisory_xact_lock(parent::oid::bigint);
+            FOR part IN
+                SELECT c.oid::regclass AS rel, c.relname::text AS part_name,
+                       substring(pg_get_expr(c.relpartbound, c.oid)
+                                 FROM 'TO \(''([^'']+)''\)')::timestamptz AS upper_bound
+                FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = parent
+                ORDER BY upper_bound
+            LOOP
+                CONTINUE WHEN part.upper_bound IS NULL OR part.upper_bound > cutoff;
+                EXECUTE format('ALTER TABLE %s DETACH PARTITION %s', parent, part.rel);
+                IF NOT detach_only THEN
+                    EXECUTE format('DROP TABLE %s', part.rel);
+                END IF;
+                RETURN NEXT part.part_name;
+            END LOOP;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    cutover = _cutover()
+    for table in _INDEXES:
+        op.execute(f"UPDATE {table} SET created_at = now() WHERE created_at IS NULL")
+        op.execute(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {table}_legacy_range")
+        op.execute(f"""
+            ALTER TABLE {table} ADD CONSTRAINT {table}_legacy_range
+            CHECK (created_at IS NOT NULL AND created_at < '{cutover}') NOT VALID
+        """)
+
+    # Validation and index builds scan the whole table; outside a transaction
+    # they only block schema changes, not reads or writes
+    with op.get_context().autocommit_block():
+        for table, indexes in _INDEXES.items():
+            op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {table}_legacy_range")
+            for name, columns in indexes:
+                op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} {columns}")
+
+    for table in _INDEXES:
+        _swap(table, cutover)
+
+
+def downgrade() -> None:
+    # Rows are copied back into a plain table, so this is an offline operation
+    for table, indexes in _INDEXES.items():
+        op.execute(f"ALTER TABLE {table} RENAME TO {table}_partitioned")
+        for name, _ in indexes:
+            op.execute(f"ALTER INDEX {name} RENAME TO {name}_partitioned")
+        op.execute(f"""
+            CREATE TABLE {table} (LIKE {table}_partitioned INCLUDING DEFAULTS INCLUDING GENERATED)
+        """)
+        op.execute(f"""
+            DO $$
+            DECLARE
+                seq text := pg_get_serial_sequence('{table}_partitioned', 'id');
+            BEGIN
+                IF seq IS NOT NULL THEN
+                    EXECUTE format('ALTER SEQUENCE %s OWNED BY {table}.id', seq);
+                END IF;
+            END;
+            $$
+        """)
+        if table == "agent_runs":
+            for event, _ in _ROLLUP_TRIGGERS:
+                op.execute(
+                    f"DROP TRIGGER IF EXISTS agent_runs_daily_{event.lower()} "
+                    "ON agent_runs_partitioned"
+                )
+        op.execute(f"INSERT INTO {table} SELECT * FROM {table}_partitioned")
+        op.execute(f"DROP TABLE {table}_partitioned")
+
+        if table == "agent_runs":
+            op.execute("ALTER TABLE agent_runs ADD PRIMARY KEY (id)")
+        for name, columns in indexes:
+            if name != "ix_agent_runs_id":
+                op.execute(f"CREATE INDEX {name} ON {table} {columns}")
+        if table == "agent_runs":
+            for event, tables in _ROLLUP_TRIGGERS:
+                op.execute(f"""
+                    CREATE TRIGGER agent_runs_daily_{event.lower()}
+                    AFTER {event} ON agent_runs
+                    REFERENCING {tables}
+                    FOR EACH STATEMENT EXECUTE FUNCTION agent_runs_daily_apply()
+                """)
+
+    op.execute("DROP FUNCTION IF EXISTS mc_drop_month_partitions(regclass, integer, boolean)")
+    op.execute("DROP FUNCTION IF EXISTS mc_month_partitions(regclass, integer)")
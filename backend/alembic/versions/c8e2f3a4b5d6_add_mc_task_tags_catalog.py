@@ -0,0 +1,127 @@
+"""Add mc_task_tags — a maintained tag catalog — and a GIN index on mc_tasks.tags.
+
+The catalog holds open (not done/cancelled) and total task counts per tag,
+kept current by statement-level triggers, so the tag picker and prefix
+autocomplete never unnest the whole table. The GIN index serves the
+`tags && :tags` list filter.
+
+Revision ID: c8e2f3a4b5d6
+Revises: b7d1e2f3a4c5
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+revision = "c8e2f3a4b5d6"
+down_revision = "b7d1e2f3a4c5"
+branch_labels = None
+depends_on = None
+
+# Folds (tag, open_count, total_count) deltas into the catalog, in tag order so concurrent
+# statements lock catalog rows consistently
+_UPSERT = """
+    INSERT INTO mc_task_tags AS c (tag, open_count, total_count)
+    SELECT tag, sum(open_count), sum(total_count) FROM deltas
+    GROUP BY tag
+    HAVING sum(open_count) <> 0 OR sum(total_count) <> 0
+    ORDER BY tag
+    ON CONFLICT (tag) DO UPDATE SET
+        open_count = c.open_count + EXCLUDED.open_count,
+        total_count = c.total_count + EXCLUDED.total_count
+"""
+
+
+def _deltas(rows: str, sign: int) -> str:
+    """One (tag, open_count, total_count) delta per distinct tag on each row of `rows` (aliased r)."""
+    return f"""
+        SELECT t.tag,
+            {sign} * CASE WHEN r.state IN ('done', 'cancelled') THEN 0 ELSE 1 END,
+            {sign}
+        FROM {rows}
+        CROSS JOIN LATERAL (SELECT DISTINCT unnest(r.tags) AS tag) t
+        WHERE t.tag IS NOT NULL
+    """
+
+
+# Updated rows whose tags or open/closed status changed, as old and new versions
+_MOVED = """
+    SELECT o.* FROM old_rows o JOIN new_rows n USING (id)
+    WHERE o.tags IS DISTINCT FROM n.tags
+       OR (o.state IN ('done', 'cancelled')) IS DISTINCT FROM (n.state IN ('done', 'cancelled'))
+"""
+
+
+def upgrade() -> None:
+    # C collation so the primary key index also serves `tag LIKE 'prefix%'`
+    op.execute("""
+        CREATE TABLE mc_task_tags (
+            tag text COLLATE "C" PRIMARY KEY,
+            open_count bigint NOT NULL DEFAULT 0,
+            total_count bigint NOT NULL DEFAULT 0
+        )
+    """)
+
+    moved_new = _MOVED.replace("SELECT o.*", "SELECT n.*")
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION mc_task_tags_apply() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                WITH deltas (tag, open_count, total_count) AS ({_deltas("new_rows r", 1)})
+                {_UPSERT};
+            ELSIF TG_OP = 'DELETE' THEN
+                WITH deltas (tag, open_count, total_count) AS ({_deltas("old_rows r", -1)})
+                {_UPSERT};
+            ELSE
+                WITH deltas (tag, open_count, total_count) AS (
+                    {_deltas(f"({_MOVED}) r", -1)}
+                    UNION ALL
+                    {_deltas(f"({moved_new}) r", 1)}
+                )
+                {_UPSERT};
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    for event, tables in (
+        ("INSERT", "NEW TABLE AS new_rows"),
+        ("UPDATE", "OLD TABLE AS old_rows NEW TABLE AS new_rows"),
+        ("DELETE", "OLD TABLE AS old_rows"),
+    ):
+        op.execute(f"""
+            CREATE TRIGGER mc_tasks_tags_{event.lower()}
+            AFTER {event} ON mc_tasks
+            REFERENCING {tables}
+            FOR EACH STATEMENT EXECUTE FUNCTION mc_task_tags_apply()
+        """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION mc_task_tags_truncate() RETURNS trigger AS $$
+        BEGIN
+            DELETE FROM mc_task_tags;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER mc_tasks_tags_truncate
+        AFTER TRUNCATE ON mc_tasks
+        FOR EACH STATEMENT EXECUTE FUNCTION mc_task_tags_truncate()
+    """)
+
+    # CREATE TRIGGER holds off writes until commit, so the seed cannot miss any
+    op.execute(f"""
+        WITH deltas (tag, open_count, total_count) AS ({_deltas("mc_tasks r", 1)})
+        INSERT INTO mc_task_tags (tag, open_count, total_count)
+        SELECT tag, sum(open_count), sum(total_count) FROM deltas GROUP BY tag
+    """)
+
+    op.execute("CREATE INDEX idx_mc_tasks_tags ON mc_tasks USING gin (tags)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_mc_tasks_tags")
+    for event in ("insert", "update", "delete", "truncate"):
+        op.execute(f"DROP TRIGGER IF EXISTS mc_tasks_tags_{event} ON mc_tasks")
+    op.execute("DROP FUNCTION IF EXISTS mc_task_tags_truncate()")
+    op.execute("DROP FUNCTION IF EXISTS mc_task_tags_apply()")
+    op.execute("DROP TABLE IF EXISTS mc_task_tags")
@@ -0,0 +1,39 @@
+"""Add a generated full-text search_vector to mc_tasks with a GIN index.
+
+Revision ID: d3f6a7b8c9e1
+Revises: c2e5f6a7b8d9
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+revision = "d3f6a7b8c9e1"
+down_revision = "c2e5f6a7b8d9"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # array_to_string is only STABLE; generated columns need an IMMUTABLE expression
+    op.execute("""
+        CREATE FUNCTION mc_tasks_tags_text(tags text[]) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE
+        AS $$ SELECT coalesce(array_to_string(tags, ' '), '') $$
+    """)
+    # Weighted: title > tags > description > result
+    op.execute("""
+        ALTER TABLE mc_tasks ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(title, '')), 'A')
+            || setweight(to_tsvector('english', mc_tasks_tags_text(tags)), 'B')
+            || setweight(to_tsvector('english', coalesce(description, '')), 'C')
+            || setweight(to_tsvector('english', coalesce(result, '')), 'D')
+        ) STORED
+    """)
+    op.execute("CREATE INDEX idx_mc_tasks_search ON mc_tasks USING gin (search_vector)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_mc_tasks_search")
+    op.execute("ALTER TABLE mc_tasks DROP COLUMN IF EXISTS search_vector")
+    op.execute("DROP FUNCTION IF EXISTS mc_tasks_tags_text(text[])")
@@ -0,0 +1,160 @@
+"""Add per-(day, agent, run_type) outcome counts and duration/token sketches.
+
+agent_runs_daily_outcomes counts runs per UTC day, agent, run type and
+outcome ('' when none was recorded). agent_runs_daily_sketch holds a
+log-bucketed histogram (a DDSketch) of duration_ms and tokens_used per
+day, agent and run type: bucket 0 holds values below 1 and bucket b >= 1
+holds (gamma^(b-2), gamma^(b-1)], with gamma = 1.02 / 0.98, so any
+quantile read back is within 2% of the true value. Bucket counts merge by
+addition and go back down on delete, so a window's percentiles come from
+summing its days' buckets, without touching the raw runs.
+
+Statement-level triggers on agent_runs keep both tables current, the same
+way they keep agent_runs_daily current.
+
+Revision ID: d7f2a3b4c5e6
+Revises: c6e1f2a3b4d5
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+revision = "d7f2a3b4c5e6"
+down_revision = "c6e1f2a3b4d5"
+branch_labels = None
+depends_on = None
+
+# Must match _SKETCH_GAMMA in modules/runs/service.py
+_GAMMA = 1.02 / 0.98
+
+
+def _deltas(rows: str, sign: int) -> str:
+    """One signed delta per run in `rows` (aliased r)."""
+    return f"""
+        SELECT (r.created_at AT TIME ZONE 'UTC')::date AS day, r.agent_id, r.run_type,
+            COALESCE(r.outcome, '') AS outcome, r.duration_ms, r.tokens_used,
+            {sign} AS sign
+        FROM {rows}
+    """
+
+
+def _apply(deltas: str) -> tuple[str, str]:
+    """Statements folding `deltas` into both tables, in key order so concurrent
+    statements lock rows consistently."""
+    outcomes = f"""
+        WITH deltas AS ({deltas})
+        INSERT INTO agent_runs_daily_outcomes AS d (day, agent_id, run_type, outcome, runs)
+        SELECT day, agent_id, run_type, outcome, sum(sign)
+        FROM deltas
+        GROUP BY 1, 2, 3, 4
+        HAVING sum(sign) <> 0
+        ORDER BY 1, 2, 3, 4
+        ON CONFLICT (day, agent_id, run_type, outcome) DO UPDATE SET
+            runs = d.runs + EXCLUDED.runs
+    """
+    sketch = f"""
+        WITH deltas AS ({deltas})
+        INSERT INTO agent_runs_daily_sketch AS s (day, agent_id, run_type, measure, bucket, n)
+        SELECT day, agent_id, run_type, v.measure, agent_runs_sketch_bucket(v.value), sum(sign)
+        FROM deltas
+        CROSS JOIN LATERAL (
+            VALUES ('duration_ms', duration_ms), ('tokens_used', tokens_used)
+        ) v (measure, value)
+        WHERE v.value IS NOT NULL
+        GROUP BY 1, 2, 3, 4, 5
+        HAVING sum(sign) <> 0
+        ORDER BY 1, 2, 3, 4, 5
+        ON CONFLICT (day, agent_id, run_type, measure, bucket) DO UPDATE SET
+            n = s.n + EXCLUDED.n
+    """
+    return outcomes, sketch
+
+
+def _body(deltas: str) -> str:
+    return ";\n".join(_apply(deltas)) + ";"
+
+
+# Updated runs whose analytics inputs changed, as old and new versions
+_MOVED = """
+    SELECT {side}.* FROM old_rows o JOIN new_rows n USING (id)
+    WHERE (o.created_at, o.agent_id, o.run_type, o.outcome, o.tokens_used, o.duration_ms)
+        IS DISTINCT FROM (n.created_at, n.agent_id, n.run_type, n.outcome, n.tokens_used,
+                          n.duration_ms)
+"""
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE agent_runs_daily_outcomes (
+            day date NOT NULL,
+            agent_id text NOT NULL,
+            run_type text NOT NULL,
+            outcome text NOT NULL,
+            runs bigint NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, agent_id, run_type, outcome)
+        )
+    """)
+    op.execute("""
+        CREATE TABLE agent_runs_daily_sketch (
+            day date NOT NULL,
+            agent_id text NOT NULL,
+            run_type text NOT NULL,
+            measure text NOT NULL,
+            bucket integer NOT NULL,
+            n bigint NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, agent_id, run_type, measure, bucket)
+        )
+    """)
+
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION agent_runs_sketch_bucket(v bigint) RETURNS integer AS $$
+            SELECT CASE
+                WHEN v < 1 THEN 0
+                ELSE 1 + ceil(ln(v::double precision) / ln({_GAMMA!r}::double precision))::integer
+            END
+        $$ LANGUAGE sql IMMUTABLE
+    """)
+
+    moved = (
+        _deltas(f"({_MOVED.format(side='o')}) r", -1)
+        + "UNION ALL"
+        + _deltas(f"({_MOVED.format(side='n')}) r", 1)
+    )
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION agent_runs_analytics_apply() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                {_body(_deltas("new_rows r", 1))}
+            ELSIF TG_OP = 'DELETE' THEN
+                {_body(_deltas("old_rows r", -1))}
+            ELSE
+                {_body(moved)}
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    for event, tables in (
+        ("INSERT", "NEW TABLE AS new_rows"),
+        ("UPDATE", "OLD TABLE AS old_rows NEW TABLE AS new_rows"),
+        ("DELETE", "OLD TABLE AS old_rows"),
+    ):
+        op.execute(f"""
+            CREATE TRIGGER agent_runs_analytics_{event.lower()}
+            AFTER {event} ON agent_runs
+            REFERENCING {tables}
+            FOR EACH STATEMENT EXECUTE FUNCTION agent_runs_analytics_apply()
+        """)
+
+    # CREATE TRIGGER holds off writes until commit, so the seed cannot miss any
+    for statement in _apply(_deltas("agent_runs r", 1)):
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    for event in ("insert", "update", "delete"):
+        op.execute(f"DROP TRIGGER IF EXISTS agent_runs_analytics_{event} ON agent_runs")
+    op.execute("DROP FUNCTION IF EXISTS agent_runs_analytics_apply()")
+    op.execute("DROP FUNCTION IF EXISTS agent_runs_sketch_bucket(bigint)")
+    op.execute("DROP TABLE IF EXISTS agent_runs_daily_sketch")
+    op.execute("DROP TABLE IF EXISTS agent_runs_daily_outcomes")
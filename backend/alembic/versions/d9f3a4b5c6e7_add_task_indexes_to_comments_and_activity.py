@@ -0,0 +1,33 @@
+"""Add (task_id, created_at) indexes to mc_comments and mc_activity.
+
+They back the batched per-task comment/activity aggregates in task lists
+and keyset pagination of a task's comments.
+
+Revision ID: d9f3a4b5c6e7
+Revises: c8e2f3a4b5d6
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+revision = "d9f3a4b5c6e7"
+down_revision = "c8e2f3a4b5d6"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_mc_comments_task_created
+        ON mc_comments (task_id, created_at DESC, id DESC)
+    """)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_mc_activity_task_created
+        ON mc_activity (task_id, created_at DESC)
+        WHERE task_id IS NOT NULL
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_mc_activity_task_created")
+    op.execute("DROP INDEX IF EXISTS idx_mc_comments_task_created")
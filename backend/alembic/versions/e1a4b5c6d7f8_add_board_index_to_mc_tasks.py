@@ -0,0 +1,28 @@
+"""Add a (state, list order) index on mc_tasks backing the kanban board.
+
+The board ranks cards with ROW_NUMBER() OVER (PARTITION BY state ORDER BY
+priority, created_at DESC, id DESC); with this index the window reads rows
+pre-sorted and stops each column after its first cards.
+
+Revision ID: e1a4b5c6d7f8
+Revises: d9f3a4b5c6e7
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+revision = "e1a4b5c6d7f8"
+down_revision = "d9f3a4b5c6e7"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_mc_tasks_board "
+        "ON mc_tasks (state, priority, created_at DESC, id DESC)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_mc_tasks_board")
@@ -0,0 +1,72 @@
+"""Add mc_task_changes — a commit-ordered change log for delta sync.
+
+Every insert, update and delete on mc_tasks appends (version, task_id,
+deleted) at commit time, including writes that bypass the API. Versions are
+taken under a transaction-scoped advisory lock inside a deferred trigger, so
+they become visible strictly in order. A reader that has seen version N can
+never later find an unseen change <= N.
+
+Revision ID: e4a7b8c9d1f2
+Revises: d3f6a7b8c9e1
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+revision = "e4a7b8c9d1f2"
+down_revision = "d3f6a7b8c9e1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE mc_task_changes (
+            version bigserial PRIMARY KEY,
+            task_id integer NOT NULL,
+            deleted boolean NOT NULL DEFAULT false,
+            changed_at timestamptz NOT NULL DEFAULT now()
+        )
+    """)
+    op.execute("CREATE INDEX idx_mc_task_changes_task ON mc_task_changes (task_id, version)")
+    # Highest version dropped by tombstone expiry; clients behind it must resync
+    op.execute("""
+        CREATE TABLE mc_task_changes_horizon (
+            id boolean PRIMARY KEY DEFAULT true CHECK (id),
+            version bigint NOT NULL DEFAULT 0
+        )
+    """)
+    op.execute("INSERT INTO mc_task_changes_horizon DEFAULT VALUES")
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION mc_tasks_log_change() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_advisory_xact_lock(hashtext('mc_task_changes'));
+            IF TG_OP = 'DELETE' THEN
+                INSERT INTO mc_task_changes (task_id, deleted) VALUES (OLD.id, true);
+            ELSE
+                INSERT INTO mc_task_changes (task_id) VALUES (NEW.id);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE CONSTRAINT TRIGGER mc_tasks_log_change
+        AFTER INSERT OR UPDATE OR DELETE ON mc_tasks
+        DEFERRABLE INITIALLY DEFERRED
+        FOR EACH ROW EXECUTE FUNCTION mc_tasks_log_change()
+    """)
+
+    # Seed one entry per existing task so since=0 replays the current table
+    op.execute("""
+        INSERT INTO mc_task_changes (task_id, changed_at)
+        SELECT id, COALESCE(updated_at, now()) FROM mc_tasks ORDER BY updated_at, id
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS mc_tasks_log_change ON mc_tasks")
+    op.execute("DROP FUNCTION IF EXISTS mc_tasks_log_change()")
+    op.execute("DROP TABLE IF EXISTS mc_task_changes_horizon")
+    op.execute("DROP TABLE IF EXISTS mc_task_changes")
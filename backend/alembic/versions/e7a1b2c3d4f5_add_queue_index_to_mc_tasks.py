@@ -0,0 +1,29 @@
+"""Add partial index backing the task queue claim path.
+
+Revision ID: e7a1b2c3d4f5
+Revises: d6f3a4b5c7e8
+Create Date: 2026-10-17
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "e7a1b2c3d4f5"
+down_revision = "d6f3a4b5c7e8"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Covers ORDER BY priority, created_at LIMIT n for unclaimed todo rows
+    op.create_index(
+        "idx_mc_tasks_queue",
+        "mc_tasks",
+        ["priority", "created_at"],
+        postgresql_where=sa.text("state = 'todo' AND claimed_by IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_mc_tasks_queue", "mc_tasks")
@@ -0,0 +1,45 @@
+"""Add agent_run_keys — idempotency keys for run ingest.
+
+Each key maps to the one run it created, so a retried or follow-up ingest
+with the same key updates that run instead of inserting another. The key
+lives in its own table because agent_runs is partitioned by created_at
+and cannot hold a unique index without it; `created_at` is kept here so
+the run is looked up in a single partition.
+
+Existing runs with a session_key are seeded under the default key
+(session_key:run_type), newest run first where they collide.
+
+Revision ID: e8a3b4c5d6f7
+Revises: d7f2a3b4c5e6
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+revision = "e8a3b4c5d6f7"
+down_revision = "d7f2a3b4c5e6"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE agent_run_keys (
+            key varchar(255) PRIMARY KEY,
+            run_id uuid NOT NULL,
+            created_at timestamptz NOT NULL
+        )
+    """)
+    op.execute("CREATE INDEX ix_agent_run_keys_created_at ON agent_run_keys (created_at)")
+    op.execute("""
+        INSERT INTO agent_run_keys (key, run_id, created_at)
+        SELECT DISTINCT ON (session_key || ':' || run_type)
+            session_key || ':' || run_type, id, created_at
+        FROM agent_runs
+        WHERE session_key IS NOT NULL
+        ORDER BY session_key || ':' || run_type, created_at DESC, id DESC
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS agent_run_keys")
@@ -0,0 +1,181 @@
+"""Add mc_tasks_archive — finished tasks moved out of the hot table.
+
+The archive is range-partitioned by `completed_at`, one partition per UTC
+month, created on demand by `mc_tasks_archive_move()`. That function moves
+one batch of done/cancelled tasks finished before a cutoff in a single
+DELETE ... RETURNING / INSERT, so mc_tasks only holds live work and recent
+history. `mc_tasks_all` unions both tiers for reads that fall through.
+
+The counter and tag rollups are attached to the archive too, so moving a
+task nets out to zero and dashboard totals still cover archived work. The
+delete logs a change-feed tombstone, so delta-sync clients drop archived
+tasks from their hot view.
+
+Comments and activity keep pointing at archived tasks, so any foreign key
+from mc_comments or mc_activity to mc_tasks is dropped; the service checks
+that a task exists in either tier before writing a comment, and deletes a
+task's comments and activity along with it.
+
+Revision ID: f2b6c7d8e9a1
+Revises: e1a4b5c6d7f8
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+revision = "f2b6c7d8e9a1"
+down_revision = "e1a4b5c6d7f8"
+branch_labels = None
+depends_on = None
+
+# Rollups maintained on the hot table that must also see archive writes
+_ROLLUPS = (
+    ("counters", "mc_task_counters_apply"),
+    ("tags", "mc_task_tags_apply"),
+)
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE mc_tasks_archive (LIKE mc_tasks INCLUDING GENERATED)
+        PARTITION BY RANGE (completed_at)
+    """)
+    op.execute("ALTER TABLE mc_tasks_archive ALTER COLUMN completed_at SET NOT NULL")
+    op.execute("ALTER TABLE mc_tasks_archive ADD PRIMARY KEY (id, completed_at)")
+    op.execute("CREATE INDEX idx_mc_tasks_archive_id ON mc_tasks_archive (id)")
+    op.execute(
+        "CREATE INDEX idx_mc_tasks_archive_search ON mc_tasks_archive USING gin (search_vector)"
+    )
+
+    # `*` is expanded now, so the view keeps this column list even if mc_tasks grows later
+    op.execute("""
+        CREATE VIEW mc_tasks_all AS
+        SELECT * FROM mc_tasks
+        UNION ALL
+        SELECT * FROM mc_tasks_archive
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION mc_tasks_archive_partition(m date) RETURNS void AS $$
+        DECLARE
+            lo timestamp := date_trunc('month', m::timestamp);
+        BEGIN
+            EXECUTE format(
+                'CREATE TABLE IF NOT EXISTS %I PARTITION OF mc_tasks_archive '
+                'FOR VALUES FROM (%L) TO (%L)',
+                'mc_tasks_archive_' || to_char(lo, 'YYYY_MM'),
+                lo AT TIME ZONE 'UTC',
+                (lo + interval '1 month') AT TIME ZONE 'UTC'
+            );
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    # Rows without completed_at (finished before it was recorded) archive under updated_at.
+    # Only columns the archive has and can be written are copied; generated ones recompute.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION mc_tasks_archive_move(cutoff timestamptz, batch integer)
+        RETURNS SETOF integer AS $$
+        DECLARE
+            ids integer[];
+            cols text;
+            m date;
+        BEGIN
+            -- One archiver at a time, so partition creation never races
+            PERFORM pg_advisory_xact_lock(hashtext('mc_tasks_archive'));
+            SELECT array_agg(id) INTO ids FROM (
+                SELECT id FROM mc_tasks
+                WHERE state IN ('done', 'cancelled')
+                  AND COALESCE(completed_at, updated_at) < cutoff
+                ORDER BY id
+                LIMIT batch
+                FOR UPDATE SKIP LOCKED
+            ) candidates;
+            IF ids IS NULL THEN
+                RETURN;
+            END IF;
+
+            FOR m IN
+                SELECT DISTINCT date_trunc('month', COALESCE(completed_at, updated_at)
+                    AT TIME ZONE 'UTC')::date
+                FROM mc_tasks WHERE id = ANY(ids)
+            LOOP
+                PERFORM mc_tasks_archive_partition(m);
+            END LOOP;
+
+            SELECT string_agg(quote_ident(column_name), ', ' ORDER BY ordinal_position)
+            INTO cols
+            FROM information_schema.columns
+            WHERE table_schema = current_schema()
+              AND table_name = 'mc_tasks_archive'
+              AND is_generated = 'NEVER'
+              AND column_name <> 'completed_at';
+
+            RETURN QUERY EXECUTE format(
+                'WITH moved AS (DELETE FROM mc_tasks WHERE id = ANY($1) RETURNING *) '
+                'INSERT INTO mc_tasks_archive (%1$s, completed_at) '
+                'SELECT %1$s, COALESCE(completed_at, updated_at) FROM moved '
+                'RETURNING id',
+                cols
+            ) USING ids;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    for name, function in _ROLLUPS:
+        for event, tables in (
+            ("INSERT", "NEW TABLE AS new_rows"),
+            ("UPDATE", "OLD TABLE AS old_rows NEW TABLE AS new_rows"),
+            ("DELETE", "OLD TABLE AS old_rows"),
+        ):
+            op.execute(f"""
+                CREATE TRIGGER mc_tasks_archive_{name}_{event.lower()}
+                AFTER {event} ON mc_tasks_archive
+                REFERENCING {tables}
+                FOR EACH STATEMENT EXECUTE FUNCTION {function}()
+            """)
+
+    op.execute("""
+        DO $$
+        DECLARE
+            fk record;
+        BEGIN
+            FOR fk IN
+                SELECT conrelid::regclass AS tbl, conname
+                FROM pg_constraint
+                WHERE contype = 'f'
+                  AND confrelid = 'mc_tasks'::regclass
+                  AND conrelid IN (to_regclass('mc_comments'), to_regclass('mc_activity'))
+            LOOP
+                EXECUTE format('ALTER TABLE %s DROP CONSTRAINT %I', fk.tbl, fk.conname);
+            END LOOP;
+        END;
+        $$
+    """)
+
+
+def downgrade() -> None:
+    # Archived tasks go back to the hot table before the archive is dropped.
+    # Foreign keys dropped by the upgrade are not recreated.
+    op.execute("""
+        DO $$
+        DECLARE
+            cols text;
+        BEGIN
+            SELECT string_agg(quote_ident(column_name), ', ' ORDER BY ordinal_position)
+            INTO cols
+            FROM information_schema.columns
+            WHERE table_schema = current_schema()
+              AND table_name = 'mc_tasks_archive'
+              AND is_generated = 'NEVER';
+            EXECUTE format(
+                'INSERT INTO mc_tasks (%1$s) SELECT %1$s FROM mc_tasks_archive', cols
+            );
+            DELETE FROM mc_tasks_archive;
+        END;
+        $$
+    """)
+    op.execute("DROP VIEW IF EXISTS mc_tasks_all")
+    op.execute("DROP TABLE IF EXISTS mc_tasks_archive")
+    op.execute("DROP FUNCTION IF EXISTS mc_tasks_archive_move(timestamptz, integer)")
+    op.execute("DROP FUNCTION IF EXISTS mc_tasks_archive_partition(date)")
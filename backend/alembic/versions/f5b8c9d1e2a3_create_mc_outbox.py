@@ -0,0 +1,30 @@
+"""Create mc_outbox for transactional side effects (broadcasts and activity events).
+
+Revision ID: f5b8c9d1e2a3
+Revises: e4a7b8c9d1f2
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+revision = "f5b8c9d1e2a3"
+down_revision = "e4a7b8c9d1f2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Rows live only until delivered, so the table stays small; id order is delivery order
+    op.execute("""
+        CREATE TABLE mc_outbox (
+            id bigserial PRIMARY KEY,
+            topic text NOT NULL,
+            payload jsonb NOT NULL,
+            activity jsonb,
+            created_at timestamptz NOT NULL DEFAULT now()
+        )
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS mc_outbox")
@@ -0,0 +1,43 @@
+"""Add NOTIFY trigger that announces newly claimable mc_tasks rows.
+
+Revision ID: f8b2c3d4e5a6
+Revises: e7a1b2c3d4f5
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+revision = "f8b2c3d4e5a6"
+down_revision = "e7a1b2c3d4f5"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Fires only when a row is (or becomes) pickup-eligible, so idle traffic stays silent
+    op.execute("""
+        CREATE OR REPLACE FUNCTION mc_tasks_queue_notify() RETURNS trigger AS $$
+        BEGIN
+            IF NEW.state = 'todo'
+               AND NOT COALESCE(NEW.picked_up, false)
+               AND COALESCE(NEW.blocked_by, '{}') = '{}'
+               AND NEW.claimed_by IS NULL THEN
+                PERFORM pg_notify(
+                    'mc_tasks_queue',
+                    json_build_object('id', NEW.id, 'project', NEW.project)::text
+                );
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER mc_tasks_queue_notify
+        AFTER INSERT OR UPDATE OF state, picked_up, blocked_by, claimed_by ON mc_tasks
+        FOR EACH ROW EXECUTE FUNCTION mc_tasks_queue_notify()
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS mc_tasks_queue_notify ON mc_tasks")
+    op.execute("DROP FUNCTION IF EXISTS mc_tasks_queue_notify()")
@@ -0,0 +1,142 @@
+"""Add agent_status — one row per agent, kept current from agent_log inserts.
+
+Holds what the agent list and office view used to aggregate from the whole
+log on every call: last entry (time, message, level), entry count, and
+warning/error counts for the last 7 UTC days, keyed by day in
+`warnings_by_day` and pruned as the days age out.
+
+A statement-level trigger folds each insert on agent_log into it, one
+upsert per agent rather than per row, so writes that bypass the API are
+counted too. agent_log is append-only: retired partitions are dropped
+without touching the counts, so total_entries is entries ever logged.
+
+Revision ID: f9c4d5e6a7b8
+Revises: e8a3b4c5d6f7
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+revision = "f9c4d5e6a7b8"
+down_revision = "e8a3b4c5d6f7"
+branch_labels = None
+depends_on = None
+
+# Levels counted as warnings, matching the filters in modules/agents/service.py
+_WARNING_LEVELS = "('warning', 'WARNING', 'error', 'ERROR')"
+
+
+def _upsert(rows: str) -> str:
+    """Fold the agent_log rows in `rows` into agent_status, in key order so
+    concurrent statements lock status rows consistently."""
+    return f"""
+        WITH batch AS (
+            SELECT agent, count(*) AS n FROM {rows} GROUP BY agent
+        ),
+        latest AS (
+            SELECT DISTINCT ON (agent) agent, created_at, message, level
+            FROM {rows}
+            ORDER BY agent, created_at DESC, id DESC
+        ),
+        warnings AS (
+            SELECT agent, jsonb_object_agg(day, n) AS days
+            FROM (
+                SELECT agent, (created_at AT TIME ZONE 'UTC')::date::text AS day, count(*) AS n
+                FROM {rows}
+                WHERE level IN {_WARNING_LEVELS}
+                    AND (created_at AT TIME ZONE 'UTC')::date
+                        > (now() AT TIME ZONE 'UTC')::date - 7
+                GROUP BY 1, 2
+            ) w
+            GROUP BY agent
+        )
+        INSERT INTO agent_status AS s (
+            agent, last_activity, last_message, last_level, total_entries, warnings_by_day
+        )
+        SELECT b.agent, l.created_at, l.message, l.level, b.n, COALESCE(w.days, '{{}}')
+        FROM batch b
+        JOIN latest l USING (agent)
+        LEFT JOIN warnings w USING (agent)
+        ORDER BY b.agent
+        ON CONFLICT (agent) DO UPDATE SET
+            last_activity = GREATEST(s.last_activity, EXCLUDED.last_activity),
+            last_message = CASE WHEN EXCLUDED.last_activity >= s.last_activity
+                THEN EXCLUDED.last_message ELSE s.last_message END,
+            last_level = CASE WHEN EXCLUDED.last_activity >= s.last_activity
+                THEN EXCLUDED.last_level ELSE s.last_level END,
+            total_entries = s.total_entries + EXCLUDED.total_entries,
+            warnings_by_day = agent_status_merge_warnings(
+                s.warnings_by_day, EXCLUDED.warnings_by_day
+            )
+    """
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE agent_status (
+            agent text PRIMARY KEY,
+            last_activity timestamptz NOT NULL,
+            last_message text,
+            last_level text,
+            total_entries bigint NOT NULL DEFAULT 0,
+            warnings_by_day jsonb NOT NULL DEFAULT '{}'
+        )
+    """)
+
+    # Sums two day -> count maps, keeping only the last 7 UTC days
+    op.execute("""
+        CREATE OR REPLACE FUNCTION agent_status_merge_warnings(a jsonb, b jsonb)
+        RETURNS jsonb AS $$
+            SELECT COALESCE(jsonb_object_agg(day, n), '{}')
+            FROM (
+                SELECT key AS day, sum(value::bigint) AS n
+                FROM (
+                    SELECT * FROM jsonb_each_text(a)
+                    UNION ALL
+                    SELECT * FROM jsonb_each_text(b)
+                ) e
+                WHERE key::date > (now() AT TIME ZONE 'UTC')::date - 7
+                GROUP BY key
+            ) d
+        $$ LANGUAGE sql STABLE
+    """)
+
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION agent_status_apply() RETURNS trigger AS $$
+        BEGIN
+            {_upsert("new_rows")};
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER agent_log_status_insert
+        AFTER INSERT ON agent_log
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION agent_status_apply()
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION agent_status_truncate() RETURNS trigger AS $$
+        BEGIN
+            DELETE FROM agent_status;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER agent_log_status_truncate
+        AFTER TRUNCATE ON agent_log
+        FOR EACH STATEMENT EXECUTE FUNCTION agent_status_truncate()
+    """)
+
+    # CREATE TRIGGER holds off writes until commit, so the seed cannot miss any
+    op.execute(_upsert("agent_log"))
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS agent_log_status_truncate ON agent_log")
+    op.execute("DROP TRIGGER IF EXISTS agent_log_status_insert ON agent_log")
+    op.execute("DROP FUNCTION IF EXISTS agent_status_truncate()")
+    op.execute("DROP FUNCTION IF EXISTS agent_status_apply()")
+    op.execute("DROP FUNCTION IF EXISTS agent_status_merge_warnings(jsonb, jsonb)")
+    op.execute("DROP TABLE IF EXISTS agent_status")
@@ -0,0 +1,55 @@
+"""Periodic background jobs for module lifespan hooks."""
+
+import asyncio
+import contextlib
+import logging
+from collections.abc import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicJob:
+    """Run an async callable every `interval` seconds until stopped.
+
+    Failures are logged and the loop carries on, so one bad cycle never
+    takes the job down for the lifetime of the process.
+    """
+
+    def __init__(self, name: str, func: Callable[[], Awaitable[None]], interval: float) -> None:
+        self.name = name
+        self.interval = interval
+        self._func = func
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, *, immediate: bool = True) -> None:
+        """Begin the loop; with immediate=False the first run waits one interval."""
+        if self.running:
+            return
+        self._task = asyncio.create_task(self._run(immediate), name=self.name)
+        logger.info("Started background job: %s (every %ss)", self.name, self.interval)
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+        logger.info("Stopped background job: %s", self.name)
+
+    async def run_once(self) -> None:
+        try:
+            await self._func()
+        except Exception:
+            logger.exception("Background job %s failed", self.name)
+
+    async def _run(self, immediate: bool) -> None:
+        if not immediate:
+            await asyncio.sleep(self.interval)
+        while True:
+            await self.run_once()
+            await asyncio.sleep(self.interval)
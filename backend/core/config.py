@@ -1,9 +1,19 @@
 from pathlib import Path
 
-from pydantic import model_validator
+from pydantic import ValidationInfo, field_validator, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
+def _parse_pairs(value: str) -> dict[str, str]:
+    """Parse "key:value,key:value" into a dict, skipping blank entries."""
+    pairs: dict[str, str] = {}
+    for item in value.split(","):
+        key, sep, raw = item.strip().rpartition(":")
+        if sep and key.strip():
+            pairs[key.strip()] = raw.strip()
+    return pairs
+
+
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(
         env_file=Path(__file__).resolve().parent.parent.parent / ".env",
@@ -27,6 +37,47 @@ class Settings(BaseSettings):
     openclaw_gateway_url: str = "http://localhost:18789"
     openclaw_gateway_token: str = ""
 
+    # Task claim leases — agents heartbeat to extend; the reaper frees expired claims
+    task_lease_seconds: int = 900
+    task_reaper_interval_seconds: int = 30
+    task_reaper_batch_size: int = 100
+
+    # Queue policy — per-agent in-flight cap (0 = unlimited) with "agent:n,..."
+    # overrides, "project:weight,..." fair-share weights (default 1), and how long
+    # a queued task waits before its priority improves one level (0 = no aging)
+    task_agent_max_in_flight: int = 0
+    task_agent_limits: str = ""
+    task_project_weights: str = ""
+    task_priority_aging_seconds: int = 3600
+
+    # Dependency index — periodic rebuild picks up blocked_by edits made outside the API
+    task_graph_resync_seconds: int = 300
+
+    # Scheduler — cron templates are expanded this far ahead, in this timezone
+    task_schedule_timezone: str = "UTC"
+    task_schedule_lookahead_hours: int = 24
+    task_schedule_expand_interval_seconds: int = 3600
+
+    # Delta sync — how long deletes stay visible to /api/tasks/changes
+    task_changes_retention_days: int = 30
+
+    # Archive — done/cancelled tasks finished this many days ago move to
+    # mc_tasks_archive (0 = never), this many per statement. Lists, pages and
+    # exports leave them out unless include_archived is set
+    task_archive_after_days: int = 30
+    task_archive_batch_size: int = 500
+
+    # Largest run batch accepted by POST /api/runs/ingest/batch
+    runs_ingest_batch_max: int = 5000
+
+    # Monthly partitions of agent_runs and agent_log — kept created this many
+    # months ahead; months older than the retention are dropped (0 = keep
+    # forever), or only detached for archiving when detach_only is set
+    partition_months_ahead: int = 3
+    runs_retention_months: int = 0
+    agent_log_retention_months: int = 0
+    partition_retention_detach_only: bool = False
+
     # Cloudflare Access (empty = disabled)
     cf_access_team: str = ""
     cf_access_audience: str = ""
@@ -34,6 +85,23 @@ class Settings(BaseSettings):
     # Path to gog CLI binary (empty = calendar disabled)
     gog_path: str = "/opt/homebrew/bin/gog"
 
+    @field_validator("task_agent_limits", "task_project_weights")
+    @classmethod
+    def _validate_pairs(cls, value: str, info: ValidationInfo) -> str:
+        """Reject malformed "key:n" lists at startup rather than on the first claim."""
+        cast = int if info.field_name == "task_agent_limits" else float
+        for item in filter(None, (i.strip() for i in value.split(","))):
+            key, sep, raw = item.rpartition(":")
+            try:
+                if not (sep and key.strip()) or cast(raw) < 0:
+                    raise ValueError
+            except ValueError:
+                raise ValueError(
+                    f"{info.field_name.upper()} entry {item!r} is not a "
+                    f"non-negative {cast.__name__} in the form key:n"
+                ) from None
+        return value
+
     @model_validator(mode="after")
     def _validate_production_secret(self):
         if not self.debug and "change" in self.session_secret.lower():
@@ -47,6 +115,15 @@ class Settings(BaseSettings):
     def cors_origin_list(self) -> list[str]:
         return [o.strip() for o in self.cors_origins.split(",")]
 
+    @property
+    def task_agent_limit_map(self) -> dict[str, int]:
+        return {k: int(n) for k, n in _parse_pairs(self.task_agent_limits).items()}
+
+    @property
+    def task_project_weight_map(self) -> dict[str, float]:
+        weights = {k: float(w) for k, w in _parse_pairs(self.task_project_weights).items()}
+        return {k: w for k, w in weights.items() if w > 0}
+
     @property
     def memory_dir(self) -> Path:
         return Path(self.memory_path).expanduser()
@@ -0,0 +1,94 @@
+"""Streaming NDJSON/CSV exports read through a server-side cursor.
+
+Rows are fetched and encoded EXPORT_CHUNK_ROWS at a time, so an export
+holds one chunk in memory however many rows it covers. Each export opens
+its own session: request-scoped sessions from get_db are closed before a
+streamed body is sent.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+from collections.abc import AsyncIterator, Callable, Mapping
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Literal
+from uuid import UUID
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import text
+
+from core.database import async_session
+
+ExportFormat = Literal["ndjson", "csv"]
+
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+EXPORT_CHUNK_ROWS = 1000
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime | date):
+        return value.isoformat()
+    if isinstance(value, UUID | Decimal):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _csv_value(value: Any) -> Any:
+    """A CSV cell: nested values as JSON, times as ISO 8601, NULL as empty."""
+    if value is None:
+        return ""
+    if isinstance(value, dict | list):
+        return json.dumps(value, default=_json_default)
+    return _json_default(value) if isinstance(value, datetime | date | UUID) else value
+
+
+def _encode(records: list[dict], fmt: ExportFormat, header: list[str] | None) -> bytes:
+    """One chunk of output, starting with the CSV header row when `header` is given."""
+    if fmt == "ndjson":
+        return "".join(
+            json.dumps(record, default=_json_default, separators=(",", ":")) + "\n"
+            for record in records
+        ).encode()
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header is not None:
+        writer.writerow(header)
+    writer.writerows([_csv_value(v) for v in record.values()] for record in records)
+    return buffer.getvalue().encode()
+
+
+async def stream_query(
+    sql: str,
+    params: dict,
+    fmt: ExportFormat,
+    transform: Callable[[Mapping], dict] | None = None,
+) -> AsyncIterator[bytes]:
+    """Encoded chunks of the rows `sql` returns, optionally mapped through `transform`.
+
+    CSV columns follow the first record; an empty CSV export is the header
+    alone when no `transform` reshapes the rows, else empty.
+    """
+    async with async_session() as session:
+        result = await session.stream(text(sql), params)
+        header_sent = fmt != "csv"
+        async for rows in result.partitions(EXPORT_CHUNK_ROWS):
+            records = [transform(row._mapping) if transform else dict(row._mapping) for row in rows]
+            header = None if header_sent else list(records[0])
+            header_sent = True
+            yield _encode(records, fmt, header)
+        if not header_sent and transform is None:
+            yield _encode([], fmt, list(result.keys()))
+
+
+def export_response(
+    chunks: AsyncIterator[bytes], fmt: ExportFormat, filename: str
+) -> StreamingResponse:
+    """StreamingResponse for an export, offered as a `<filename>.<fmt>` download."""
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
@@ -29,7 +29,20 @@ logger = logging.getLogger(__name__)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("Mission Control starting up")
+    # Optional per-module background services (MODULE_INFO "startup"/"shutdown")
+    for mod in app.state.modules:
+        if startup := mod.get("startup"):
+            try:
+                await startup()
+            except Exception:
+                logger.exception("Startup hook failed for module: %s", mod["name"])
     yield
+    for mod in reversed(app.state.modules):
+        if shutdown := mod.get("shutdown"):
+            try:
+                await shutdown()
+            except Exception:
+                logger.exception("Shutdown hook failed for module: %s", mod["name"])
     await engine.dispose()
     logger.info("Mission Control shut down")
 
@@ -55,6 +68,7 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
         allow_headers=["Content-Type", "Authorization", "Cf-Access-Jwt-Assertion"],
+        expose_headers=["X-Next-Cursor"],
     )
 
     # 4. Request logging (innermost — logs method, path, status, timing as JSON)
@@ -1,5 +1,6 @@
 """Activity Timeline module — cross-module event feed."""
 
+from .lifecycle import shutdown, startup
 from .router import router
 
 MODULE_INFO = {
@@ -8,4 +9,6 @@ MODULE_INFO = {
     "icon": "📡",
     "router": router,
     "prefix": "/api/activity",
+    "startup": startup,
+    "shutdown": shutdown,
 }
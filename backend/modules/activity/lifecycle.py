@@ -0,0 +1,13 @@
+"""Activity module background services — started and stopped from the app lifespan."""
+
+from __future__ import annotations
+
+from .outbox import outbox_dispatcher
+
+
+async def startup() -> None:
+    outbox_dispatcher.start()
+
+
+async def shutdown() -> None:
+    await outbox_dispatcher.stop()
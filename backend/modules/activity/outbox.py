@@ -0,0 +1,239 @@
+"""Transactional outbox — side effects recorded with the change, delivered after commit.
+
+Writers call `enqueue()` inside the transaction that changes their data, so
+the WebSocket broadcast and activity event commit (or roll back) with it.
+The dispatcher drains the table in batches off the request path and
+deletes rows only after logging their activity events and sending their
+broadcasts, so both are at-least-once: a crash before the delete commits
+delivers them again. Clients should expect the odd duplicate broadcast;
+they re-fetch by delta sync, so a repeat is harmless. A row that fails is
+retried with backoff instead of blocking the queue, and moves to
+mc_outbox_dead after `max_attempts`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import logging
+
+from pydantic import ValidationError
+from sqlalchemy import event, text
+
+from core.database import async_session
+from core.websocket import manager
+
+from .models import ActivityLogRequest
+from .service import activity_service
+
+logger = logging.getLogger(__name__)
+
+
+async def enqueue(
+    session,
+    topic: str,
+    payload: dict,
+    activity: ActivityLogRequest | None = None,
+) -> None:
+    """Record a broadcast (and optional activity event) in the caller's transaction."""
+    await session.execute(
+        text("""
+            INSERT INTO mc_outbox (topic, payload, activity)
+            VALUES (:topic, CAST(:payload AS jsonb), CAST(:activity AS jsonb))
+        """),
+        {
+            "topic": topic,
+            "payload": json.dumps(payload, default=str),
+            "activity": activity.model_dump_json() if activity else None,
+        },
+    )
+    # Deliver as soon as the transaction commits rather than at the next poll
+    sync_session = session.sync_session
+    if not event.contains(sync_session, "after_commit", _wake_dispatcher):
+        event.listen(sync_session, "after_commit", _wake_dispatcher, once=True)
+
+
+def _wake_dispatcher(_session) -> None:
+    outbox_dispatcher.wake()
+
+
+class OutboxDispatcher:
+    """Background drain of mc_outbox: activity events, then broadcasts, then delete."""
+
+    def __init__(
+        self,
+        batch_size: int = 200,
+        poll_interval: float = 2.0,
+        max_attempts: int = 8,
+        retry_delay_max: float = 300.0,
+    ) -> None:
+        self.batch_size = batch_size
+        # Fallback for rows written by other processes or left by a crash
+        self.poll_interval = poll_interval
+        # A failing row is retried after poll_interval * 2^attempts seconds, up to the cap
+        self.max_attempts = max_attempts
+        self.retry_delay_max = retry_delay_max
+        self._event = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def wake(self) -> None:
+        self._event.set()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._task = asyncio.create_task(self._run(), name="activity-outbox-dispatcher")
+        logger.info("Outbox dispatcher started")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+        # Best effort: deliver what committed before shutdown; the rest waits for next start
+        try:
+            await self.drain()
+        except Exception:
+            logger.exception("Outbox drain on shutdown failed")
+        logger.info("Outbox dispatcher stopped")
+
+    async def drain(self) -> int:
+        """Dispatch batches until no row is due. Returns rows taken, delivered or deferred."""
+        total = 0
+        while True:
+            delivered = await self.dispatch_batch()
+            total += delivered
+            if delivered < self.batch_size:
+                return total
+
+    async def dispatch_batch(self) -> int:
+        """Deliver the due rows at the head of the outbox. Returns the rows taken.
+
+        Rows that fail are deferred (or dead-lettered) rather than rolled
+        back, so the next batch moves past them.
+        """
+        async with async_session() as session:
+            result = await session.execute(
+                text("""
+                    SELECT id, topic, payload, activity, attempts FROM mc_outbox
+                    WHERE available_at <= now()
+                    ORDER BY id
+                    LIMIT :limit
+                    FOR UPDATE SKIP LOCKED
+                """),
+                {"limit": self.batch_size},
+            )
+            rows = result.all()
+            if not rows:
+                return 0
+
+            failed = await self._log_activities(rows)
+            delivered = [r for r in rows if r.id not in failed]
+            # Sent before the delete commits, so a crash repeats a broadcast rather
+            # than losing it; a failed send is logged and not retried
+            for row in delivered:
+                try:
+                    await manager.broadcast(row.topic, row.payload)
+                except Exception:
+                    logger.exception("Outbox broadcast failed: %s", row.topic)
+            if delivered:
+                await session.execute(
+                    text("DELETE FROM mc_outbox WHERE id = ANY(:ids)"),
+                    {"ids": [r.id for r in delivered]},
+                )
+            if failed:
+                await self._defer(session, failed)
+            await session.commit()
+        return len(rows)
+
+    async def _log_activities(self, rows) -> dict[int, tuple[str, bool]]:
+        """Log the rows' activity events together, falling back to one at a time.
+
+        Returns (error, permanent) for each row whose event could not be logged.
+        """
+        failed: dict[int, tuple[str, bool]] = {}
+        pending: list[tuple[int, ActivityLogRequest]] = []
+        for row in rows:
+            if not row.activity:
+                continue
+            try:
+                pending.append((row.id, ActivityLogRequest(**row.activity)))
+            except (TypeError, ValidationError) as e:
+                failed[row.id] = (f"Invalid activity: {e}", True)
+        if not pending:
+            return failed
+
+        try:
+            await activity_service.log_events([req for _, req in pending])
+            return failed
+        except Exception:
+            logger.warning("Outbox activity batch failed; logging rows one by one", exc_info=True)
+        for row_id, req in pending:
+            try:
+                await activity_service.log_events([req])
+            except Exception as e:
+                logger.warning("Outbox activity for row %d failed", row_id, exc_info=True)
+                failed[row_id] = (repr(e), False)
+        return failed
+
+    async def _defer(self, session, failed: dict[int, tuple[str, bool]]) -> None:
+        """Push failed rows back with backoff; move exhausted ones to mc_outbox_dead."""
+        await session.execute(
+            text("""
+                UPDATE mc_outbox o SET
+                    attempts = CASE WHEN f.permanent THEN :max_attempts ELSE o.attempts + 1 END,
+                    last_error = f.error,
+                    available_at = now() + make_interval(
+                        secs => LEAST(:base * power(2, o.attempts), :cap)
+                    )
+                FROM unnest(
+                    CAST(:ids AS bigint[]), CAST(:errors AS text[]), CAST(:permanent AS boolean[])
+                ) AS f (id, error, permanent)
+                WHERE o.id = f.id
+            """),
+            {
+                "ids": list(failed),
+                "errors": [error for error, _ in failed.values()],
+                "permanent": [permanent for _, permanent in failed.values()],
+                "max_attempts": self.max_attempts,
+                "base": self.poll_interval,
+                "cap": self.retry_delay_max,
+            },
+        )
+        result = await session.execute(
+            text("""
+                WITH dead AS (
+                    DELETE FROM mc_outbox
+                    WHERE id = ANY(:ids) AND attempts >= :max_attempts
+                    RETURNING id, topic, payload, activity, created_at, attempts, last_error
+                )
+                INSERT INTO mc_outbox_dead
+                    (id, topic, payload, activity, created_at, attempts, last_error)
+                SELECT * FROM dead
+                RETURNING id
+            """),
+            {"ids": list(failed), "max_attempts": self.max_attempts},
+        )
+        dead = result.scalars().all()
+        if dead:
+            logger.error("Moved outbox row(s) %s to mc_outbox_dead", ", ".join(map(str, dead)))
+
+    async def _run(self) -> None:
+        while True:
+            self._event.clear()
+            try:
+                await self.drain()
+            except Exception:
+                logger.exception("Outbox dispatch failed; retrying")
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._event.wait(), self.poll_interval)
+
+
+outbox_dispatcher = OutboxDispatcher()
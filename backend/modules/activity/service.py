@@ -52,9 +52,22 @@ class ActivityService:
             self._data_file.parent.mkdir(parents=True, exist_ok=True)
             self._data_file.write_text(json.dumps(events, indent=2), encoding="utf-8")
 
-    async def log_event(self, req: ActivityLogRequest) -> ActivityEvent:
-        """Log a new activity event and return it."""
-        event = ActivityEvent(
+    def _extend_sync(self, new_events: list[dict]) -> None:
+        """Prepend a batch (newest first) with a single read and rewrite of the file."""
+        with _lock:
+            try:
+                events = json.loads(self._data_file.read_text(encoding="utf-8"))
+            except Exception:
+                events = []
+            events[:0] = reversed(new_events)
+            if len(events) > _MAX_EVENTS:
+                events = events[:_MAX_EVENTS]
+            self._data_file.parent.mkdir(parents=True, exist_ok=True)
+            self._data_file.write_text(json.dumps(events, indent=2), encoding="utf-8")
+
+    @staticmethod
+    def _new_event(req: ActivityLogRequest) -> ActivityEvent:
+        return ActivityEvent(
             id=str(uuid4()),
             timestamp=datetime.now(timezone.utc),
             actor=req.actor,
@@ -65,6 +78,10 @@ class ActivityService:
             details=req.details,
             module=req.module,
         )
+
+    async def log_event(self, req: ActivityLogRequest) -> ActivityEvent:
+        """Log a new activity event and return it."""
+        event = self._new_event(req)
         await asyncio.to_thread(self._append_sync, event.model_dump(mode="json"))
         try:
             await manager.broadcast("activity:new", event.model_dump(mode="json"))
@@ -72,6 +89,19 @@ class ActivityService:
             pass  # Don't fail event logging if broadcast fails
         return event
 
+    async def log_events(self, reqs: list[ActivityLogRequest]) -> list[ActivityEvent]:
+        """Log several events (oldest first) with one file rewrite."""
+        events = [self._new_event(req) for req in reqs]
+        if not events:
+            return []
+        await asyncio.to_thread(self._extend_sync, [e.model_dump(mode="json") for e in events])
+        for event in events:
+            try:
+                await manager.broadcast("activity:new", event.model_dump(mode="json"))
+            except Exception:
+                pass  # Don't fail event logging if broadcast fails
+        return events
+
     async def get_feed(
         self,
         limit: int = 50,
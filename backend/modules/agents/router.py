@@ -4,6 +4,7 @@ import json
 import logging
 
 from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional
 from sqlalchemy import text
@@ -11,6 +12,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.config import settings
 from core.database import get_db
+from core.export import ExportFormat, export_response
 from core.rate_limit import limiter
 from core.websocket import manager
 
@@ -87,6 +89,17 @@ async def get_agent_log(
     return AgentLogPage(entries=entries, total=total, page=page, page_size=page_size)
 
 
+@router.get("/{agent_id}/log/export")
+async def export_agent_log(
+    agent_id: str,
+    level: str | None = Query(None),
+    fmt: ExportFormat = Query("ndjson", alias="format"),
+) -> StreamingResponse:
+    """Stream an agent's whole log history as NDJSON or CSV, newest first."""
+    chunks = agent_service.export_log(agent_id, level, fmt)
+    return export_response(chunks, fmt, f"agent_log_{agent_id}")
+
+
 async def verify_mc_token(x_mc_token: str = Header(...)):
     """Validate the X-MC-Token header against settings."""
     if x_mc_token != settings.openclaw_hooks_token:
@@ -106,7 +119,10 @@ async def create_agent_log(
     _: None = Depends(verify_mc_token),
     db: AsyncSession = Depends(get_db),
 ):
-    """Write a log entry for a specific agent. Requires X-MC-Token auth."""
+    """Write a log entry for a specific agent. Requires X-MC-Token auth.
+
+    The agent's agent_status row is upserted by trigger in the same transaction.
+    """
     result = await db.execute(
         text("""
             INSERT INTO agent_log (agent, level, message, metadata, created_at)
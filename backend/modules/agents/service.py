@@ -1,7 +1,12 @@
-"""Agents module service — queries agent_log table, triggers via OpenClaw gateway."""
+"""Agents module service — queries agent_log and agent_status, triggers via OpenClaw gateway.
+
+agent_status holds one row per agent, kept current by a trigger on agent_log
+inserts, so the agent list and office view never scan the log.
+"""
 
 import datetime as dt
 import logging
+from collections.abc import AsyncIterator
 
 import httpx
 from sqlalchemy import text
@@ -9,6 +14,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.config import settings
 from core.constants import AGENT_METADATA, KNOWN_AGENTS
+from core.export import ExportFormat, stream_query
 
 from .models import (
     AgentDetailResponse,
@@ -23,37 +29,40 @@ from .models import (
 logger = logging.getLogger(__name__)
 
 
+def _log_filters(agent_id: str | None, level: str | None) -> tuple[str, dict]:
+    """WHERE clause and params for the agent log filters."""
+    filters = []
+    params: dict = {}
+
+    if agent_id:
+        filters.append("agent = :agent_id")
+        params["agent_id"] = agent_id
+
+    if level:
+        filters.append("LOWER(level) = :level")
+        params["level"] = level.lower()
+
+    return (f"WHERE {' AND '.join(filters)}" if filters else ""), params
+
+
 class AgentService:
-    """Query agent_log table and interact with OpenClaw gateway."""
+    """Query agent_log and agent_status tables and interact with OpenClaw gateway."""
 
     async def list_agents(self, db: AsyncSession) -> list[AgentInfo]:
-        """List all known agents, enriched with stats from agent_log where available."""
+        """List all known agents, enriched with their agent_status row where available."""
         logged_agents: dict[str, AgentInfo] = {}
         try:
             result = await db.execute(
                 text("""
-                    WITH agent_stats AS (
-                        SELECT
-                            agent,
-                            COUNT(*) as total_entries,
-                            MAX(created_at) as last_activity,
-                            COUNT(*) FILTER (WHERE level IN ('warning', 'WARNING', 'error', 'ERROR')
-                                AND created_at >= NOW() - INTERVAL '7 days') as warning_count
-                        FROM agent_log
-                        GROUP BY agent
-                    ),
-                    latest_msg AS (
-                        SELECT DISTINCT ON (agent)
-                            agent, message, level
-                        FROM agent_log
-                        ORDER BY agent, created_at DESC
-                    )
                     SELECT
-                        s.agent, s.total_entries, s.last_activity, s.warning_count,
-                        m.message as last_message, m.level as last_level
-                    FROM agent_stats s
-                    LEFT JOIN latest_msg m ON s.agent = m.agent
-                    ORDER BY s.last_activity DESC
+                        agent, total_entries, last_activity, last_message, last_level,
+                        (
+                            SELECT COALESCE(SUM(value::bigint), 0)
+                            FROM jsonb_each_text(warnings_by_day)
+                            WHERE key::date > (NOW() AT TIME ZONE 'UTC')::date - 7
+                        ) as warning_count
+                    FROM agent_status
+                    ORDER BY last_activity DESC
                 """)
             )
             for row in result.fetchall():
@@ -66,7 +75,7 @@ class AgentService:
                     warning_count=row.warning_count,
                 )
         except Exception as exc:
-            logger.warning("Failed to query agent_log: %s", exc)
+            logger.warning("Failed to query agent_status: %s", exc)
 
         # Merge: all known agents + any extra agents found in logs
         agents: list[AgentInfo] = []
@@ -99,15 +108,19 @@ class AgentService:
         """List all agents with rich metadata, status, and current task counts."""
         agents = await self.list_agents(db)
 
-        # Get task counts per agent from mc_tasks
+        # Get task counts per agent from the mc_task_counters rollup
         task_counts: dict[str, dict] = {}
         try:
             result = await db.execute(
                 text("""
                     SELECT agent_id,
-                        COUNT(*) FILTER (WHERE state = 'in_progress') as in_progress,
-                        COUNT(*) FILTER (WHERE state NOT IN ('done', 'cancelled')) as assigned
-                    FROM mc_tasks
+                        COALESCE(SUM(n) FILTER (
+                            WHERE state = 'in_progress'
+                        ), 0)::bigint as in_progress,
+                        COALESCE(SUM(n) FILTER (
+                            WHERE state NOT IN ('done', 'cancelled')
+                        ), 0)::bigint as assigned
+                    FROM mc_task_counters
                     GROUP BY agent_id
                 """)
             )
@@ -117,7 +130,7 @@ class AgentService:
                     "assigned": row.assigned,
                 }
         except Exception as exc:
-            logger.warning("Failed to query mc_tasks for agent detail: %s", exc)
+            logger.warning("Failed to query task counters for agent detail: %s", exc)
 
         detailed = []
         for agent in agents:
@@ -172,18 +185,7 @@ class AgentService:
     ) -> tuple[list[AgentLogEntry], int]:
         """Paginated log history with optional filters."""
         try:
-            filters = []
-            params: dict = {}
-
-            if agent_id:
-                filters.append("agent = :agent_id")
-                params["agent_id"] = agent_id
-
-            if level:
-                filters.append("LOWER(level) = :level")
-                params["level"] = level.lower()
-
-            where = f"WHERE {' AND '.join(filters)}" if filters else ""
+            where, params = _log_filters(agent_id, level)
 
             count_result = await db.execute(text(f"SELECT COUNT(*) FROM agent_log {where}"), params)
             total = count_result.scalar_one()
@@ -220,6 +222,25 @@ class AgentService:
             logger.warning("Failed to get agent log: %s", exc)
             return [], 0
 
+    def export_log(
+        self, agent_id: str, level: str | None = None, fmt: ExportFormat = "ndjson"
+    ) -> AsyncIterator[bytes]:
+        """An agent's whole log, newest first, as streamed NDJSON/CSV chunks.
+
+        Rows carry the AgentLogEntry fields.
+        """
+        where, params = _log_filters(agent_id, level)
+        return stream_query(
+            f"""
+                SELECT id, agent AS agent_id, LOWER(level) AS level, message, metadata, created_at
+                FROM agent_log
+                {where}
+                ORDER BY created_at DESC, id DESC
+            """,
+            params,
+            fmt,
+        )
+
     async def get_stats(self, db: AsyncSession) -> AgentStatsResponse:
         """Aggregate stats from agent_log."""
         try:
@@ -366,10 +387,9 @@ class AgentService:
         try:
             query = text(
                 """
-                SELECT DISTINCT ON (agent) agent, created_at as last_seen, message
-                FROM agent_log
-                WHERE created_at > NOW() - INTERVAL '1 hour'
-                ORDER BY agent, created_at DESC
+                SELECT agent, last_activity as last_seen, last_message as message
+                FROM agent_status
+                WHERE last_activity > NOW() - INTERVAL '1 hour'
                 """
             )
             result = await db.execute(query)
@@ -187,20 +187,23 @@ class OverviewService:
         tasks_in_progress = 0
         tasks_in_review = 0
         try:
+            # State counts come from the mc_task_counters rollup; only the
+            # time-windowed done count touches mc_tasks (via a partial index)
             result = await db.execute(
                 text("""
                     SELECT
-                        COUNT(*) FILTER (
+                        (
+                            SELECT COUNT(*) FROM mc_tasks
                             WHERE state = 'done'
                             AND updated_at >= NOW() - INTERVAL '24 hours'
                         ) as done_24h,
-                        COUNT(*) FILTER (
+                        COALESCE(SUM(n) FILTER (
                             WHERE state = 'in_progress'
-                        ) as in_progress,
-                        COUNT(*) FILTER (
+                        ), 0)::bigint as in_progress,
+                        COALESCE(SUM(n) FILTER (
                             WHERE state IN ('peer_review', 'review')
-                        ) as in_review
-                    FROM mc_tasks
+                        ), 0)::bigint as in_review
+                    FROM mc_task_counters
                 """)
             )
             row = result.fetchone()
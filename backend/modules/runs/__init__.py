@@ -1,5 +1,6 @@
 """Agent Runs module — centralised logging of all agent activity."""
 
+from .lifecycle import shutdown, startup
 from .router import router
 
 MODULE_INFO = {
@@ -8,4 +9,6 @@ MODULE_INFO = {
     "icon": "📊",
     "router": router,
     "prefix": "/api/runs",
+    "startup": startup,
+    "shutdown": shutdown,
 }
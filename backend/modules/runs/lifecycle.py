@@ -0,0 +1,14 @@
+"""Runs module background services — started and stopped from the app lifespan."""
+
+from __future__ import annotations
+
+from .partitions import partition_maintainer
+
+
+async def startup() -> None:
+    # Runs at boot too, so a process started near a month end never writes past the last partition
+    partition_maintainer.start()
+
+
+async def shutdown() -> None:
+    await partition_maintainer.stop()
@@ -30,7 +30,14 @@ class AgentRun(BaseModel):
 
 
 class AgentRunCreate(BaseModel):
-    """POST /ingest request body."""
+    """POST /ingest request body.
+
+    Runs are deduplicated on `idempotency_key`, defaulting to
+    "<session_key>:<run_type>" when a session_key is given: ingesting an
+    existing key updates that run, so a run can be opened when it starts
+    and completed later with its outcome. Without either, every ingest
+    inserts a new run.
+    """
 
     agent_id: str
     run_type: str = "task"
@@ -44,15 +51,43 @@ class AgentRunCreate(BaseModel):
     channel: Optional[str] = None
     session_key: Optional[str] = None
     outcome: Optional[str] = None
+    idempotency_key: Optional[str] = None
+
+
+class AgentRunBatchError(BaseModel):
+    """A batch row that was not ingested."""
+
+    index: int
+    error: str
+
+
+class AgentRunBatchResult(BaseModel):
+    """POST /ingest/batch response — `ids` is aligned with the input rows.
+
+    Rows whose idempotency key already has a run are not inserted again;
+    they get that run's id and are counted in `duplicates`.
+    """
+
+    ids: list[Optional[UUID]]
+    inserted: int
+    duplicates: int = 0
+    errors: list[AgentRunBatchError] = Field(default_factory=list)
 
 
 class AgentRunList(BaseModel):
-    """Paginated response."""
+    """Paginated response.
+
+    `total` is estimated from planner statistics when counting exactly would
+    be expensive; `total_exact` says which. Pass `next_cursor` back as
+    `cursor` for the following page.
+    """
 
     items: list[AgentRun]
     total: int
+    total_exact: bool = True
     page: int
     page_size: int
+    next_cursor: Optional[str] = None
 
 
 class AgentCount(BaseModel):
@@ -68,3 +103,66 @@ class HeatmapDay(BaseModel):
     date: str
     count: int
     agents: list[AgentCount] = Field(default_factory=list)
+
+
+class AgentDaySummary(BaseModel):
+    """One agent's runs on a day, from the daily rollup."""
+
+    agent_id: str
+    runs: int
+    succeeded: int
+    failed: int
+    timed_out: int
+    tokens_used: int
+    duration_ms: int
+
+
+class DaySummary(BaseModel):
+    """Run totals for a day, overall and per agent."""
+
+    date: str
+    runs: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    timed_out: int = 0
+    tokens_used: int = 0
+    duration_ms: int = 0
+    agents: list[AgentDaySummary] = Field(default_factory=list)
+
+
+class Percentiles(BaseModel):
+    """Approximate quantiles of one measure, within 2% of the true value.
+
+    `samples` counts the runs that recorded the measure; the quantiles are
+    None when none did.
+    """
+
+    samples: int = 0
+    p50: Optional[float] = None
+    p95: Optional[float] = None
+    p99: Optional[float] = None
+
+
+class RunStats(BaseModel):
+    """Runs in an analytics window for one agent or run type (`key`).
+
+    `outcomes` counts runs by outcome, with "none" for runs that recorded
+    none; `success_rate` is the share of all runs with outcome "success".
+    """
+
+    key: str
+    runs: int = 0
+    success_rate: Optional[float] = None
+    outcomes: dict[str, int] = Field(default_factory=dict)
+    duration_ms: Percentiles = Field(default_factory=Percentiles)
+    tokens_used: Percentiles = Field(default_factory=Percentiles)
+
+
+class RunAnalytics(BaseModel):
+    """Run performance over the UTC days date_from..date_to, overall and broken down."""
+
+    date_from: str
+    date_to: str
+    overall: RunStats
+    agents: list[RunStats] = Field(default_factory=list)
+    run_types: list[RunStats] = Field(default_factory=list)
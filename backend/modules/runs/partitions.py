@@ -0,0 +1,88 @@
+"""Monthly partition upkeep for agent_runs and agent_log — creates months ahead, retires old ones."""
+
+from __future__ import annotations
+
+import logging
+from datetime import date, datetime, timezone
+
+from sqlalchemy import text
+
+from core.background import PeriodicJob
+from core.config import settings
+from core.database import async_session
+
+logger = logging.getLogger(__name__)
+
+# Partitioned table -> settings field holding its retention in months
+PARTITIONED_TABLES = {
+    "agent_runs": "runs_retention_months",
+    "agent_log": "agent_log_retention_months",
+}
+
+
+def retention_horizon(months: int, today: date | None = None) -> date | None:
+    """First UTC day still kept under a retention of `months`, or None when kept forever.
+
+    Matches mc_drop_month_partitions(): whole months before the current one
+    minus `months` are dropped.
+    """
+    if months <= 0:
+        return None
+    today = today or datetime.now(timezone.utc).date()
+    year, month = divmod(today.year * 12 + today.month - 1 - months, 12)
+    return date(year, month + 1, 1)
+
+
+async def maintain_partitions() -> tuple[list[str], list[str]]:
+    """Create the coming months' partitions and retire expired ones.
+
+    Returns the partitions created and those detached (and dropped unless
+    partition_retention_detach_only is set).
+    """
+    created: list[str] = []
+    retired: list[str] = []
+    async with async_session() as session:
+        for table, retention_field in PARTITIONED_TABLES.items():
+            result = await session.execute(
+                text("SELECT mc_month_partitions(CAST(:table AS regclass), :ahead)"),
+                {"table": table, "ahead": settings.partition_months_ahead},
+            )
+            created.extend(result.scalars().all())
+
+            keep = getattr(settings, retention_field)
+            if keep > 0:
+                result = await session.execute(
+                    text(
+                        "SELECT mc_drop_month_partitions("
+                        "CAST(:table AS regclass), :keep, :detach_only)"
+                    ),
+                    {
+                        "table": table,
+                        "keep": keep,
+                        "detach_only": settings.partition_retention_detach_only,
+                    },
+                )
+                retired.extend(result.scalars().all())
+
+        # Idempotency keys expire with the runs they point at
+        horizon = retention_horizon(settings.runs_retention_months)
+        if horizon is not None:
+            await session.execute(
+                text("DELETE FROM agent_run_keys WHERE created_at < :horizon"),
+                {"horizon": datetime.combine(horizon, datetime.min.time(), timezone.utc)},
+            )
+        await session.commit()
+
+    if created:
+        logger.info("Created partition(s): %s", ", ".join(created))
+    if retired:
+        action = "Detached" if settings.partition_retention_detach_only else "Dropped"
+        logger.info("%s expired partition(s): %s", action, ", ".join(retired))
+    return created, retired
+
+
+async def _maintain() -> None:
+    await maintain_partitions()
+
+
+partition_maintainer = PeriodicJob("runs-partition-maintainer", _maintain, 86400)
@@ -2,17 +2,31 @@
 
 from __future__ import annotations
 
+import json
 import logging
+from collections import Counter
 from datetime import datetime, timezone
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 
 from core.config import settings
+from core.export import ExportFormat, export_response
 from modules.activity.models import ActivityLogRequest
 from modules.activity.service import activity_service
 
-from .models import AgentRun, AgentRunCreate, AgentRunList, HeatmapDay
+from .models import (
+    AgentRun,
+    AgentRunBatchError,
+    AgentRunBatchResult,
+    AgentRunCreate,
+    AgentRunList,
+    DaySummary,
+    HeatmapDay,
+    RunAnalytics,
+)
 from .service import runs_service
 
 logger = logging.getLogger(__name__)
@@ -39,10 +53,24 @@ async def verify_mc_token(x_mc_token: str = Header(...)):
 @router.post("/ingest", response_model=AgentRun, status_code=201)
 async def ingest_run(
     payload: AgentRunCreate,
+    response: Response,
     _: None = Depends(verify_mc_token),
 ) -> AgentRun:
-    """Ingest a new agent run record. Requires X-MC-Token auth."""
-    run = await runs_service.ingest(payload)
+    """Ingest an agent run record. Requires X-MC-Token auth.
+
+    A run whose idempotency key already has a run updates that one instead
+    (200 rather than 201), so retries are safe and a run opened at start can
+    be completed later. Only new and newly completed runs reach the feed.
+    A key that stays contended through every attempt is a 409; retry it.
+    """
+    try:
+        run, change = await runs_service.ingest(payload)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if change != "created":
+        response.status_code = 200
+    if change == "updated":
+        return run
 
     # Log to activity feed
     try:
@@ -54,11 +82,11 @@ async def ingest_run(
                 resource_id=str(run.id),
                 resource_name=f"{payload.agent_id}/{payload.run_type}",
                 details={
-                    "trigger": payload.trigger,
-                    "outcome": payload.outcome or payload.status,
-                    "duration_ms": payload.duration_ms,
-                    "tokens_used": payload.tokens_used,
-                    "channel": payload.channel,
+                    "trigger": run.trigger,
+                    "outcome": run.outcome or run.status,
+                    "duration_ms": run.duration_ms,
+                    "tokens_used": run.tokens_used,
+                    "channel": run.channel,
                 },
                 module="runs",
             )
@@ -69,6 +97,103 @@ async def ingest_run(
     return run
 
 
+def _parse_batch(body: bytes, content_type: str) -> list:
+    """Split a batch body into raw rows: NDJSON lines, or the items of a JSON array."""
+    if "ndjson" in content_type:
+        rows = []
+        for line in body.splitlines():
+            if not line.strip():
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError as e:
+                rows.append(f"Invalid JSON: {e}")
+        return rows
+    try:
+        rows = json.loads(body)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid JSON: {e}")
+    if not isinstance(rows, list):
+        raise HTTPException(status_code=422, detail="Expected a JSON array or NDJSON body")
+    return rows
+
+
+@router.post("/ingest/batch", response_model=AgentRunBatchResult)
+async def ingest_runs_batch(
+    request: Request,
+    _: None = Depends(verify_mc_token),
+) -> AgentRunBatchResult:
+    """Ingest many runs at once, as NDJSON (`application/x-ndjson`) or a JSON array.
+
+    Valid rows are inserted together; invalid ones are reported by index
+    without failing the rest. One summary event goes to the activity feed.
+    """
+    rows = _parse_batch(await request.body(), request.headers.get("content-type", ""))
+    if not rows:
+        raise HTTPException(status_code=422, detail="Batch is empty")
+    if len(rows) > settings.runs_ingest_batch_max:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch exceeds {settings.runs_ingest_batch_max} runs",
+        )
+
+    ids: list[UUID | None] = [None] * len(rows)
+    errors: list[AgentRunBatchError] = []
+    valid: list[tuple[int, AgentRunCreate]] = []
+    for index, row in enumerate(rows):
+        if isinstance(row, str):
+            errors.append(AgentRunBatchError(index=index, error=row))
+            continue
+        try:
+            valid.append((index, AgentRunCreate.model_validate(row)))
+        except ValidationError as e:
+            detail = "; ".join(
+                f"{'.'.join(map(str, err['loc'])) or 'row'}: {err['msg']}" for err in e.errors()
+            )
+            errors.append(AgentRunBatchError(index=index, error=detail))
+
+    results, duplicates = await runs_service.ingest_batch([payload for _, payload in valid])
+    inserted: list[AgentRunCreate] = []
+    for position, ((index, payload), result) in enumerate(zip(valid, results, strict=True)):
+        if isinstance(result, UUID):
+            ids[index] = result
+            if position not in duplicates:
+                inserted.append(payload)
+        else:
+            errors.append(AgentRunBatchError(index=index, error=result))
+    errors.sort(key=lambda e: e.index)
+
+    if inserted:
+        agents = Counter(p.agent_id for p in inserted)
+        try:
+            await activity_service.log_event(
+                ActivityLogRequest(
+                    actor=next(iter(agents)) if len(agents) == 1 else "system",
+                    action="agent.run.batch_ingested",
+                    resource_type="agent_run",
+                    resource_name=f"{len(inserted)} runs",
+                    details={
+                        "inserted": len(inserted),
+                        "duplicates": len(duplicates),
+                        "rejected": len(errors),
+                        "agents": dict(agents),
+                        "outcomes": dict(Counter(p.outcome or p.status for p in inserted)),
+                        "duration_ms": sum(p.duration_ms or 0 for p in inserted),
+                        "tokens_used": sum(p.tokens_used or 0 for p in inserted),
+                    },
+                    module="runs",
+                )
+            )
+        except Exception:
+            logger.warning(
+                "Failed to log activity for a batch of %d runs", len(inserted), exc_info=True
+            )
+
+    return AgentRunBatchResult(
+        ids=ids, inserted=len(inserted), duplicates=len(duplicates), errors=errors
+    )
+
+
 # ---------------------------------------------------------------------------
 # List / search
 # ---------------------------------------------------------------------------
@@ -83,17 +208,57 @@ async def list_runs(
     date_to: str | None = Query(None),
     outcome: str | None = Query(None),
     trigger: str | None = Query(None),
+    cursor: str | None = Query(None, description="next_cursor of the previous page"),
 ) -> AgentRunList:
-    """Paginated list of agent runs with optional filters."""
-    return await runs_service.list_runs(
-        page=page,
-        page_size=page_size,
-        agent_id=agent_id,
-        date_from=date_from,
-        date_to=date_to,
-        outcome=outcome,
-        trigger=trigger,
-    )
+    """Paginated list of agent runs with optional filters, newest first."""
+    try:
+        return await runs_service.list_runs(
+            page=page,
+            page_size=page_size,
+            agent_id=agent_id,
+            date_from=date_from,
+            date_to=date_to,
+            outcome=outcome,
+            trigger=trigger,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@router.get("/export")
+async def export_runs(
+    fmt: ExportFormat = Query("ndjson", alias="format"),
+    agent_id: str | None = Query(None),
+    date_from: str | None = Query(None),
+    date_to: str | None = Query(None),
+    outcome: str | None = Query(None),
+    trigger: str | None = Query(None),
+) -> StreamingResponse:
+    """Stream every run matching the list filters as NDJSON or CSV, newest first."""
+    try:
+        chunks = runs_service.export_runs(fmt, agent_id, date_from, date_to, outcome, trigger)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return export_response(chunks, fmt, "agent_runs")
+
+
+# ---------------------------------------------------------------------------
+# Analytics
+# ---------------------------------------------------------------------------
+
+
+@router.get("/analytics", response_model=RunAnalytics)
+async def get_analytics(
+    date_from: str | None = Query(None, description="YYYY-MM-DD, default 6 days before date_to"),
+    date_to: str | None = Query(None, description="YYYY-MM-DD, default today (UTC)"),
+    agent_id: str | None = Query(None),
+) -> RunAnalytics:
+    """Run counts, success rate and duration/token percentiles per agent and run type."""
+    try:
+        return await runs_service.get_analytics(date_from, date_to, agent_id)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
 
 # ---------------------------------------------------------------------------
@@ -116,6 +281,15 @@ async def get_heatmap(
 # ---------------------------------------------------------------------------
 
 
+@router.get("/day/summary", response_model=DaySummary)
+async def get_day_summary(date: str = Query(..., description="YYYY-MM-DD")) -> DaySummary:
+    """Run totals for a day, overall and per agent."""
+    try:
+        return await runs_service.get_day_summary(date)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
 @router.get("/day", response_model=list[AgentRun])
 async def get_day_runs(
     date: str = Query(..., description="YYYY-MM-DD"),
@@ -135,9 +309,13 @@ async def get_agent_timeline(
     agent_id: str,
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1, le=200),
+    cursor: str | None = Query(None, description="next_cursor of the previous page"),
 ) -> AgentRunList:
     """Paginated run history for a single agent."""
-    return await runs_service.get_agent_timeline(agent_id, page, page_size)
+    try:
+        return await runs_service.get_agent_timeline(agent_id, page, page_size, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
 
 # ---------------------------------------------------------------------------
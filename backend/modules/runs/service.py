@@ -2,16 +2,35 @@
 
 from __future__ import annotations
 
+import base64
+import binascii
 import json
 import logging
-from datetime import datetime, timezone
+from collections import Counter, defaultdict
+from collections.abc import AsyncIterator
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Literal
 from uuid import UUID, uuid4
 
 from sqlalchemy import text
 
+from core.config import settings
 from core.database import async_session
-
-from .models import AgentCount, AgentRun, AgentRunCreate, AgentRunList, HeatmapDay
+from core.export import ExportFormat, stream_query
+
+from .models import (
+    AgentCount,
+    AgentDaySummary,
+    AgentRun,
+    AgentRunCreate,
+    AgentRunList,
+    DaySummary,
+    HeatmapDay,
+    Percentiles,
+    RunAnalytics,
+    RunStats,
+)
+from .partitions import retention_horizon
 
 logger = logging.getLogger(__name__)
 
@@ -43,55 +62,471 @@ def _row_to_agent_run(row) -> AgentRun:
     return AgentRun(**{col: mapping[col] for col in _COLUMNS})
 
 
+# What an ingest did to its run: inserted it, gave an open run its outcome, or anything else
+IngestChange = Literal["created", "completed", "updated"]
+
+# Measures kept per (day, agent_id) in agent_runs_daily
+_DAILY_MEASURES = ("runs", "succeeded", "failed", "timed_out", "tokens_used", "duration_ms")
+
+# Bucket growth of agent_runs_daily_sketch (2% relative accuracy); must match
+# agent_runs_sketch_bucket() in the database
+_SKETCH_GAMMA = 1.02 / 0.98
+_SKETCH_MEASURES = ("duration_ms", "tokens_used")
+_QUANTILES = (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))
+
+# Runs created on UTC days :date_from..:date_to
+_REBUILD_RANGE = """
+    created_at >= CAST(:date_from AS timestamp) AT TIME ZONE 'UTC'
+    AND created_at < (CAST(:date_to AS timestamp) + interval '1 day') AT TIME ZONE 'UTC'
+"""
+
+# Default analytics window, in UTC days ending today
+_ANALYTICS_DAYS = 7
+
+# Column -> SQL type for the batch unnest insert, metadata last so it can be cast to jsonb
+_BATCH_TYPES = {
+    "id": "uuid",
+    "agent_id": "text",
+    "run_type": "text",
+    "trigger": "text",
+    "status": "text",
+    "summary": "text",
+    "duration_ms": "integer",
+    "tokens_used": "integer",
+    "prompt_preview": "text",
+    "channel": "text",
+    "session_key": "text",
+    "completed_at": "timestamptz",
+    "outcome": "text",
+    "metadata": "text",
+}
+
+# varchar limits of agent_runs and agent_run_keys; prompt_preview is truncated instead
+_COLUMN_LIMITS = {
+    "agent_id": 100,
+    "run_type": 50,
+    "trigger": 50,
+    "status": 20,
+    "channel": 100,
+    "session_key": 200,
+    "outcome": 20,
+    "idempotency_key": 255,
+}
+
+
+def _run_params(payload: AgentRunCreate, run_id: UUID, now: datetime) -> dict:
+    """Insert parameters for one run."""
+    return {
+        "id": run_id,
+        "agent_id": payload.agent_id,
+        "run_type": payload.run_type,
+        "trigger": payload.trigger,
+        "status": payload.status,
+        "summary": payload.summary,
+        "duration_ms": payload.duration_ms,
+        "tokens_used": payload.tokens_used,
+        "metadata": json.dumps(payload.metadata) if payload.metadata is not None else None,
+        "prompt_preview": (payload.prompt_preview or "")[:500] if payload.prompt_preview else None,
+        "channel": payload.channel,
+        "session_key": payload.session_key,
+        "completed_at": now if payload.outcome else None,
+        "outcome": payload.outcome,
+        "created_at": now,
+    }
+
+
+def _idempotency_key(payload: AgentRunCreate) -> str | None:
+    """The key a run is deduplicated on: explicit, else session_key:run_type, else none."""
+    if payload.idempotency_key:
+        return payload.idempotency_key
+    if payload.session_key:
+        return f"{payload.session_key}:{payload.run_type}"
+    return None
+
+
+# Keyed ingest in one statement: claims the key, then inserts the run if the
+# key is new or folds the payload into the run it already names. Identity
+# (agent, type, trigger, created_at) stays as first recorded; a payload
+# without an outcome never reopens a finished run. `change` reports which.
+_KEYED_INGEST = f"""
+    WITH run_key AS (
+        INSERT INTO agent_run_keys (key, run_id, created_at)
+        VALUES (:key, :id, :created_at)
+        ON CONFLICT (key) DO UPDATE SET key = EXCLUDED.key
+        RETURNING run_id, created_at, xmax = 0 AS fresh
+    ),
+    prior AS (
+        SELECT r.outcome FROM agent_runs r
+        JOIN run_key k ON r.id = k.run_id AND r.created_at = k.created_at
+        WHERE NOT k.fresh
+    ),
+    inserted AS (
+        INSERT INTO agent_runs (
+            id, agent_id, run_type, trigger, status, summary,
+            duration_ms, tokens_used, metadata, prompt_preview,
+            channel, session_key, completed_at, outcome, created_at
+        )
+        SELECT CAST(:id AS uuid), :agent_id, :run_type, :trigger, CAST(:status AS text),
+            CAST(:summary AS text), CAST(:duration_ms AS integer), CAST(:tokens_used AS integer),
+            CAST(:metadata AS jsonb), CAST(:prompt_preview AS text), CAST(:channel AS text),
+            :session_key, CAST(:completed_at AS timestamptz), CAST(:outcome AS text),
+            CAST(:created_at AS timestamptz)
+        FROM run_key WHERE fresh
+        RETURNING {_SELECT_COLS}
+    ),
+    updated AS (
+        UPDATE agent_runs r SET
+            status = CASE
+                WHEN r.outcome IS NOT NULL AND CAST(:outcome AS text) IS NULL THEN r.status
+                ELSE CAST(:status AS text)
+            END,
+            outcome = COALESCE(CAST(:outcome AS text), r.outcome),
+            summary = COALESCE(CAST(:summary AS text), r.summary),
+            duration_ms = COALESCE(
+                CAST(:duration_ms AS integer),
+                r.duration_ms,
+                CASE WHEN CAST(:outcome AS text) IS NOT NULL THEN
+                    (extract(epoch FROM CAST(:created_at AS timestamptz) - r.created_at)
+                        * 1000)::integer
+                END
+            ),
+            tokens_used = COALESCE(CAST(:tokens_used AS integer), r.tokens_used),
+            metadata = COALESCE(
+                r.metadata || CAST(:metadata AS jsonb), CAST(:metadata AS jsonb), r.metadata
+            ),
+            prompt_preview = COALESCE(CAST(:prompt_preview AS text), r.prompt_preview),
+            channel = COALESCE(CAST(:channel AS text), r.channel),
+            completed_at = COALESCE(r.completed_at, CAST(:completed_at AS timestamptz))
+        FROM run_key k
+        WHERE NOT k.fresh AND r.id = k.run_id AND r.created_at = k.created_at
+        RETURNING {", ".join(f"r.{col}" for col in _COLUMNS)}
+    )
+    SELECT *, 'created' AS change FROM inserted
+    UNION ALL
+    SELECT *, CASE
+        WHEN CAST(:outcome AS text) IS NOT NULL AND (SELECT outcome FROM prior) IS NULL
+            THEN 'completed'
+        ELSE 'updated'
+    END
+    FROM updated
+"""
+
+
+def _column_error(payload: AgentRunCreate) -> str | None:
+    """Why `payload` would not fit agent_runs, or None if it does."""
+    for col, limit in _COLUMN_LIMITS.items():
+        value = getattr(payload, col)
+        if value is not None and len(value) > limit:
+            return f"{col} is longer than {limit} characters"
+    for col in ("duration_ms", "tokens_used"):
+        value = getattr(payload, col)
+        if value is not None and not -(2**31) <= value < 2**31:
+            return f"{col} is out of range"
+    return None
+
+
+# Filtered totals are counted exactly up to this many rows, and estimated beyond
+_EXACT_COUNT_LIMIT = 10_000
+
+# Outcome filter -> the agent_runs_daily measure that counts it
+_OUTCOME_MEASURES = {"success": "succeeded", "timeout": "timed_out"}
+
+
+def _encode_cursor(m) -> str:
+    raw = json.dumps([m["created_at"].isoformat(), str(m["id"])])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, run_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), UUID(run_id)
+    except (ValueError, TypeError, binascii.Error) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def _parse_from(value: str) -> tuple[datetime, date | None]:
+    """Lower bound of a date_from filter, and its UTC day when it is a whole day."""
+    try:
+        day = date.fromisoformat(value)
+    except ValueError:
+        moment = datetime.fromisoformat(value)
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        return moment, None
+    return datetime.combine(day, time(), timezone.utc), day
+
+
+def _parse_to(value: str) -> date:
+    """Last UTC day included by a date_to filter."""
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        return datetime.fromisoformat(value).date()
+
+
+def _bucket_value(bucket: int) -> float:
+    """Representative value of a sketch bucket, within 2% of every value it holds."""
+    if bucket <= 0:
+        return 0.0
+    return 2 * _SKETCH_GAMMA ** (bucket - 1) / (_SKETCH_GAMMA + 1)
+
+
+def _percentiles(buckets: Counter) -> Percentiles:
+    """Quantiles of a merged sketch, as bucket -> count."""
+    samples = sum(buckets.values())
+    quantiles: dict[str, float] = {}
+    if samples > 0:
+        ordered = sorted(buckets.items())
+        for name, q in _QUANTILES:
+            rank = q * (samples - 1)
+            seen = 0
+            for bucket, n in ordered:
+                seen += n
+                if seen > rank:
+                    quantiles[name] = round(_bucket_value(bucket), 1)
+                    break
+    return Percentiles(samples=samples, **quantiles)
+
+
+def _run_stats(key: str, group: dict[str, Counter]) -> RunStats:
+    """RunStats from a group's outcome counts and merged sketches."""
+    outcomes = group["outcomes"]
+    runs = sum(outcomes.values())
+    return RunStats(
+        key=key,
+        runs=runs,
+        success_rate=round(outcomes["success"] / runs, 4) if runs else None,
+        outcomes={outcome or "none": n for outcome, n in outcomes.most_common()},
+        **{measure: _percentiles(group[measure]) for measure in _SKETCH_MEASURES},
+    )
+
+
+def _run_filters(
+    agent_id: str | None = None,
+    date_from: str | None = None,
+    date_to: str | None = None,
+    outcome: str | None = None,
+    trigger: str | None = None,
+) -> tuple[list[str], dict, tuple[list[str], str] | None]:
+    """WHERE conditions over agent_runs, plus the equivalent agent_runs_daily
+    conditions and measure when the rollup can count the same rows exactly.
+
+    The rollup outlives dropped partitions, so once retention is on it only
+    counts ranges starting inside the retained months.
+
+    Raises ValueError on an unparseable date.
+    """
+    conditions: list[str] = []
+    params: dict = {}
+    daily: list[str] = []
+    measure: str | None = _OUTCOME_MEASURES.get(outcome) if outcome else "runs"
+    horizon = retention_horizon(settings.runs_retention_months)
+
+    if agent_id:
+        conditions.append("agent_id = :agent_id")
+        daily.append("agent_id = :agent_id")
+        params["agent_id"] = agent_id
+    if date_from:
+        params["date_from"], params["day_from"] = _parse_from(date_from)
+        conditions.append("created_at >= :date_from")
+        if params["day_from"] is None:
+            measure = None
+        daily.append("day >= :day_from")
+    if horizon and (params.get("day_from") is None or params["day_from"] < horizon):
+        measure = None
+    if date_to:
+        params["day_to"] = _parse_to(date_to)
+        params["date_to"] = datetime.combine(
+            params["day_to"] + timedelta(days=1), time(), timezone.utc
+        )
+        conditions.append("created_at < :date_to")
+        daily.append("day <= :day_to")
+    if outcome:
+        conditions.append("outcome = :outcome")
+        params["outcome"] = outcome
+    if trigger:
+        conditions.append("trigger = :trigger")
+        params["trigger"] = trigger
+        measure = None
+
+    return conditions, params, (daily, measure) if measure else None
+
+
+async def _count_runs(
+    session, conditions: list[str], params: dict, rollup: tuple[list[str], str] | None
+) -> tuple[int, bool]:
+    """Total rows matching `conditions`, and whether it is exact.
+
+    Exact from the daily rollup when it covers the filters, else counted up
+    to _EXACT_COUNT_LIMIT rows, else the planner's row estimate.
+    """
+    if rollup is not None:
+        daily, measure = rollup
+        where = ("WHERE " + " AND ".join(daily)) if daily else ""
+        result = await session.execute(
+            text(f"SELECT COALESCE(sum({measure}), 0) FROM agent_runs_daily {where}"), params
+        )
+        return int(result.scalar()), True
+
+    where = ("WHERE " + " AND ".join(conditions)) if conditions else ""
+    result = await session.execute(
+        text(f"SELECT count(*) FROM (SELECT 1 FROM agent_runs {where} LIMIT :cap) capped"),
+        {**params, "cap": _EXACT_COUNT_LIMIT},
+    )
+    counted = result.scalar()
+    if counted < _EXACT_COUNT_LIMIT:
+        return counted, True
+
+    result = await session.execute(
+        text(f"EXPLAIN (FORMAT JSON) SELECT 1 FROM agent_runs {where}"), params
+    )
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return max(int(plan[0]["Plan"]["Plan Rows"]), _EXACT_COUNT_LIMIT), False
+
+
 class RunsService:
     """Business logic for agent run logging and querying."""
 
-    async def ingest(self, payload: AgentRunCreate) -> AgentRun:
-        """Insert a new agent run record."""
-        run_id = uuid4()
-        now = datetime.now(timezone.utc)
+    def __init__(self) -> None:
+        # Heatmaps of finished years, which the rollup will not change again
+        self._past_heatmaps: dict[int, list[HeatmapDay]] = {}
+
+    async def ingest(self, payload: AgentRunCreate) -> tuple[AgentRun, IngestChange]:
+        """Record a run, or update the run that already holds its idempotency key.
 
+        Returns the run and whether it was "created", "completed" (an open
+        run got its outcome) or otherwise "updated", e.g. by a retry. Raises
+        ValueError if the key stays contended through every attempt.
+        """
+        key = _idempotency_key(payload)
+        params = _run_params(payload, uuid4(), datetime.now(timezone.utc))
         async with async_session() as session:
-            result = await session.execute(
-                text(
-                    """
+            if key is None:
+                result = await session.execute(
+                    text(
+                        """
+                        INSERT INTO agent_runs (
+                            id, agent_id, run_type, trigger, status, summary,
+                            duration_ms, tokens_used, metadata, prompt_preview,
+                            channel, session_key, completed_at, outcome, created_at
+                        ) VALUES (
+                            :id, :agent_id, :run_type, :trigger, :status, :summary,
+                            :duration_ms, :tokens_used, CAST(:metadata AS jsonb), :prompt_preview,
+                            :channel, :session_key, :completed_at, :outcome, :created_at
+                        )
+                        RETURNING {cols}
+                    """.format(cols=_SELECT_COLS)
+                    ),
+                    params,
+                )
+                row = result.fetchone()
+                change = "created"
+            else:
+                # A miss means the run was committed by a concurrent ingest after this
+                # statement's snapshot, so the retry sees it; a second miss means the
+                # key outlived its run (dropped with an expired partition)
+                for attempt in range(3):
+                    if attempt == 2:
+                        await session.execute(
+                            text("DELETE FROM agent_run_keys WHERE key = :key"), {"key": key}
+                        )
+                    result = await session.execute(text(_KEYED_INGEST), {**params, "key": key})
+                    row = result.fetchone()
+                    if row is not None:
+                        break
+                else:
+                    # Only a run being created and removed around every attempt gets here
+                    raise ValueError(f"Could not record run for idempotency key {key!r}; retry")
+                change = row._mapping["change"]
+            await session.commit()
+            return _row_to_agent_run(row), change
+
+    async def ingest_batch(
+        self, payloads: list[AgentRunCreate]
+    ) -> tuple[list[UUID | str], set[int]]:
+        """Insert many runs in one statement.
+
+        Returns, per payload, the run id or why the row was rejected, and the
+        indexes of payloads whose idempotency key already had a run: those
+        are not inserted and get the existing run's id (they are not applied
+        as updates either; single ingest does that). Rows are checked against
+        the column limits up front so one bad row cannot fail the whole
+        batch; the rest go in through a single multi-row unnest INSERT in one
+        transaction.
+        """
+        now = datetime.now(timezone.utc)
+        outcomes: list[UUID | str] = []
+        rows: list[dict] = []
+        positions: list[int] = []  # index in `outcomes` of each row
+        keys: dict[int, str] = {}  # row index -> idempotency key
+        for payload in payloads:
+            error = _column_error(payload)
+            if error:
+                outcomes.append(error)
+                continue
+            run_id = uuid4()
+            key = _idempotency_key(payload)
+            if key is not None:
+                keys[len(rows)] = key
+            positions.append(len(outcomes))
+            outcomes.append(run_id)
+            rows.append(_run_params(payload, run_id, now))
+        if not rows:
+            return outcomes, set()
+
+        duplicates: set[int] = set()
+        async with async_session() as session:
+            if keys:
+                # Keys already held, by an earlier ingest or an earlier row of this
+                # batch, keep their run; those rows are dropped from the insert
+                await session.execute(
+                    text("""
+                        INSERT INTO agent_run_keys (key, run_id, created_at)
+                        SELECT k.key, k.run_id, :created_at
+                        FROM unnest(CAST(:keys AS text[]), CAST(:ids AS uuid[])) AS k (key, run_id)
+                        ON CONFLICT (key) DO NOTHING
+                    """),
+                    {
+                        "keys": list(keys.values()),
+                        "ids": [rows[i]["id"] for i in keys],
+                        "created_at": now,
+                    },
+                )
+                result = await session.execute(
+                    text("SELECT key, run_id FROM agent_run_keys WHERE key = ANY(:keys)"),
+                    {"keys": list(set(keys.values()))},
+                )
+                owners = {m["key"]: m["run_id"] for m in (r._mapping for r in result.fetchall())}
+                for i, key in keys.items():
+                    if owners.get(key, rows[i]["id"]) != rows[i]["id"]:
+                        duplicates.add(positions[i])
+                        outcomes[positions[i]] = owners[key]
+                rows = [row for i, row in enumerate(rows) if positions[i] not in duplicates]
+
+            if not rows:
+                await session.commit()
+                return outcomes, duplicates
+
+            columns = {col: [row[col] for row in rows] for col in _BATCH_TYPES}
+            await session.execute(
+                text(f"""
                     INSERT INTO agent_runs (
-                        id, agent_id, run_type, trigger, status, summary,
-                        duration_ms, tokens_used, metadata, prompt_preview,
-                        channel, session_key, completed_at, outcome, created_at
-                    ) VALUES (
-                        :id, :agent_id, :run_type, :trigger, :status, :summary,
-                        :duration_ms, :tokens_used, CAST(:metadata AS jsonb), :prompt_preview,
-                        :channel, :session_key, :completed_at, :outcome, :created_at
+                        {", ".join(_BATCH_TYPES)}, created_at
                     )
-                    RETURNING {cols}
-                """.format(cols=_SELECT_COLS)
-                ),
-                {
-                    "id": run_id,
-                    "agent_id": payload.agent_id,
-                    "run_type": payload.run_type,
-                    "trigger": payload.trigger,
-                    "status": payload.status,
-                    "summary": payload.summary,
-                    "duration_ms": payload.duration_ms,
-                    "tokens_used": payload.tokens_used,
-                    "metadata": json.dumps(payload.metadata)
-                    if payload.metadata is not None
-                    else None,
-                    "prompt_preview": (payload.prompt_preview or "")[:500]
-                    if payload.prompt_preview
-                    else None,
-                    "channel": payload.channel,
-                    "session_key": payload.session_key,
-                    "completed_at": now if payload.outcome else None,
-                    "outcome": payload.outcome,
-                    "created_at": now,
-                },
+                    SELECT {", ".join(f"r.{col}" for col in _BATCH_TYPES if col != "metadata")},
+                        r.metadata::jsonb, :created_at
+                    FROM unnest(
+                        {", ".join(f"CAST(:{col} AS {t}[])" for col, t in _BATCH_TYPES.items())}
+                    ) AS r ({", ".join(_BATCH_TYPES)})
+                """),
+                {**columns, "created_at": now},
             )
-            row = result.fetchone()
             await session.commit()
-            return _row_to_agent_run(row)
+        return outcomes, duplicates
 
     async def list_runs(
         self,
@@ -102,56 +537,40 @@ class RunsService:
         date_to: str | None = None,
         outcome: str | None = None,
         trigger: str | None = None,
+        cursor: str | None = None,
     ) -> AgentRunList:
-        """Paginated list with optional filters."""
-        conditions: list[str] = []
-        params: dict = {}
-
-        if agent_id:
-            conditions.append("agent_id = :agent_id")
-            params["agent_id"] = agent_id
-        if date_from:
-            conditions.append("created_at >= :date_from::timestamptz")
-            params["date_from"] = date_from
-        if date_to:
-            conditions.append("created_at < (:date_to::date + interval '1 day')")
-            params["date_to"] = date_to
-        if outcome:
-            conditions.append("outcome = :outcome")
-            params["outcome"] = outcome
-        if trigger:
-            conditions.append("trigger = :trigger")
-            params["trigger"] = trigger
-
-        where = ("WHERE " + " AND ".join(conditions)) if conditions else ""
-        offset = (page - 1) * page_size
-        params["limit"] = page_size
-        params["offset"] = offset
+        """Newest-first list with optional filters, paged by (created_at, id) cursor.
 
-        async with async_session() as session:
-            # Count
-            count_result = await session.execute(
-                text(f"SELECT COUNT(*) FROM agent_runs {where}"), params
-            )
-            total = count_result.scalar() or 0
+        `page` is still honoured (as an OFFSET) when no cursor is given, for
+        callers that have not moved to cursors; it gets slower the deeper it goes.
+        """
+        conditions, params, rollup = _run_filters(agent_id, date_from, date_to, outcome, trigger)
+        return await self._page(conditions, params, rollup, page, page_size, cursor)
 
-            # Fetch page
-            result = await session.execute(
-                text(f"""
-                    SELECT {_SELECT_COLS} FROM agent_runs
-                    {where}
-                    ORDER BY created_at DESC
-                    LIMIT :limit OFFSET :offset
-                """),
-                params,
-            )
-            rows = result.fetchall()
+    def export_runs(
+        self,
+        fmt: ExportFormat = "ndjson",
+        agent_id: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+        outcome: str | None = None,
+        trigger: str | None = None,
+    ) -> AsyncIterator[bytes]:
+        """Every run matching the list filters, newest first, as streamed NDJSON/CSV chunks.
 
-        return AgentRunList(
-            items=[_row_to_agent_run(r) for r in rows],
-            total=total,
-            page=page,
-            page_size=page_size,
+        Filters are checked before any row is read, so a bad date raises
+        ValueError here rather than mid-stream.
+        """
+        conditions, params, _ = _run_filters(agent_id, date_from, date_to, outcome, trigger)
+        where = ("WHERE " + " AND ".join(conditions)) if conditions else ""
+        return stream_query(
+            f"""
+                SELECT {_SELECT_COLS} FROM agent_runs
+                {where}
+                ORDER BY created_at DESC, id DESC
+            """,
+            params,
+            fmt,
         )
 
     async def get_run(self, run_id: UUID) -> AgentRun | None:
@@ -165,18 +584,22 @@ class RunsService:
             return _row_to_agent_run(row) if row else None
 
     async def get_heatmap(self, year: int) -> list[HeatmapDay]:
-        """Daily run counts grouped by date and agent_id for a given year."""
+        """Daily run counts per agent for a given UTC year, from the daily rollup.
+
+        Past years no longer change, so they are computed once per process.
+        """
+        if year in self._past_heatmaps:
+            return self._past_heatmaps[year]
+
         async with async_session() as session:
             result = await session.execute(
                 text("""
-                    SELECT
-                        created_at::date AS day,
-                        agent_id,
-                        COUNT(*) AS cnt
-                    FROM agent_runs
-                    WHERE EXTRACT(YEAR FROM created_at) = :year
-                    GROUP BY day, agent_id
-                    ORDER BY day
+                    SELECT day, agent_id, runs AS cnt
+                    FROM agent_runs_daily
+                    WHERE day >= make_date(:year, 1, 1)
+                      AND day < make_date(:year + 1, 1, 1)
+                      AND runs > 0
+                    ORDER BY day, agent_id
                 """),
                 {"year": year},
             )
@@ -195,14 +618,122 @@ class RunsService:
             days[day_str].count += cnt
             days[day_str].agents.append(AgentCount(agent_id=agent, count=cnt))
 
-        return list(days.values())
+        heatmap = list(days.values())
+        if year < datetime.now(timezone.utc).year:
+            self._past_heatmaps[year] = heatmap
+        return heatmap
 
-    async def get_day_runs(self, date: str, agent_id: str | None = None) -> list[AgentRun]:
-        """All runs for a specific day, optionally filtered by agent."""
-        from datetime import date as date_type
+    async def get_day_summary(self, day: str) -> DaySummary:
+        """Run totals for one UTC day, overall and per agent, from the daily rollup."""
+        parsed_date = date.fromisoformat(day)
+        async with async_session() as session:
+            result = await session.execute(
+                text(f"""
+                    SELECT agent_id, {", ".join(_DAILY_MEASURES)}
+                    FROM agent_runs_daily
+                    WHERE day = :date AND runs > 0
+                    ORDER BY runs DESC, agent_id
+                """),
+                {"date": parsed_date},
+            )
+            rows = result.fetchall()
 
-        parsed_date = date_type.fromisoformat(date)
-        conditions = ["created_at::date = :date"]
+        summary = DaySummary(date=parsed_date.isoformat())
+        for row in rows:
+            agent = AgentDaySummary(**row._mapping)
+            summary.agents.append(agent)
+            for measure in _DAILY_MEASURES:
+                setattr(summary, measure, getattr(summary, measure) + getattr(agent, measure))
+        return summary
+
+    async def get_analytics(
+        self,
+        date_from: str | None = None,
+        date_to: str | None = None,
+        agent_id: str | None = None,
+    ) -> RunAnalytics:
+        """Run counts, outcome mix and duration/token percentiles, overall,
+        per agent and per run type, for UTC days date_from..date_to.
+
+        Read from the per-day outcome counts and sketches, so the cost grows
+        with the days in the window rather than the runs. Defaults to the
+        last _ANALYTICS_DAYS days. Raises ValueError on a bad window.
+        """
+        day_to = date.fromisoformat(date_to) if date_to else datetime.now(timezone.utc).date()
+        day_from = (
+            date.fromisoformat(date_from)
+            if date_from
+            else day_to - timedelta(days=_ANALYTICS_DAYS - 1)
+        )
+        if day_from > day_to:
+            raise ValueError("date_from must not be after date_to")
+
+        conditions = ["day BETWEEN :day_from AND :day_to"]
+        params: dict = {"day_from": day_from, "day_to": day_to}
+        if agent_id:
+            conditions.append("agent_id = :agent_id")
+            params["agent_id"] = agent_id
+        where = " AND ".join(conditions)
+
+        async with async_session() as session:
+            result = await session.execute(
+                text(f"""
+                    SELECT agent_id, run_type, outcome, sum(runs) AS n
+                    FROM agent_runs_daily_outcomes
+                    WHERE {where}
+                    GROUP BY agent_id, run_type, outcome
+                    HAVING sum(runs) > 0
+                """),
+                params,
+            )
+            outcome_rows = result.fetchall()
+            result = await session.execute(
+                text(f"""
+                    SELECT agent_id, run_type, measure, bucket, sum(n) AS n
+                    FROM agent_runs_daily_sketch
+                    WHERE {where}
+                    GROUP BY agent_id, run_type, measure, bucket
+                    HAVING sum(n) > 0
+                """),
+                params,
+            )
+            sketch_rows = result.fetchall()
+
+        # ("", "") is the whole window; sketches merge by adding bucket counts
+        groups: dict[tuple[str, str], dict[str, Counter]] = defaultdict(
+            lambda: defaultdict(Counter)
+        )
+        for rows, field in ((outcome_rows, "outcome"), (sketch_rows, "bucket")):
+            for row in rows:
+                mapping = row._mapping
+                series = "outcomes" if field == "outcome" else mapping["measure"]
+                for key in (
+                    ("", ""),
+                    ("agent", mapping["agent_id"]),
+                    ("run_type", mapping["run_type"]),
+                ):
+                    groups[key][series][mapping[field]] += mapping["n"]
+
+        def _breakdown(kind: str) -> list[RunStats]:
+            stats = [_run_stats(key, group) for (k, key), group in groups.items() if k == kind]
+            return sorted(stats, key=lambda s: (-s.runs, s.key))
+
+        return RunAnalytics(
+            date_from=day_from.isoformat(),
+            date_to=day_to.isoformat(),
+            overall=_run_stats("", groups[("", "")]),
+            agents=_breakdown("agent"),
+            run_types=_breakdown("run_type"),
+        )
+
+    async def get_day_runs(self, day: str, agent_id: str | None = None) -> list[AgentRun]:
+        """All runs for a specific UTC day, optionally filtered by agent."""
+        parsed_date = date.fromisoformat(day)
+        # A half-open UTC range rather than created_at::date, so ix_agent_runs_created_at applies
+        conditions = [
+            "created_at >= CAST(:date AS timestamp) AT TIME ZONE 'UTC'",
+            "created_at < (CAST(:date AS timestamp) + interval '1 day') AT TIME ZONE 'UTC'",
+        ]
         params: dict = {"date": parsed_date}
 
         if agent_id:
@@ -224,35 +755,122 @@ class RunsService:
 
         return [_row_to_agent_run(r) for r in rows]
 
-    async def get_agent_timeline(
-        self, agent_id: str, page: int = 1, page_size: int = 50
-    ) -> AgentRunList:
-        """Paginated run history for a single agent."""
-        offset = (page - 1) * page_size
+    async def rebuild_daily(self, date_from: date, date_to: date) -> int:
+        """Recompute the daily rollup, outcome counts and sketches for UTC days
+        date_from..date_to from agent_runs.
 
+        Writes to agent_runs are held off for the duration so the trigger and
+        the rebuild cannot double count. Days whose raw runs are gone (for
+        example past retention) come back empty. Returns the rows written.
+        """
+        params = {"date_from": date_from, "date_to": date_to}
         async with async_session() as session:
-            count_result = await session.execute(
-                text("SELECT COUNT(*) FROM agent_runs WHERE agent_id = :agent_id"),
-                {"agent_id": agent_id},
+            await session.execute(text("LOCK TABLE agent_runs IN SHARE MODE"))
+            for table in (
+                "agent_runs_daily",
+                "agent_runs_daily_outcomes",
+                "agent_runs_daily_sketch",
+            ):
+                await session.execute(
+                    text(f"DELETE FROM {table} WHERE day BETWEEN :date_from AND :date_to"),
+                    params,
+                )
+            result = await session.execute(
+                text(f"""
+                    INSERT INTO agent_runs_daily (day, agent_id, {", ".join(_DAILY_MEASURES)})
+                    SELECT (created_at AT TIME ZONE 'UTC')::date, agent_id,
+                        count(*),
+                        count(*) FILTER (WHERE outcome = 'success'),
+                        count(*) FILTER (WHERE outcome IN ('error', 'failure')),
+                        count(*) FILTER (WHERE outcome = 'timeout'),
+                        COALESCE(sum(tokens_used), 0),
+                        COALESCE(sum(duration_ms), 0)
+                    FROM agent_runs
+                    WHERE {_REBUILD_RANGE}
+                    GROUP BY 1, 2
+                """),
+                params,
+            )
+            await session.execute(
+                text(f"""
+                    INSERT INTO agent_runs_daily_outcomes (day, agent_id, run_type, outcome, runs)
+                    SELECT (created_at AT TIME ZONE 'UTC')::date, agent_id, run_type,
+                        COALESCE(outcome, ''), count(*)
+                    FROM agent_runs
+                    WHERE {_REBUILD_RANGE}
+                    GROUP BY 1, 2, 3, 4
+                """),
+                params,
             )
-            total = count_result.scalar() or 0
+            await session.execute(
+                text(f"""
+                    INSERT INTO agent_runs_daily_sketch (day, agent_id, run_type, measure, bucket, n)
+                    SELECT (created_at AT TIME ZONE 'UTC')::date, agent_id, run_type,
+                        v.measure, agent_runs_sketch_bucket(v.value), count(*)
+                    FROM agent_runs
+                    CROSS JOIN LATERAL (
+                        VALUES ('duration_ms', duration_ms), ('tokens_used', tokens_used)
+                    ) v (measure, value)
+                    WHERE {_REBUILD_RANGE} AND v.value IS NOT NULL
+                    GROUP BY 1, 2, 3, 4, 5
+                """),
+                params,
+            )
+            await session.commit()
+        for year in range(date_from.year, date_to.year + 1):
+            self._past_heatmaps.pop(year, None)
+        return result.rowcount
 
+    async def get_agent_timeline(
+        self, agent_id: str, page: int = 1, page_size: int = 50, cursor: str | None = None
+    ) -> AgentRunList:
+        """Newest-first run history for a single agent, paged like list_runs."""
+        conditions, params, rollup = _run_filters(agent_id=agent_id)
+        return await self._page(conditions, params, rollup, page, page_size, cursor)
+
+    async def _page(
+        self,
+        conditions: list[str],
+        params: dict,
+        rollup: tuple[list[str], str] | None,
+        page: int,
+        page_size: int,
+        cursor: str | None,
+    ) -> AgentRunList:
+        """One page of agent_runs matching `conditions`, with its total."""
+        page_conditions = list(conditions)
+        page_params = {**params, "limit": page_size + 1, "offset": 0}
+        if cursor:
+            c_created_at, c_id = _decode_cursor(cursor)
+            page_conditions.append("(created_at, id) < (:c_created_at, :c_id)")
+            page_params.update(c_created_at=c_created_at, c_id=c_id)
+        else:
+            page_params["offset"] = (page - 1) * page_size
+        where = ("WHERE " + " AND ".join(page_conditions)) if page_conditions else ""
+
+        async with async_session() as session:
+            total, exact = await _count_runs(session, conditions, params, rollup)
             result = await session.execute(
                 text(f"""
                     SELECT {_SELECT_COLS} FROM agent_runs
-                    WHERE agent_id = :agent_id
-                    ORDER BY created_at DESC
+                    {where}
+                    ORDER BY created_at DESC, id DESC
                     LIMIT :limit OFFSET :offset
                 """),
-                {"agent_id": agent_id, "limit": page_size, "offset": offset},
+                page_params,
             )
             rows = result.fetchall()
 
+        next_cursor = (
+            _encode_cursor(rows[page_size - 1]._mapping) if len(rows) > page_size else None
+        )
         return AgentRunList(
-            items=[_row_to_agent_run(r) for r in rows],
+            items=[_row_to_agent_run(r) for r in rows[:page_size]],
             total=total,
+            total_exact=exact,
             page=page,
             page_size=page_size,
+            next_cursor=next_cursor,
         )
 
 
@@ -1,5 +1,6 @@
 """Tasks module — Postgres-backed task management replacing warroom tasks."""
 
+from .lifecycle import shutdown, startup
 from .router import router
 
 MODULE_INFO = {
@@ -8,4 +9,6 @@ MODULE_INFO = {
     "icon": "\u2705",
     "router": router,
     "prefix": "/api/tasks",
+    "startup": startup,
+    "shutdown": shutdown,
 }
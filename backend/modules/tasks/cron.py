@@ -0,0 +1,99 @@
+"""Minimal five-field cron expressions for recurring task schedules.
+
+Supports `*`, numbers, ranges (`1-5`), lists (`1,15`), steps (`*/15`, `8-18/2`)
+and the usual @hourly/@daily/@weekly/@monthly/@yearly aliases. Day-of-week
+is 0-6 with Sunday as 0 (7 is accepted as Sunday too). When both day fields
+are restricted a day matches if either does, as in Vixie cron.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from datetime import datetime, timedelta, tzinfo
+
+_ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+}
+
+# (low, high) per field: minute, hour, day of month, month, day of week
+_BOUNDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+# Far enough to reach any valid date (Feb 29 needs up to 8 years); fail fast otherwise
+_MAX_DAYS_AHEAD = 366 * 8
+
+
+def _parse_field(field: str, low: int, high: int) -> frozenset[int]:
+    values: set[int] = set()
+    for part in field.split(","):
+        body, _, step_str = part.partition("/")
+        step = int(step_str) if step_str else 1
+        if step < 1:
+            raise ValueError(f"Invalid step in cron field: {part}")
+        if body == "*":
+            start, end = low, high
+        elif "-" in body:
+            start_str, end_str = body.split("-", 1)
+            start, end = int(start_str), int(end_str)
+        else:
+            start = int(body)
+            end = high if step_str else start
+        if not (low <= start <= end <= high):
+            raise ValueError(f"Cron field out of range {low}-{high}: {part}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class CronSchedule:
+    """A parsed cron expression that yields the datetimes it fires at."""
+
+    def __init__(self, expression: str) -> None:
+        self.expression = expression
+        fields = _ALIASES.get(expression.strip(), expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: {expression!r}")
+        try:
+            parsed = [_parse_field(f, lo, hi) for f, (lo, hi) in zip(fields, _BOUNDS)]
+        except ValueError as e:
+            raise ValueError(f"Invalid cron expression {expression!r}: {e}") from e
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = frozenset(d % 7 for d in weekdays)
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    def _day_matches(self, day: datetime) -> bool:
+        if day.month not in self.months:
+            return False
+        dom = day.day in self.days
+        dow = (day.weekday() + 1) % 7 in self.weekdays  # Python Monday=0 -> cron Sunday=0
+        if self._any_day:
+            return dow
+        if self._any_weekday:
+            return dom
+        return dom or dow
+
+    def occurrences(self, after: datetime, until: datetime, tz: tzinfo) -> Iterator[datetime]:
+        """Fire times strictly after `after` and no later than `until`, evaluated in `tz`.
+
+        Both bounds must be timezone-aware; yielded datetimes are in `tz`.
+        """
+        start = after.astimezone(tz)
+        end = until.astimezone(tz)
+        day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+        for _ in range(_MAX_DAYS_AHEAD):
+            if day > end:
+                return
+            if self._day_matches(day):
+                for hour in sorted(self.hours):
+                    for minute in sorted(self.minutes):
+                        at = datetime(day.year, day.month, day.day, hour, minute, tzinfo=tz)
+                        if at > end:
+                            return
+                        if at > start:
+                            yield at
+            day = (day + timedelta(days=1)).replace(hour=0, minute=0)
@@ -0,0 +1,187 @@
+"""In-process task dependency index — both edge directions, kept current from task writes.
+
+`blocked_by` in mc_tasks is the source of truth; this index mirrors the open
+edges (tasks not yet done) so unblocking, cycle checks and graph reads never
+scan the table.
+"""
+
+from __future__ import annotations
+
+import heapq
+from collections.abc import Iterable
+
+
+def _sort_key(task_id: str) -> tuple[int, int | str]:
+    """Numeric ids in numeric order, any legacy string ids after them."""
+    return (0, int(task_id)) if task_id.isdigit() else (1, task_id)
+
+
+def sorted_ids(ids: Iterable[str]) -> list[str]:
+    return sorted(ids, key=_sort_key)
+
+
+class DependencyIndex:
+    """Adjacency sets for `blocked_by` (task -> blockers) and `blocks` (task -> dependents)."""
+
+    def __init__(self) -> None:
+        self._blockers: dict[str, set[str]] = {}
+        self._dependents: dict[str, set[str]] = {}
+        self.loaded = False
+        self.version = 0  # bumped on every mutation so callers can detect changes
+
+    def load(self, rows: Iterable[tuple[str, Iterable[str]]]) -> None:
+        """Replace the index with (task_id, blocked_by) rows for open tasks."""
+        self.version += 1
+        self._blockers.clear()
+        self._dependents.clear()
+        for task_id, blockers in rows:
+            self._link(str(task_id), {str(b) for b in blockers})
+        self.loaded = True
+
+    def blockers(self, task_id: str) -> set[str]:
+        return set(self._blockers.get(task_id, ()))
+
+    def dependents(self, task_id: str) -> set[str]:
+        return set(self._dependents.get(task_id, ()))
+
+    def find_cycle(self, task_id: str, blockers: Iterable[str]) -> list[str] | None:
+        """Return the loop that making `task_id` wait on `blockers` would close, if any.
+
+        The path reads in wait order: [task_id, blocker, ..., task_id].
+        """
+        parent: dict[str, str] = {}
+        stack: list[str] = []
+        for blocker in blockers:
+            if blocker == task_id:
+                return [task_id, task_id]
+            if blocker not in parent:
+                parent[blocker] = task_id
+                stack.append(blocker)
+        while stack:
+            node = stack.pop()
+            for nxt in self._blockers.get(node, ()):
+                if nxt == task_id:
+                    path = [task_id]
+                    while node != task_id:
+                        path.append(node)
+                        node = parent[node]
+                    return [task_id, *reversed(path[1:]), task_id]
+                if nxt not in parent:
+                    parent[nxt] = node
+                    stack.append(nxt)
+        return None
+
+    def set_blockers(self, task_id: str, blockers: Iterable[str]) -> set[str]:
+        """Replace the tasks `task_id` waits on. Returns blockers whose `blocks` changed."""
+        self.version += 1
+        old = self._unlink_blockers(task_id)
+        new = set(blockers)
+        self._link(task_id, new)
+        return old ^ new
+
+    def set_dependents(self, task_id: str, dependents: Iterable[str]) -> set[str]:
+        """Replace the tasks waiting on `task_id`. Returns dependents whose `blocked_by` changed."""
+        self.version += 1
+        old = self.dependents(task_id)
+        new = set(dependents)
+        for dep in old - new:
+            self._remove_edge(dep, task_id)
+        for dep in new - old:
+            self._add_edge(dep, task_id)
+        return old ^ new
+
+    def complete(self, task_id: str) -> set[str]:
+        """Drop a finished task from the graph. Returns the dependents it was holding up.
+
+        O(dependents): only the finished task's own adjacency sets are walked.
+        """
+        self.version += 1
+        dependents = self._dependents.pop(task_id, set())
+        for dep in dependents:
+            self._remove_edge(dep, task_id)
+        self._unlink_blockers(task_id)
+        return dependents
+
+    def discard(self, task_id: str) -> set[str]:
+        """Drop a deleted task. Returns every neighbour whose edges changed."""
+        self.version += 1
+        dependents = self._dependents.pop(task_id, set())
+        for dep in dependents:
+            self._remove_edge(dep, task_id)
+        return dependents | self._unlink_blockers(task_id)
+
+    def component(self, task_id: str) -> set[str]:
+        """Every task connected to `task_id` through dependencies in either direction."""
+        seen = {task_id}
+        stack = [task_id]
+        while stack:
+            node = stack.pop()
+            for nxt in self._blockers.get(node, set()) | self._dependents.get(node, set()):
+                if nxt not in seen:
+                    seen.add(nxt)
+                    stack.append(nxt)
+        return seen
+
+    def edges(self, nodes: Iterable[str]) -> list[tuple[str, str]]:
+        """(blocker, blocked) pairs with the blocked task in `nodes`, in id order."""
+        return [
+            (blocker, node)
+            for node in sorted_ids(nodes)
+            for blocker in sorted_ids(self._blockers.get(node, ()))
+        ]
+
+    def topological_order(self, task_id: str) -> list[str]:
+        """The task's connected component ordered so every blocker precedes its dependents.
+
+        Kahn's algorithm with a min-heap, so ties break by id and the order is stable.
+        """
+        nodes = self.component(task_id)
+        indegree = {n: len(self._blockers.get(n, set()) & nodes) for n in nodes}
+        ready = [_sort_key(n) + (n,) for n, d in indegree.items() if d == 0]
+        heapq.heapify(ready)
+        order: list[str] = []
+        while ready:
+            node = heapq.heappop(ready)[-1]
+            order.append(node)
+            for dep in self._dependents.get(node, ()):
+                indegree[dep] -= 1
+                if indegree[dep] == 0:
+                    heapq.heappush(ready, _sort_key(dep) + (dep,))
+        if len(order) != len(nodes):
+            # Writes reject cycles, but rows edited outside the API can still form one
+            order.extend(sorted_ids(nodes - set(order)))
+        return order
+
+    # -- internals ----------------------------------------------------------
+
+    def _link(self, task_id: str, blockers: set[str]) -> None:
+        for blocker in blockers:
+            self._add_edge(task_id, blocker)
+
+    def _unlink_blockers(self, task_id: str) -> set[str]:
+        old = self._blockers.pop(task_id, set())
+        for blocker in old:
+            deps = self._dependents.get(blocker)
+            if deps is not None:
+                deps.discard(task_id)
+                if not deps:
+                    del self._dependents[blocker]
+        return old
+
+    def _add_edge(self, task_id: str, blocker: str) -> None:
+        self._blockers.setdefault(task_id, set()).add(blocker)
+        self._dependents.setdefault(blocker, set()).add(task_id)
+
+    def _remove_edge(self, task_id: str, blocker: str) -> None:
+        for table, key, value in (
+            (self._blockers, task_id, blocker),
+            (self._dependents, blocker, task_id),
+        ):
+            entries = table.get(key)
+            if entries is not None:
+                entries.discard(value)
+                if not entries:
+                    del table[key]
+
+
+dependency_index = DependencyIndex()
@@ -0,0 +1,33 @@
+"""Claim lease reaper — returns tasks held by crashed or silent agents to the queue."""
+
+from __future__ import annotations
+
+import logging
+
+from core.background import PeriodicJob
+from core.config import settings
+
+from . import service
+
+logger = logging.getLogger(__name__)
+
+
+async def reap_expired_leases() -> int:
+    """Release every expired lease in batches. Returns the number of tasks released."""
+    batch_size = settings.task_reaper_batch_size
+    released = 0
+    while True:
+        tasks = await service.reap_expired_leases(batch_size)
+        released += len(tasks)
+        if len(tasks) < batch_size:
+            break
+    if released:
+        logger.info("Lease reaper released %d expired claim(s)", released)
+    return released
+
+
+async def _reap() -> None:
+    await reap_expired_leases()
+
+
+lease_reaper = PeriodicJob("tasks-lease-reaper", _reap, settings.task_reaper_interval_seconds)
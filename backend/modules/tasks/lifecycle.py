@@ -0,0 +1,75 @@
+"""Tasks module background services — started and stopped from the app lifespan."""
+
+from __future__ import annotations
+
+import logging
+
+from core.background import PeriodicJob
+from core.config import settings
+
+from . import service
+from .graph import dependency_index
+from .leases import lease_reaper
+from .notify import queue_notifier
+from .scheduler import task_scheduler
+
+logger = logging.getLogger(__name__)
+
+
+async def _resync_dependencies() -> None:
+    await service.load_dependency_index()
+
+
+async def _compact_changes() -> None:
+    removed = await service.compact_changes(settings.task_changes_retention_days)
+    if removed:
+        logger.info("Compacted %d task change log entries", removed)
+
+
+async def archive_finished_tasks() -> int:
+    """Move every task finished past the archive threshold, in batches. Returns the count."""
+    if settings.task_archive_after_days <= 0:
+        return 0
+    batch_size = settings.task_archive_batch_size
+    archived = 0
+    while True:
+        task_ids = await service.archive_tasks(settings.task_archive_after_days, batch_size)
+        archived += len(task_ids)
+        if len(task_ids) < batch_size:
+            break
+    if archived:
+        logger.info("Archived %d finished task(s)", archived)
+    return archived
+
+
+async def _archive() -> None:
+    await archive_finished_tasks()
+
+
+dependency_resync = PeriodicJob(
+    "tasks-dependency-resync", _resync_dependencies, settings.task_graph_resync_seconds
+)
+change_compactor = PeriodicJob("tasks-change-compactor", _compact_changes, 3600)
+task_archiver = PeriodicJob("tasks-archiver", _archive, 3600)
+
+
+async def startup() -> None:
+    await queue_notifier.start()
+    lease_reaper.start()
+    try:
+        await service.load_dependency_index()
+    except Exception:
+        logger.exception("Dependency index load failed; retrying in the background")
+    dependency_resync.start(immediate=not dependency_index.loaded)
+    change_compactor.start(immediate=False)
+    task_archiver.start(immediate=False)
+    task_scheduler.start()
+
+
+async def shutdown() -> None:
+    await task_scheduler.stop()
+    await task_archiver.stop()
+    await change_compactor.stop()
+    await dependency_resync.stop()
+    await lease_reaper.stop()
+    await queue_notifier.stop()
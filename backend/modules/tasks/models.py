@@ -2,9 +2,9 @@
 
 from __future__ import annotations
 
-from typing import Literal
+from typing import Annotated, Any, Literal
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 TaskStatus = Literal[
     "backlog", "todo", "in-progress", "blocked", "peer_review", "rejected", "review", "done", "cancelled"
@@ -23,6 +23,49 @@ VALID_STATES = {
 }
 
 
+# Maps API field name -> the mc_tasks column it is built from (for ?fields= projection)
+TASK_FIELD_COLUMNS: dict[str, str] = {
+    "id": "id",
+    "title": "title",
+    "description": "description",
+    "status": "state",
+    "priority": "priority",
+    "type": "type",
+    "project": "project",
+    "tags": "tags",
+    "skill": "agent_id",
+    "schedule": "schedule",
+    "scheduledAt": "scheduled_at",
+    "scheduleParentId": "schedule_parent_id",
+    "references": "references_",
+    "blockedBy": "blocked_by",
+    "blocks": "blocks",
+    "startedAt": "started_at",
+    "completedAt": "completed_at",
+    "result": "result",
+    "error": "error",
+    "proof": "proof",
+    "pickedUp": "picked_up",
+    "claimedBy": "claimed_by",
+    "claimedAt": "claimed_at",
+    "leaseExpiresAt": "lease_expires_at",
+    "createdAt": "created_at",
+    "updatedAt": "updated_at",
+    "estimatedHours": "estimated_hours",
+    "actualHours": "actual_hours",
+    "slug": "slug",
+}
+
+# Per-task comment/activity aggregates — computed in one batch per list, not mc_tasks columns
+TASK_COUNT_FIELDS: list[str] = ["commentCount", "lastCommentAt", "lastActivityAt"]
+
+# Slim kanban card (?view=card) — everything the board renders, none of the large text columns
+TASK_CARD_FIELDS: list[str] = [
+    "id", "title", "status", "priority", "type", "project", "tags", "skill",
+    "blockedBy", "claimedBy", "estimatedHours", "updatedAt", "slug", *TASK_COUNT_FIELDS,
+]
+
+
 def status_to_state(status: str) -> str:
     """Convert API status string to Postgres state value."""
     return status.replace("-", "_")
@@ -46,8 +89,9 @@ class Task(BaseModel):
     project: str | None = None
     tags: list[str] = []
     skill: str | None = None
-    schedule: str | None = None
+    schedule: str | None = None  # cron expression: this task is a recurring template
     scheduledAt: str | None = None
+    scheduleParentId: str | None = None  # template this instance was expanded from
     references: list[dict] = []
     blockedBy: list[str] = []
     blocks: list[str] = []
@@ -59,6 +103,7 @@ class Task(BaseModel):
     pickedUp: bool = False
     claimedBy: str | None = None
     claimedAt: str | None = None
+    leaseExpiresAt: str | None = None
     createdAt: str
     updatedAt: str
     estimatedHours: float | None = None
@@ -66,6 +111,69 @@ class Task(BaseModel):
     slug: str | None = None
 
 
+class TaskCounts(BaseModel):
+    id: str
+    commentCount: int = 0
+    lastCommentAt: str | None = None
+    lastActivityAt: str | None = None
+
+
+class TaskListItem(Task):
+    """A task in the unpaged list, with its comment/activity badge counts."""
+
+    commentCount: int = 0
+    lastCommentAt: str | None = None
+    lastActivityAt: str | None = None
+
+
+class TaskPage(BaseModel):
+    """One keyset page of (possibly projected) tasks."""
+
+    items: list[dict[str, Any]]
+    next_cursor: str | None = None
+
+
+class BoardColumn(BaseModel):
+    status: TaskStatus
+    total: int
+    items: list[dict[str, Any]]  # first cards of the column, in list order
+    next_cursor: str | None = None  # continue with GET /?status=<status>&cursor=...
+
+
+class TaskBoard(BaseModel):
+    """GET /board — one column per status, each capped at the requested card limit."""
+
+    columns: list[BoardColumn]
+
+
+class TaskSearchHit(BaseModel):
+    """One search result. Highlights wrap matches in <mark>; the rest is raw task text."""
+
+    task: Task
+    rank: float
+    titleHighlight: str
+    snippet: str  # best fragments of description/result
+
+
+class TaskSearchPage(BaseModel):
+    items: list[TaskSearchHit]
+    next_cursor: str | None = None
+
+
+class TaskChanges(BaseModel):
+    """GET /changes — rows changed after `since`, plus tombstones for deleted ids.
+
+    Pass `version` back as `since` on the next call. `reset` means `since`
+    predates the retained history and the client must refetch the full list.
+    """
+
+    version: int
+    changed: list[Task] = []
+    deleted: list[str] = []
+    has_more: bool = False
+    reset: bool = False
+
+
 class TaskCreate(BaseModel):
     title: str
     description: str = ""
@@ -102,12 +210,100 @@ class TaskUpdate(BaseModel):
     actualHours: float | None = None
 
 
+class TaskBulkCreate(BaseModel):
+    op: Literal["create"]
+    task: TaskCreate
+
+
+class TaskBulkUpdate(BaseModel):
+    op: Literal["update"]
+    id: int
+    changes: TaskUpdate
+
+
+class TaskBulkTransition(BaseModel):
+    op: Literal["transition"]
+    id: int
+    status: TaskStatus
+
+
+TaskBulkOperation = Annotated[
+    TaskBulkCreate | TaskBulkUpdate | TaskBulkTransition, Field(discriminator="op")
+]
+
+
+class TaskBulkRequest(BaseModel):
+    """POST /bulk body — applied in one transaction: creates, then updates, then transitions."""
+
+    operations: list[TaskBulkOperation] = Field(..., min_length=1, max_length=1000)
+
+
+class TaskBulkResult(BaseModel):
+    created: list[Task]
+    updated: list[Task]
+
+
+class TaskEdge(BaseModel):
+    blocker: str
+    blocked: str
+
+
+class TaskGraph(BaseModel):
+    """GET /{id}/graph — the task's dependency component, blockers before dependents."""
+
+    id: str
+    order: list[str]
+    edges: list[TaskEdge]
+    tasks: list[Task]  # same order as `order`
+
+
 class TaskComplete(BaseModel):
     result: str | None = None
     error: str | None = None
     proof: dict | None = None
 
 
+class QueueClaimRequest(BaseModel):
+    """POST /queue/claim body — claim up to `limit` eligible tasks in one call."""
+
+    agent_id: str
+    limit: int = Field(1, ge=1, le=50)
+    project: str | None = None
+    tags: list[str] = []
+    skill: str | None = None  # only tasks assigned to this agent (mc_tasks.agent_id)
+    lease_seconds: int | None = Field(None, ge=30, le=86400)  # default: settings.task_lease_seconds
+
+
+class QueueAgentLoad(BaseModel):
+    agent_id: str
+    in_flight: int
+    max_in_flight: int | None  # None = unlimited
+
+
+class QueueProjectShare(BaseModel):
+    project: str | None
+    weight: float
+    in_flight: int
+    queued: int
+
+
+class QueuePolicy(BaseModel):
+    """GET /queue/policy — the limits the claim path enforces and current load against them."""
+
+    max_in_flight: int | None  # default per-agent cap; None = unlimited
+    agent_limits: dict[str, int]
+    project_weights: dict[str, float]  # projects not listed weigh 1.0
+    priority_aging_seconds: int  # 0 = priorities never age
+    agents: list[QueueAgentLoad]
+    projects: list[QueueProjectShare]
+
+
+class TaskTag(BaseModel):
+    tag: str
+    open: int  # tasks not done or cancelled
+    total: int
+
+
 class TaskStats(BaseModel):
     in_progress_count: int
     todo_count: int
@@ -124,6 +320,11 @@ class Comment(BaseModel):
     createdAt: str
 
 
+class CommentPage(BaseModel):
+    items: list[Comment]
+    next_cursor: str | None = None
+
+
 class CommentCreate(BaseModel):
     body: str
     authorId: str = "user"
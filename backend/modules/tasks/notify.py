@@ -0,0 +1,148 @@
+"""Task queue wake-ups — Postgres LISTEN/NOTIFY fan-out to long-pollers and WebSockets."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import logging
+
+import asyncpg
+
+from core.database import asyncpg_dsn
+from core.websocket import manager
+
+logger = logging.getLogger(__name__)
+
+# Channel written by the mc_tasks_queue_notify() trigger
+QUEUE_CHANNEL = "mc_tasks_queue"
+
+# Topic pushed to WebSocket subscribers when a task becomes claimable
+QUEUE_TOPIC = "tasks:queue:available"
+
+# Notifications arriving within this window are coalesced into one broadcast
+_BROADCAST_DELAY = 0.05
+
+# Seconds between reconnect attempts after the LISTEN connection is lost, doubling to the cap
+_RECONNECT_DELAY = 1.0
+_RECONNECT_DELAY_MAX = 30.0
+
+_CONNECT_ERRORS = (OSError, TimeoutError, asyncpg.PostgresError, asyncpg.InterfaceError)
+
+
+class QueueNotifier:
+    """Holds one dedicated LISTEN connection and wakes every queue waiter on NOTIFY.
+
+    Waiters grab the current event *before* checking the queue, so a
+    notification that lands between the check and the wait is never missed.
+    A lost connection is re-established in the background with backoff;
+    waiters are woken both when it drops (so they fall back to polling) and
+    when it is back (so they re-check for anything missed in between).
+    """
+
+    def __init__(self) -> None:
+        self._conn: asyncpg.Connection | None = None
+        self._event = asyncio.Event()
+        self._pending_ids: list[int] = []
+        self._broadcast_task: asyncio.Task | None = None
+        self._reconnect_task: asyncio.Task | None = None
+        self._stopping = False
+
+    @property
+    def listening(self) -> bool:
+        return self._conn is not None and not self._conn.is_closed()
+
+    async def start(self) -> None:
+        self._stopping = False
+        try:
+            await self._connect()
+        except _CONNECT_ERRORS as exc:
+            logger.warning("Queue LISTEN unavailable, long-poll will fall back to polling: %s", exc)
+            self._schedule_reconnect()
+
+    async def stop(self) -> None:
+        self._stopping = True
+        for task in (self._broadcast_task, self._reconnect_task):
+            if task is not None:
+                task.cancel()
+        if self._conn is not None:
+            with contextlib.suppress(*_CONNECT_ERRORS):
+                await self._conn.close()
+            self._conn = None
+        self.wake()
+
+    async def _connect(self) -> None:
+        conn = await asyncpg.connect(asyncpg_dsn())
+        try:
+            await conn.add_listener(QUEUE_CHANNEL, self._on_notify)
+        except BaseException:
+            conn.terminate()
+            raise
+        conn.add_termination_listener(self._on_terminate)
+        self._conn = conn
+        logger.info("Listening on %s", QUEUE_CHANNEL)
+
+    def _on_terminate(self, conn: asyncpg.Connection) -> None:
+        if self._stopping or conn is not self._conn:
+            return
+        logger.warning("Queue LISTEN connection lost, reconnecting")
+        self._conn = None
+        self.wake()
+        self._schedule_reconnect()
+
+    def _schedule_reconnect(self) -> None:
+        if self._reconnect_task is None or self._reconnect_task.done():
+            self._reconnect_task = asyncio.get_running_loop().create_task(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        delay = _RECONNECT_DELAY
+        while not self._stopping:
+            await asyncio.sleep(delay)
+            try:
+                await self._connect()
+            except _CONNECT_ERRORS as exc:
+                delay = min(delay * 2, _RECONNECT_DELAY_MAX)
+                logger.warning("Queue LISTEN reconnect failed, retrying in %.0fs: %s", delay, exc)
+                continue
+            # Notifications sent while disconnected are lost; have waiters re-check
+            self.wake()
+            return
+
+    def current(self) -> asyncio.Event:
+        """Event that fires on the next queue notification."""
+        return self._event
+
+    def wake(self) -> None:
+        """Release all current waiters and arm a fresh event for the next round."""
+        event, self._event = self._event, asyncio.Event()
+        event.set()
+
+    async def wait(self, event: asyncio.Event, timeout: float) -> bool:
+        """Wait for `event` up to `timeout` seconds. Returns True if it fired."""
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except TimeoutError:
+            return False
+
+    def _on_notify(self, _conn, _pid, _channel, payload: str) -> None:
+        try:
+            task_id = json.loads(payload).get("id")
+        except (json.JSONDecodeError, AttributeError):
+            task_id = None
+        if task_id is not None:
+            self._pending_ids.append(task_id)
+        self.wake()
+        if self._broadcast_task is None or self._broadcast_task.done():
+            self._broadcast_task = asyncio.get_running_loop().create_task(self._broadcast())
+
+    async def _broadcast(self) -> None:
+        await asyncio.sleep(_BROADCAST_DELAY)
+        ids, self._pending_ids = self._pending_ids, []
+        try:
+            await manager.broadcast(QUEUE_TOPIC, {"ids": [str(i) for i in ids]})
+        except Exception:
+            logger.warning("Failed to broadcast %s", QUEUE_TOPIC, exc_info=True)
+
+
+queue_notifier = QueueNotifier()
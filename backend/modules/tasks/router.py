@@ -1,18 +1,44 @@
-"""Tasks API router — Postgres-backed replacement for warroom task endpoints."""
+"""Tasks API router — Postgres-backed replacement for warroom task endpoints.
+
+Broadcasts and activity events are queued in the service's transaction
+(modules.activity.outbox) and delivered after commit, not awaited here.
+"""
 
 from __future__ import annotations
 
 import logging
+from typing import Literal
 
-from fastapi import APIRouter, HTTPException, Query
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
 
-from core.websocket import manager
-from modules.activity.models import ActivityLogRequest
-from modules.activity.service import activity_service
+from core.export import ExportFormat, export_response
 
 from . import service
-from .models import ActivityEntry, Comment, CommentCreate, Task, TaskComplete, TaskCreate, TaskStats, TaskUpdate
+from .models import (
+    TASK_CARD_FIELDS,
+    ActivityEntry,
+    Comment,
+    CommentCreate,
+    QueueClaimRequest,
+    QueuePolicy,
+    Task,
+    TaskBoard,
+    TaskBulkRequest,
+    TaskBulkResult,
+    TaskChanges,
+    TaskComplete,
+    TaskCounts,
+    TaskCreate,
+    TaskGraph,
+    TaskListItem,
+    TaskSearchHit,
+    TaskStats,
+    TaskTag,
+    TaskUpdate,
+)
+from .scheduler import task_scheduler
 
 logger = logging.getLogger(__name__)
 
@@ -24,16 +50,79 @@ router = APIRouter()
 # ---------------------------------------------------------------------------
 
 
-@router.get("/", response_model=list[Task])
+@router.get("/", response_model=list[TaskListItem])
 async def list_tasks(
     project: str | None = Query(None),
     priority: str | None = Query(None),
     tags: str | None = Query(None),
     status: str | None = Query(None),
-) -> list[Task]:
-    return await service.list_tasks(
-        project=project, priority=priority, tags=tags, status=status
+    limit: int | None = Query(None, ge=1, le=500),
+    cursor: str | None = Query(None),
+    fields: str | None = Query(None, description="Comma-separated Task fields to return"),
+    view: Literal["full", "card"] = Query("full"),
+    include_archived: bool = Query(False, description="Also list archived tasks"),
+):
+    """List tasks. Unpaged by default; pass `limit`/`cursor` for keyset pages.
+
+    Paged responses carry the next page's cursor in the `X-Next-Cursor`
+    header. `view=card` or `fields=` return only the requested Task fields.
+    Full and card items include comment/activity counts (commentCount,
+    lastCommentAt, lastActivityAt), fetched in one batch per page.
+    Archived tasks are left out unless `include_archived` is set.
+    """
+    if limit is None and cursor is None and fields is None and view == "full":
+        return await service.list_tasks(
+            project=project,
+            priority=priority,
+            tags=tags,
+            status=status,
+            include_archived=include_archived,
+        )
+
+    if fields is not None:
+        field_list = [f.strip() for f in fields.split(",") if f.strip()]
+    elif view == "card":
+        field_list = TASK_CARD_FIELDS
+    else:
+        field_list = None
+
+    try:
+        page = await service.list_tasks_page(
+            project=project,
+            priority=priority,
+            tags=tags,
+            status=status,
+            limit=limit or 100,
+            cursor=cursor,
+            fields=field_list,
+            include_archived=include_archived,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    headers = {"X-Next-Cursor": page.next_cursor} if page.next_cursor else {}
+    return JSONResponse(content=page.items, headers=headers)
+
+
+@router.get("/export")
+async def export_tasks(
+    project: str | None = Query(None),
+    priority: str | None = Query(None),
+    tags: str | None = Query(None),
+    status: str | None = Query(None),
+    fmt: ExportFormat = Query("ndjson", alias="format"),
+    include_archived: bool = Query(False, description="Also export archived tasks"),
+) -> StreamingResponse:
+    """Stream every task matching the list filters as NDJSON or CSV, in list order."""
+    chunks = service.export_tasks(
+        fmt,
+        project=project,
+        priority=priority,
+        tags=tags,
+        status=status,
+        include_archived=include_archived,
     )
+    return export_response(chunks, fmt, "tasks")
 
 
 @router.post("/", response_model=Task)
@@ -42,28 +131,152 @@ async def create_task(payload: TaskCreate) -> Task:
         task = await service.create_task(payload)
     except ValueError as e:
         raise HTTPException(status_code=422, detail=str(e))
-    await activity_service.log_event(
-        ActivityLogRequest(
-            actor="user",
-            action="task.created",
-            resource_type="task",
-            resource_id=task.id,
-            resource_name=task.title,
-            module="tasks",
-        )
-    )
-    await manager.broadcast("tasks:task:created", task.model_dump(mode="json"))
+    task_scheduler.observe(task)
     return task
 
 
+@router.post("/bulk", response_model=TaskBulkResult)
+async def bulk_tasks(payload: TaskBulkRequest) -> TaskBulkResult:
+    """Apply many create/update/transition operations atomically.
+
+    Emits a single tasks:task:bulk broadcast and one summary activity event
+    instead of one per task.
+    """
+    try:
+        result = await service.bulk_apply(payload)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    for task in (*result.created, *result.updated):
+        task_scheduler.observe(task)
+    return result
+
+
 @router.get("/queue", response_model=list[Task])
 async def get_queue() -> list[Task]:
     return await service.get_queue()
 
 
-@router.get("/tags", response_model=list[str])
-async def list_tags() -> list[str]:
-    return await service.list_tags()
+@router.get("/queue/wait", response_model=list[Task])
+async def wait_for_queue(timeout: float = Query(30, ge=0, le=120)) -> list[Task]:
+    """Block until pickup-eligible tasks exist or `timeout` seconds pass (then returns [])."""
+    return await service.wait_for_queue(timeout)
+
+
+@router.post("/queue/claim", response_model=list[Task])
+async def claim_from_queue(payload: QueueClaimRequest) -> list[Task]:
+    """Claim up to `limit` eligible tasks in one round trip. Empty list when none are free."""
+    tasks = await service.claim_next(payload)
+    return tasks
+
+
+@router.get("/queue/policy", response_model=QueuePolicy)
+async def get_queue_policy() -> QueuePolicy:
+    """Per-agent in-flight caps, project fair-share weights and priority aging, with current load."""
+    return await service.get_queue_policy()
+
+
+@router.get("/changes", response_model=TaskChanges)
+async def list_changes(
+    since: int | None = Query(None, ge=0, description="Version from the previous call"),
+    limit: int = Query(500, ge=1, le=5000),
+) -> TaskChanges:
+    """Delta sync: tasks changed and ids deleted after `since`.
+
+    Call without `since` to get the current version after a full list
+    fetch, then poll (or refetch on each tasks:task:* broadcast) with the
+    returned version. Keep paging while `has_more`; on `reset`, refetch
+    the full list.
+    """
+    return await service.list_changes(since, limit=limit)
+
+
+@router.get("/board", response_model=TaskBoard)
+async def get_board(
+    project: str | None = Query(None),
+    priority: str | None = Query(None),
+    tags: str | None = Query(None),
+    limit: int = Query(20, ge=1, le=200, description="Cards per column"),
+    fields: str | None = Query(None, description="Comma-separated Task fields to return"),
+    view: Literal["full", "card"] = Query("card"),
+    include_archived: bool = Query(False, description="Also show archived tasks"),
+) -> TaskBoard:
+    """Kanban board: per-status totals and the first `limit` cards of each column.
+
+    Load more of a column with GET /?status=<status>&cursor=<next_cursor>,
+    passing the same `include_archived`.
+    """
+    if fields is not None:
+        field_list = [f.strip() for f in fields.split(",") if f.strip()]
+    else:
+        field_list = TASK_CARD_FIELDS if view == "card" else None
+    try:
+        return await service.get_board(
+            project=project,
+            priority=priority,
+            tags=tags,
+            limit=limit,
+            fields=field_list,
+            include_archived=include_archived,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@router.get("/counts", response_model=list[TaskCounts])
+async def get_task_counts(
+    ids: str = Query(..., description="Comma-separated task ids (max 500)"),
+) -> list[TaskCounts]:
+    """Comment count and last comment/activity times for many tasks in one query."""
+    try:
+        task_ids = [int(i) for i in ids.split(",") if i.strip()]
+    except ValueError:
+        raise HTTPException(status_code=422, detail="ids must be comma-separated integers")
+    if not task_ids or len(task_ids) > 500:
+        raise HTTPException(status_code=422, detail="Pass between 1 and 500 ids")
+    return await service.get_task_counts(task_ids)
+
+
+@router.get("/search", response_model=list[TaskSearchHit])
+async def search_tasks(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=500),
+    project: str | None = Query(None),
+    priority: str | None = Query(None),
+    tags: str | None = Query(None),
+    status: str | None = Query(None),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = Query(None),
+    include_archived: bool = Query(False, description="Also search archived tasks"),
+):
+    """Ranked full-text search, filterable like the list endpoint.
+
+    The next page's cursor is returned in the `X-Next-Cursor` header.
+    """
+    try:
+        page = await service.search_tasks(
+            q,
+            project=project,
+            priority=priority,
+            tags=tags,
+            status=status,
+            limit=limit,
+            cursor=cursor,
+            include_archived=include_archived,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return page.items
+
+
+@router.get("/tags", response_model=list[TaskTag])
+async def list_tags(
+    prefix: str | None = Query(None, description="Only tags starting with this (autocomplete)"),
+    limit: int | None = Query(None, ge=1, le=1000),
+) -> list[TaskTag]:
+    """Tags with open/total task counts — alphabetical, or most-used first with a prefix."""
+    return await service.list_tags(prefix=prefix, limit=limit)
 
 
 @router.get("/stats", response_model=TaskStats)
@@ -72,13 +285,25 @@ async def get_stats() -> TaskStats:
 
 
 @router.get("/{task_id}", response_model=Task)
-async def get_task(task_id: int) -> Task:
-    task = await service.get_task(task_id)
+async def get_task(
+    task_id: int,
+    include_archived: bool = Query(True, description="Fall through to archived tasks"),
+) -> Task:
+    task = await service.get_task(task_id, include_archived=include_archived)
     if task is None:
         raise HTTPException(status_code=404, detail="Task not found")
     return task
 
 
+@router.get("/{task_id}/graph", response_model=TaskGraph)
+async def get_task_graph(task_id: int) -> TaskGraph:
+    """Dependency component of a task, blockers ordered before the tasks they block."""
+    graph = await service.get_task_graph(task_id)
+    if graph is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return graph
+
+
 @router.put("/{task_id}", response_model=Task)
 async def update_task(task_id: int, payload: TaskUpdate) -> Task:
     try:
@@ -87,17 +312,7 @@ async def update_task(task_id: int, payload: TaskUpdate) -> Task:
         raise HTTPException(status_code=422, detail=str(e))
     if task is None:
         raise HTTPException(status_code=404, detail="Task not found")
-    await activity_service.log_event(
-        ActivityLogRequest(
-            actor="user",
-            action="task.updated",
-            resource_type="task",
-            resource_id=task.id,
-            resource_name=task.title,
-            module="tasks",
-        )
-    )
-    await manager.broadcast("tasks:task:updated", task.model_dump(mode="json"))
+    task_scheduler.observe(task)
     return task
 
 
@@ -106,16 +321,6 @@ async def delete_task(task_id: int) -> dict:
     ok = await service.delete_task(task_id)
     if not ok:
         raise HTTPException(status_code=404, detail="Task not found")
-    await activity_service.log_event(
-        ActivityLogRequest(
-            actor="user",
-            action="task.deleted",
-            resource_type="task",
-            resource_id=str(task_id),
-            module="tasks",
-        )
-    )
-    await manager.broadcast("tasks:task:deleted", {"id": str(task_id)})
     return {"ok": True}
 
 
@@ -124,7 +329,6 @@ async def run_task(task_id: int) -> dict:
     task = await service.run_task(task_id)
     if task is None:
         raise HTTPException(status_code=404, detail="Task not found")
-    await manager.broadcast("tasks:task:updated", task.model_dump(mode="json"))
     return {"ok": True, "message": "Task queued for execution"}
 
 
@@ -133,26 +337,17 @@ async def pickup_task(task_id: int) -> Task:
     task = await service.pickup_task(task_id)
     if task is None:
         raise HTTPException(status_code=404, detail="Task not found")
-    await manager.broadcast("tasks:task:updated", task.model_dump(mode="json"))
     return task
 
 
 @router.post("/{task_id}/complete", response_model=Task)
 async def complete_task(task_id: int, payload: TaskComplete = TaskComplete()) -> Task:
-    task = await service.complete_task(task_id, payload)
+    try:
+        task = await service.complete_task(task_id, payload)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     if task is None:
         raise HTTPException(status_code=404, detail="Task not found")
-    await activity_service.log_event(
-        ActivityLogRequest(
-            actor="system",
-            action="task.completed",
-            resource_type="task",
-            resource_id=task.id,
-            resource_name=task.title,
-            module="tasks",
-        )
-    )
-    await manager.broadcast("tasks:task:updated", task.model_dump(mode="json"))
     return task
 
 
@@ -163,17 +358,17 @@ async def complete_task(task_id: int, payload: TaskComplete = TaskComplete()) ->
 
 class _ClaimBody(BaseModel):
     agent_id: str
+    lease_seconds: int | None = Field(None, ge=30, le=86400)
 
 
 @router.post("/{task_id}/claim", response_model=Task)
 async def claim_task(task_id: int, payload: _ClaimBody) -> Task:
     try:
-        task = await service.claim_task(task_id, payload.agent_id)
+        task = await service.claim_task(task_id, payload.agent_id, payload.lease_seconds)
     except ValueError as e:
         raise HTTPException(status_code=409, detail=str(e))
     if task is None:
         raise HTTPException(status_code=404, detail="Task not found")
-    await manager.broadcast("tasks:task:claimed", task.model_dump(mode="json"))
     return task
 
 
@@ -182,7 +377,18 @@ async def release_task(task_id: int) -> Task:
     task = await service.release_task(task_id)
     if task is None:
         raise HTTPException(status_code=404, detail="Task not found or not claimed")
-    await manager.broadcast("tasks:task:released", task.model_dump(mode="json"))
+    return task
+
+
+@router.post("/{task_id}/heartbeat", response_model=Task)
+async def heartbeat_task(task_id: int, payload: _ClaimBody) -> Task:
+    """Extend the caller's claim lease. Claims that stop heartbeating are released by the reaper."""
+    try:
+        task = await service.heartbeat_task(task_id, payload.agent_id, payload.lease_seconds)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
     return task
 
 
@@ -192,14 +398,28 @@ async def release_task(task_id: int) -> Task:
 
 
 @router.get("/{task_id}/comments", response_model=list[Comment])
-async def list_comments(task_id: int):
-    return await service.list_comments(task_id)
+async def list_comments(
+    task_id: int,
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: str | None = Query(None),
+):
+    """A page of comments, newest first. The next page's cursor is in `X-Next-Cursor`."""
+    try:
+        page = await service.list_comments(task_id, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return page.items
 
 
 @router.post("/{task_id}/comments", response_model=Comment, status_code=201)
 async def create_comment(task_id: int, payload: CommentCreate):
-    comment = await service.create_comment(task_id, payload)
-    await manager.broadcast("tasks:comment:created", comment.model_dump(mode="json"))
+    try:
+        comment = await service.create_comment(task_id, payload)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     return comment
 
 
@@ -208,7 +428,6 @@ async def delete_comment(comment_id: int):
     ok = await service.delete_comment(comment_id)
     if not ok:
         raise HTTPException(status_code=404, detail="Comment not found")
-    await manager.broadcast("tasks:comment:deleted", {"id": comment_id})
     return {"ok": True}
 
 
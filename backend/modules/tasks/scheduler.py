@@ -0,0 +1,160 @@
+"""Task scheduler — promotes scheduled backlog tasks to todo at their due time.
+
+Due times sit in a min-heap keyed on `scheduled_at`, so the loop sleeps
+exactly until the next one instead of polling the table. Task writes wake
+it early through `observe()`. Cron templates (tasks with a `schedule`) are
+expanded into dated instances a lookahead window ahead, on an interval or
+whenever a template is written.
+
+Every worker runs a scheduler; the advisory locks in the service make sure
+each task is promoted, and each template expanded, by only one of them.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import heapq
+import logging
+from datetime import UTC, datetime, timedelta, tzinfo
+from zoneinfo import ZoneInfo
+
+from core.config import settings
+
+from . import service
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+# Back-off before retrying a promotion that failed (e.g. database unavailable)
+_RETRY_DELAY = timedelta(seconds=30)
+
+
+class TaskScheduler:
+    """Min-heap of (due, task_id) with a single sleeper that wakes for the earliest entry.
+
+    Entries are never removed from the heap in place; `_due` holds the live
+    due time per task and heap entries that no longer match it are skipped.
+    """
+
+    def __init__(self, lookahead: timedelta, expand_interval: float, tz: tzinfo) -> None:
+        self.lookahead = lookahead
+        self.expand_interval = expand_interval
+        self.tz = tz
+        self._heap: list[tuple[datetime, int]] = []
+        self._due: dict[int, datetime] = {}
+        self._wake = asyncio.Event()
+        self._expand_requested = True
+        self._next_expand = 0.0
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._expand_requested = True
+        self._task = asyncio.create_task(self._run(), name="tasks-scheduler")
+        logger.info("Started task scheduler")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+        logger.info("Stopped task scheduler")
+
+    def observe(self, task: Task) -> None:
+        """Track a task just written through the API."""
+        if task.schedule:
+            self.request_expansion()
+        elif task.status == "backlog" and task.scheduledAt:
+            self.push(int(task.id), datetime.fromisoformat(task.scheduledAt))
+        else:
+            self._due.pop(int(task.id), None)
+
+    def request_expansion(self) -> None:
+        self._expand_requested = True
+        self._wake.set()
+
+    def push(self, task_id: int, due: datetime) -> None:
+        """Schedule `task_id` for promotion at `due`, replacing any earlier entry."""
+        if due.tzinfo is None:
+            due = due.replace(tzinfo=UTC)
+        if self._due.get(task_id) == due:
+            return
+        self._due[task_id] = due
+        heapq.heappush(self._heap, (due, task_id))
+        if self._heap[0] == (due, task_id):
+            self._wake.set()  # new earliest entry: the sleeper's deadline moved up
+
+    def next_due(self) -> datetime | None:
+        while self._heap:
+            due, task_id = self._heap[0]
+            if self._due.get(task_id) == due:
+                return due
+            heapq.heappop(self._heap)
+        return None
+
+    def pop_due(self, now: datetime) -> list[int]:
+        """Remove and return every task id due at or before `now`."""
+        ids: list[int] = []
+        while (due := self.next_due()) is not None and due <= now:
+            _, task_id = heapq.heappop(self._heap)
+            del self._due[task_id]
+            ids.append(task_id)
+        return ids
+
+    async def refresh(self) -> None:
+        """Expand cron templates, then merge every due-soon task from the table into the heap."""
+        self._expand_requested = False
+        self._next_expand = asyncio.get_running_loop().time() + self.expand_interval
+        try:
+            await service.expand_schedules(self.lookahead, self.tz)
+            for task_id, due in await service.load_scheduled(self.lookahead):
+                self.push(task_id, due)
+        except Exception:
+            logger.exception("Task schedule refresh failed; retrying next interval")
+
+    async def promote(self, task_ids: list[int]) -> list[Task]:
+        try:
+            tasks = await service.promote_scheduled(task_ids)
+        except Exception:
+            logger.exception("Promoting %d scheduled task(s) failed; retrying", len(task_ids))
+            retry_at = datetime.now(UTC) + _RETRY_DELAY
+            for task_id in task_ids:
+                self.push(task_id, retry_at)
+            return []
+        if tasks:
+            logger.info("Promoted %d scheduled task(s) to todo", len(tasks))
+        return tasks
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            if self._expand_requested or loop.time() >= self._next_expand:
+                await self.refresh()
+            now = datetime.now(UTC)
+            due_ids = self.pop_due(now)
+            if due_ids:
+                await self.promote(due_ids)
+                continue
+            # No await between the checks above and clear(), so no wake-up is lost
+            self._wake.clear()
+            timeout = self._next_expand - loop.time()
+            next_due = self.next_due()
+            if next_due is not None:
+                timeout = min(timeout, (next_due - now).total_seconds())
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._wake.wait(), max(timeout, 0))
+
+
+task_scheduler = TaskScheduler(
+    lookahead=timedelta(hours=settings.task_schedule_lookahead_hours),
+    expand_interval=settings.task_schedule_expand_interval_seconds,
+    tz=ZoneInfo(settings.task_schedule_timezone),
+)
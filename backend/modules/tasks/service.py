@@ -2,31 +2,69 @@
 
 from __future__ import annotations
 
+import asyncio
+import base64
+import binascii
+import contextlib
 import json
 import logging
 import re
 import secrets
-from datetime import datetime
+from collections.abc import AsyncIterator
+from datetime import datetime, timedelta, tzinfo
+from typing import get_args
 
 from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
 
+from core.config import settings
 from core.database import async_session
+from core.export import ExportFormat, stream_query
+from modules.activity.models import ActivityLogRequest
+from modules.activity.outbox import enqueue
 
+from .cron import CronSchedule
+from .graph import dependency_index, sorted_ids
 from .models import (
     PRIORITY_INT_TO_STR,
     PRIORITY_STR_TO_INT,
+    TASK_COUNT_FIELDS,
+    TASK_FIELD_COLUMNS,
     VALID_STATES,
     ActivityEntry,
+    BoardColumn,
     Comment,
     CommentCreate,
+    CommentPage,
+    QueueAgentLoad,
+    QueueClaimRequest,
+    QueuePolicy,
+    QueueProjectShare,
     Task,
+    TaskBoard,
+    TaskBulkCreate,
+    TaskBulkRequest,
+    TaskBulkResult,
+    TaskBulkTransition,
+    TaskBulkUpdate,
+    TaskChanges,
     TaskComplete,
+    TaskCounts,
     TaskCreate,
+    TaskEdge,
+    TaskGraph,
+    TaskListItem,
+    TaskPage,
+    TaskSearchHit,
+    TaskSearchPage,
     TaskStats,
+    TaskStatus,
+    TaskTag,
     TaskUpdate,
     state_to_status,
     status_to_state,
 )
+from .notify import queue_notifier
 
 logger = logging.getLogger(__name__)
 
@@ -63,10 +101,69 @@ def _iso_or_none(dt) -> str | None:
     return str(dt)
 
 
-def _row_to_task(row) -> Task:
-    """Convert a SQLAlchemy Row mapping to a Task API model."""
-    m = row._mapping
+def _lease_seconds(requested: int | None) -> int:
+    """Lease TTL for a claim or heartbeat, falling back to the configured default."""
+    return requested or settings.task_lease_seconds
+
+
+# SQLSTATEs a task write hits because of its input rather than a server fault
+_CLIENT_SQLSTATES = {
+    "23505": "conflicts with an existing task",  # unique_violation
+    "23503": "references a task that does not exist",  # foreign_key_violation
+    "23514": "violates a task constraint",  # check_violation
+    "22P02": "has an invalid value",  # invalid_text_representation
+    "22007": "has an invalid date",  # invalid_datetime_format
+    "22008": "has a date out of range",  # datetime_field_overflow
+}
+
+
+@contextlib.asynccontextmanager
+async def _write_errors():
+    """Shared error mapper for task writes: input-caused database errors become ValueError.
+
+    Routes already map ValueError to a 4xx, so a constraint hit surfaces as a
+    clean client error instead of a 500.
+    """
+    try:
+        yield
+    except DBAPIError as e:
+        sqlstate = getattr(e.orig, "sqlstate", None) or getattr(e.orig, "pgcode", None)
+        reason = _CLIENT_SQLSTATES.get(sqlstate)
+        if reason is None:
+            raise
+        raise ValueError(f"Task write {reason}") from e
+
+
+def _guarded_update(set_clause: str, guard: str) -> str:
+    """A conditional UPDATE of task :id that also reports why it matched nothing.
+
+    One round trip. No row: the task does not exist. A row whose `id` is
+    NULL: it exists but `guard` failed, and `holder` is its claimed_by at
+    the start of the statement. Otherwise the updated row, plus `holder`.
+    """
+    return f"""
+        WITH target AS (SELECT claimed_by FROM mc_tasks WHERE id = :id),
+        updated AS (
+            UPDATE mc_tasks SET {set_clause}
+            WHERE id = :id AND {guard}
+            RETURNING *
+        )
+        SELECT target.claimed_by AS holder, updated.* FROM target LEFT JOIN updated ON true
+    """
+
+
+def _validate_schedule(schedule: str | None) -> None:
+    """Reject a recurring-task cron expression the scheduler could not expand."""
+    if schedule:
+        CronSchedule(schedule)
+
 
+def _task_values(m) -> dict:
+    """Convert an mc_tasks row mapping into API field values.
+
+    Tolerates partial rows (column projections): missing columns map to the
+    same defaults an empty column would.
+    """
     # Parse references_ (jsonb → list[dict])
     refs_raw = m.get("references_")
     if refs_raw is None:
@@ -86,52 +183,112 @@ def _row_to_task(row) -> Task:
     priority_int = m.get("priority", 3)
     priority_str = PRIORITY_INT_TO_STR.get(priority_int, "medium")
 
-    state = m.get("state", "backlog")
+    state = m.get("state") or "backlog"
     status = state_to_status(state)
 
-    return Task(
-        id=str(m["id"]),
-        title=m["title"],
-        description=m.get("description") or "",
-        status=status,
-        priority=priority_str,
-        type=m.get("type") or "feature",
-        project=m.get("project"),
-        tags=_ensure_list(m.get("tags")),
-        skill=m.get("agent_id") or None,
-        schedule=m.get("schedule"),
-        scheduledAt=_iso_or_none(m.get("scheduled_at")),
-        references=refs,
-        blockedBy=blocked_by,
-        blocks=blocks,
-        startedAt=_iso_or_none(m.get("started_at")),
-        completedAt=_iso_or_none(m.get("completed_at")),
-        result=m.get("result"),
-        error=m.get("error"),
-        proof=m.get("proof"),
-        pickedUp=bool(m.get("picked_up")),
-        claimedBy=m.get("claimed_by"),
-        claimedAt=_iso_or_none(m.get("claimed_at")),
-        createdAt=_iso_or_none(m["created_at"]),
-        updatedAt=_iso_or_none(m["updated_at"]),
-        estimatedHours=m.get("estimated_hours"),
-        actualHours=m.get("actual_hours"),
-        slug=m.get("slug"),
+    return {
+        "id": str(m["id"]),
+        "title": m.get("title"),
+        "description": m.get("description") or "",
+        "status": status,
+        "priority": priority_str,
+        "type": m.get("type") or "feature",
+        "project": m.get("project"),
+        "tags": _ensure_list(m.get("tags")),
+        "skill": m.get("agent_id") or None,
+        "schedule": m.get("schedule"),
+        "scheduledAt": _iso_or_none(m.get("scheduled_at")),
+        "scheduleParentId": (
+            str(m["schedule_parent_id"]) if m.get("schedule_parent_id") is not None else None
+        ),
+        "references": refs,
+        "blockedBy": blocked_by,
+        "blocks": blocks,
+        "startedAt": _iso_or_none(m.get("started_at")),
+        "completedAt": _iso_or_none(m.get("completed_at")),
+        "result": m.get("result"),
+        "error": m.get("error"),
+        "proof": m.get("proof"),
+        "pickedUp": bool(m.get("picked_up")),
+        "claimedBy": m.get("claimed_by"),
+        "claimedAt": _iso_or_none(m.get("claimed_at")),
+        "leaseExpiresAt": _iso_or_none(m.get("lease_expires_at")),
+        "createdAt": _iso_or_none(m.get("created_at")),
+        "updatedAt": _iso_or_none(m.get("updated_at")),
+        "estimatedHours": m.get("estimated_hours"),
+        "actualHours": m.get("actual_hours"),
+        "slug": m.get("slug"),
+    }
+
+
+def _row_to_task(row) -> Task:
+    """Convert a SQLAlchemy Row mapping to a Task API model."""
+    return Task(**_task_values(row._mapping))
+
+
+def _pack_cursor(values: list) -> str:
+    raw = json.dumps(values)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _unpack_cursor(cursor: str) -> list:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded))
+
+
+def _task_activity(
+    action: str, task_id: str, name: str | None = None, actor: str = "user"
+) -> ActivityLogRequest:
+    return ActivityLogRequest(
+        actor=actor,
+        action=action,
+        resource_type="task",
+        resource_id=task_id,
+        resource_name=name,
+        module="tasks",
     )
 
 
-# ---------------------------------------------------------------------------
-# CRUD operations
-# ---------------------------------------------------------------------------
+async def _emit_task(
+    session, topic: str, task: Task, activity: ActivityLogRequest | None = None
+) -> None:
+    """Queue a task broadcast (and activity event) in the caller's transaction."""
+    await enqueue(session, topic, task.model_dump(mode="json"), activity)
 
 
-async def list_tasks(
+def _encode_cursor(m) -> str:
+    """Opaque keyset cursor for the (priority, created_at, id) list ordering."""
+    return _pack_cursor([m["priority"], m["created_at"].isoformat(), m["id"]])
+
+
+def _decode_cursor(cursor: str) -> tuple[int, datetime, int]:
+    try:
+        priority, created_at, task_id = _unpack_cursor(cursor)
+        return int(priority), datetime.fromisoformat(created_at), int(task_id)
+    except (ValueError, TypeError, binascii.Error) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def _encode_search_cursor(m) -> str:
+    """Opaque keyset cursor for the (rank DESC, id DESC) search ordering."""
+    return _pack_cursor([m["rank"], m["id"]])
+
+
+def _decode_search_cursor(cursor: str) -> tuple[float, int]:
+    try:
+        rank, task_id = _unpack_cursor(cursor)
+        return float(rank), int(task_id)
+    except (ValueError, TypeError, binascii.Error) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def _task_filters(
     project: str | None = None,
     priority: str | None = None,
     tags: str | None = None,
     status: str | None = None,
-) -> list[Task]:
-    """List tasks with optional filters."""
+) -> tuple[list[str], dict]:
+    """Build WHERE conditions and params for the shared task list filters."""
     conditions: list[str] = []
     params: dict = {}
 
@@ -154,25 +311,369 @@ async def list_tasks(
             conditions.append("tags && :tags")
             params["tags"] = tag_list
 
+    return conditions, params
+
+
+async def _task_counts(session, task_ids: list[int]) -> dict[str, dict]:
+    """Comment count and latest comment/activity times for many tasks in one query.
+
+    Keyed by API task id; every requested id is present, with zero counts
+    for tasks that have no comments or activity.
+    """
+    if not task_ids:
+        return {}
+    result = await session.execute(
+        text("""
+            SELECT i.id, COALESCE(c.n, 0) AS comment_count,
+                c.last_at AS last_comment_at, a.last_at AS last_activity_at
+            FROM unnest(CAST(:ids AS int[])) AS i (id)
+            LEFT JOIN (
+                SELECT task_id, count(*) AS n, max(created_at) AS last_at
+                FROM mc_comments WHERE task_id = ANY(:ids)
+                GROUP BY task_id
+            ) c ON c.task_id = i.id
+            LEFT JOIN (
+                SELECT task_id, max(created_at) AS last_at
+                FROM mc_activity WHERE task_id = ANY(:ids)
+                GROUP BY task_id
+            ) a ON a.task_id = i.id
+        """),
+        {"ids": task_ids},
+    )
+    return {
+        str(row.id): {
+            "commentCount": row.comment_count,
+            "lastCommentAt": _iso_or_none(row.last_comment_at),
+            "lastActivityAt": _iso_or_none(row.last_activity_at),
+        }
+        for row in result.all()
+    }
+
+
+# ---------------------------------------------------------------------------
+# CRUD operations
+# ---------------------------------------------------------------------------
+
+
+async def list_tasks(
+    project: str | None = None,
+    priority: str | None = None,
+    tags: str | None = None,
+    status: str | None = None,
+    include_archived: bool = False,
+) -> list[TaskListItem]:
+    """List tasks with optional filters, each with its comment/activity counts.
+
+    With `include_archived`, archived tasks are listed too.
+    """
+    conditions, params = _task_filters(project, priority, tags, status)
     where = ("WHERE " + " AND ".join(conditions)) if conditions else ""
 
     async with async_session() as session:
         result = await session.execute(
             text(f"""
-                SELECT * FROM mc_tasks
+                SELECT * FROM {"mc_tasks_all" if include_archived else "mc_tasks"}
                 {where}
                 ORDER BY priority ASC, created_at DESC
             """),
             params,
         )
-        return [_row_to_task(row) for row in result.all()]
+        rows = result.all()
+        counts = await _task_counts(session, [row._mapping["id"] for row in rows])
+    items = []
+    for row in rows:
+        values = _task_values(row._mapping)
+        items.append(TaskListItem(**values, **counts.get(values["id"], {})))
+    return items
 
 
-async def get_task(task_id: int) -> Task | None:
-    """Fetch a single task by integer ID."""
+def _projection(fields: list[str] | None, *required: str) -> tuple[str, bool]:
+    """SELECT list backing a field projection, and whether badge counts are needed.
+
+    id/priority/created_at are always read so a page can build its cursor.
+    """
+    if fields is None:
+        return "*", True
+    unknown = [f for f in fields if f not in TASK_FIELD_COLUMNS and f not in TASK_COUNT_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    columns = {"id", "priority", "created_at", *required} | {
+        TASK_FIELD_COLUMNS[f] for f in fields if f in TASK_FIELD_COLUMNS
+    }
+    return ", ".join(sorted(columns)), any(f in TASK_COUNT_FIELDS for f in fields)
+
+
+def _page_items(rows, fields: list[str] | None, counts: dict[str, dict]) -> list[dict]:
+    """API items for a page of rows, projected to `fields` with badge counts merged in."""
+    items = []
+    for row in rows:
+        m = row._mapping
+        extra = counts.get(str(m["id"]), {})
+        if fields is None:
+            items.append({**_row_to_task(row).model_dump(), **extra})
+        else:
+            values = {**_task_values(m), **extra}
+            items.append({f: v for f, v in values.items() if f in fields})
+    return items
+
+
+async def list_tasks_page(
+    project: str | None = None,
+    priority: str | None = None,
+    tags: str | None = None,
+    status: str | None = None,
+    limit: int = 100,
+    cursor: str | None = None,
+    fields: list[str] | None = None,
+    include_archived: bool = False,
+) -> TaskPage:
+    """One keyset page of tasks, optionally projected to a subset of API fields.
+
+    Ordered by (priority ASC, created_at DESC, id DESC); `cursor` is the
+    `next_cursor` of the previous page. Only the columns backing `fields`
+    are read, so card views never load description/result/proof. With
+    `include_archived`, archived tasks are paged too.
+    """
+    conditions, params = _task_filters(project, priority, tags, status)
+    select, with_counts = _projection(fields)
+
+    if cursor:
+        c_priority, c_created_at, c_id = _decode_cursor(cursor)
+        conditions.append(
+            "(priority > :c_priority OR (priority = :c_priority"
+            " AND (created_at, id) < (:c_created_at, :c_id)))"
+        )
+        params.update(c_priority=c_priority, c_created_at=c_created_at, c_id=c_id)
+
+    where = ("WHERE " + " AND ".join(conditions)) if conditions else ""
+    params["limit"] = limit + 1
+
+    async with async_session() as session:
+        result = await session.execute(
+            text(f"""
+                SELECT {select} FROM {"mc_tasks_all" if include_archived else "mc_tasks"}
+                {where}
+                ORDER BY priority ASC, created_at DESC, id DESC
+                LIMIT :limit
+            """),
+            params,
+        )
+        rows = result.all()
+        next_cursor = _encode_cursor(rows[limit - 1]._mapping) if len(rows) > limit else None
+        rows = rows[:limit]
+        counts = {}
+        if with_counts:
+            counts = await _task_counts(session, [row._mapping["id"] for row in rows])
+
+    return TaskPage(items=_page_items(rows, fields, counts), next_cursor=next_cursor)
+
+
+def export_tasks(
+    fmt: ExportFormat = "ndjson",
+    project: str | None = None,
+    priority: str | None = None,
+    tags: str | None = None,
+    status: str | None = None,
+    include_archived: bool = False,
+) -> AsyncIterator[bytes]:
+    """Every task matching the list filters, in list order, as streamed NDJSON/CSV chunks.
+
+    Rows carry the Task API fields; badge counts are left out, as they
+    would cost a lookup per chunk. With `include_archived`, archived tasks
+    are exported too.
+    """
+    conditions, params = _task_filters(project, priority, tags, status)
+    where = ("WHERE " + " AND ".join(conditions)) if conditions else ""
+    return stream_query(
+        f"""
+            SELECT * FROM {"mc_tasks_all" if include_archived else "mc_tasks"}
+            {where}
+            ORDER BY priority ASC, created_at DESC, id DESC
+        """,
+        params,
+        fmt,
+        transform=_task_values,
+    )
+
+
+async def get_board(
+    project: str | None = None,
+    priority: str | None = None,
+    tags: str | None = None,
+    limit: int = 20,
+    fields: list[str] | None = None,
+    include_archived: bool = False,
+) -> TaskBoard:
+    """Kanban board: every status column with its total and its first `limit` cards.
+
+    Cards are ranked per column with ROW_NUMBER() OVER (PARTITION BY state)
+    in list order, so a column's `next_cursor` continues it through
+    list_tasks_page with `status` and the same `include_archived` set.
+    Totals come from the mc_task_counters rollup, less its archived share
+    unless `include_archived` is set, so they match what the cards can
+    page through; a priority or tag filter forces a count instead.
+    """
+    conditions, params = _task_filters(project, priority, tags)
+    select, with_counts = _projection(fields, "state")
+    where = ("WHERE " + " AND ".join(conditions)) if conditions else ""
+    source = "mc_tasks_all" if include_archived else "mc_tasks"
+
+    if "priority" in params or "tags" in params:
+        totals_sql = f"SELECT state, count(*) AS n FROM {source} {where} GROUP BY state"
+    else:
+        rollup_where = "WHERE project = :project" if project else ""
+        archived = (
+            ""
+            if include_archived
+            else f"UNION ALL SELECT state, -n FROM mc_task_archive_counters {rollup_where}"
+        )
+        totals_sql = f"""
+            SELECT state, SUM(n)::bigint AS n
+            FROM (SELECT state, n FROM mc_task_counters {rollup_where} {archived}) counts
+            GROUP BY state
+        """
+
+    async with async_session() as session:
+        totals = await session.execute(text(totals_sql), params)
+        total_by_state = {row.state: row.n for row in totals.all()}
+        result = await session.execute(
+            text(f"""
+                SELECT * FROM (
+                    SELECT {select}, ROW_NUMBER() OVER (
+                        PARTITION BY state ORDER BY priority ASC, created_at DESC, id DESC
+                    ) AS board_rank
+                    FROM {source}
+                    {where}
+                ) ranked
+                WHERE board_rank <= :limit
+                ORDER BY state, board_rank
+            """),
+            {**params, "limit": limit + 1},
+        )
+        by_state: dict[str, list] = {}
+        for row in result.all():
+            by_state.setdefault(row._mapping["state"], []).append(row)
+        counts = {}
+        if with_counts:
+            counts = await _task_counts(
+                session,
+                [row._mapping["id"] for rows in by_state.values() for row in rows[:limit]],
+            )
+
+    columns = []
+    for status in get_args(TaskStatus):
+        state = status_to_state(status)
+        rows = by_state.get(state, [])
+        next_cursor = _encode_cursor(rows[limit - 1]._mapping) if len(rows) > limit else None
+        columns.append(
+            BoardColumn(
+                status=status,
+                total=max(total_by_state.get(state, 0), len(rows[:limit])),
+                items=_page_items(rows[:limit], fields, counts),
+                next_cursor=next_cursor,
+            )
+        )
+    return TaskBoard(columns=columns)
+
+
+async def get_task_counts(task_ids: list[int]) -> list[TaskCounts]:
+    """Comment/activity badge counts for the given tasks, in request order."""
+    async with async_session() as session:
+        counts = await _task_counts(session, task_ids)
+    return [TaskCounts(id=str(i), **counts.get(str(i), {})) for i in task_ids]
+
+
+# Highlight options: whole title with every match marked; up to two short
+# fragments from description/result for the snippet
+_HEADLINE_TITLE = "StartSel=<mark>, StopSel=</mark>, HighlightAll=true"
+_HEADLINE_SNIPPET = (
+    "StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=20, MinWords=5,"
+    " FragmentDelimiter=\" … \""
+)
+
+
+async def search_tasks(
+    q: str,
+    project: str | None = None,
+    priority: str | None = None,
+    tags: str | None = None,
+    status: str | None = None,
+    limit: int = 50,
+    cursor: str | None = None,
+    include_archived: bool = False,
+) -> TaskSearchPage:
+    """Ranked full-text search over title, tags, description and result.
+
+    Matches come from the GIN-indexed `search_vector` column; `q` uses web
+    search syntax ("quoted phrases", -exclusions, or). Pages are keyed on
+    (rank, id), and headlines are only built for the rows on the page.
+    With `include_archived`, archived tasks are searched too.
+    """
+    conditions, params = _task_filters(project, priority, tags, status)
+    conditions.insert(0, "search_vector @@ websearch_to_tsquery('english', :q)")
+    params["q"] = q
+
+    page_conditions: list[str] = []
+    if cursor:
+        c_rank, c_id = _decode_search_cursor(cursor)
+        page_conditions.append("(rank < :c_rank OR (rank = :c_rank AND id < :c_id))")
+        params.update(c_rank=c_rank, c_id=c_id)
+    page_where = ("WHERE " + " AND ".join(page_conditions)) if page_conditions else ""
+    params.update(
+        limit=limit + 1, headline_title=_HEADLINE_TITLE, headline_snippet=_HEADLINE_SNIPPET
+    )
+
+    async with async_session() as session:
+        result = await session.execute(
+            text(f"""
+                WITH hits AS (
+                    SELECT *,
+                        ts_rank_cd(search_vector, websearch_to_tsquery('english', :q))::float8
+                            AS rank
+                    FROM {"mc_tasks_all" if include_archived else "mc_tasks"}
+                    WHERE {" AND ".join(conditions)}
+                ),
+                page AS (
+                    SELECT * FROM hits
+                    {page_where}
+                    ORDER BY rank DESC, id DESC
+                    LIMIT :limit
+                )
+                SELECT page.*,
+                    ts_headline('english', coalesce(title, ''),
+                        websearch_to_tsquery('english', :q), :headline_title) AS title_highlight,
+                    ts_headline('english', concat_ws(' ', description, result),
+                        websearch_to_tsquery('english', :q), :headline_snippet) AS snippet
+                FROM page
+                ORDER BY rank DESC, id DESC
+            """),
+            params,
+        )
+        rows = result.all()
+
+    next_cursor = _encode_search_cursor(rows[limit - 1]._mapping) if len(rows) > limit else None
+    items = [
+        TaskSearchHit(
+            task=_row_to_task(row),
+            rank=row._mapping["rank"],
+            titleHighlight=row._mapping["title_highlight"],
+            snippet=row._mapping["snippet"] or "",
+        )
+        for row in rows[:limit]
+    ]
+    return TaskSearchPage(items=items, next_cursor=next_cursor)
+
+
+async def get_task(task_id: int, include_archived: bool = True) -> Task | None:
+    """Fetch a single task by integer ID, falling through to the archive unless told not to.
+
+    The view's UNION ALL runs in order under LIMIT 1, so the archive is only
+    probed when the hot table misses.
+    """
+    source = "mc_tasks_all" if include_archived else "mc_tasks"
     async with async_session() as session:
         result = await session.execute(
-            text("SELECT * FROM mc_tasks WHERE id = :id"),
+            text(f"SELECT * FROM {source} WHERE id = :id LIMIT 1"),
             {"id": task_id},
         )
         row = result.first()
@@ -191,14 +692,13 @@ async def create_task(payload: TaskCreate) -> Task:
     if state not in VALID_STATES:
         raise ValueError(f"Invalid status: {payload.status}")
 
+    _validate_schedule(payload.schedule)
+
     # Generate slug
     slug = _generate_slug(payload.title)
 
     agent_id = payload.skill or ""
 
-    # Convert blockedBy strings to text[] for Postgres
-    blocked_by = payload.blockedBy or []
-
     # Convert scheduledAt string to timestamptz or None
     scheduled_at = None
     if payload.scheduledAt:
@@ -207,175 +707,899 @@ async def create_task(payload: TaskCreate) -> Task:
         except (ValueError, TypeError):
             scheduled_at = None
 
-    async with async_session() as session:
-        # Handle slug uniqueness — retry with random suffix on conflict
+    async with _write_errors(), _dependency_guard(), async_session() as session:
+        blocked_by = await _open_task_ids(
+            session, _dependency_ids(payload.blockedBy or [], "blockedBy"), "blockedBy"
+        )
+
+        # The insert doubles as the slug uniqueness check; a taken slug returns
+        # no row and is retried with a random suffix
+        params = {
+            "title": payload.title,
+            "description": payload.description or "",
+            "agent_id": agent_id,
+            "created_by": "user",
+            "state": state,
+            "priority": priority_int,
+            "type": payload.type or "feature",
+            "tags": payload.tags or [],
+            "project": payload.project,
+            "schedule": payload.schedule,
+            "scheduled_at": scheduled_at,
+            "blocked_by": blocked_by,
+            "estimated_hours": payload.estimatedHours,
+        }
         for _attempt in range(5):
-            check = await session.execute(
-                text("SELECT id FROM mc_tasks WHERE slug = :slug"),
-                {"slug": slug},
+            result = await session.execute(
+                text("""
+                    INSERT INTO mc_tasks (
+                        title, description, agent_id, created_by, state, priority,
+                        type, tags, slug, project, schedule, scheduled_at,
+                        blocked_by, estimated_hours
+                    ) VALUES (
+                        :title, :description, :agent_id, :created_by, :state, :priority,
+                        :type, :tags, :slug, :project, :schedule, :scheduled_at,
+                        :blocked_by, :estimated_hours
+                    )
+                    ON CONFLICT (slug) DO NOTHING
+                    RETURNING *
+                """),
+                {**params, "slug": slug},
             )
-            if check.first() is None:
+            row = result.first()
+            if row is not None:
                 break
             slug = f"{_generate_slug(payload.title, max_len=42)}-{secrets.token_hex(3)}"
+        else:
+            raise ValueError(f"Could not allocate a unique slug for {payload.title!r}")
+        task = _row_to_task(row)
+        if blocked_by and state != "done":
+            dependency_index.set_blockers(task.id, blocked_by)
+            await _emit_updated(session, await _persist_edges(session, set(blocked_by)))
+        await _emit_task(
+            session, "tasks:task:created", task, _task_activity("task.created", task.id, task.title)
+        )
+        await session.commit()
+        return task
+
+
+async def update_task(task_id: int, payload: TaskUpdate) -> Task | None:
+    """Update an existing task. Returns None if not found."""
+    updates = payload.model_dump(exclude_none=True)
+    if not updates:
+        return await get_task(task_id)
 
+    node = str(task_id)
+    set_parts: list[str] = []
+    edges_changed: set[str] = set()
+    completing = False
+    params: dict = {"id": task_id}
+
+    for key, value in updates.items():
+        if key == "priority":
+            pri_int = PRIORITY_STR_TO_INT.get(value)
+            if pri_int is None:
+                raise ValueError(f"Invalid priority: {value}")
+            set_parts.append("priority = :priority")
+            params["priority"] = pri_int
+        elif key == "status":
+            state = status_to_state(value)
+            if state not in VALID_STATES:
+                raise ValueError(f"Invalid status: {value}")
+            set_parts.append("state = :state")
+            params["state"] = state
+            completing = state == "done"
+            if state != "in_progress":
+                set_parts.extend(f"{col} = NULL" for col in _CLAIM_COLUMNS)
+        elif key == "skill":
+            set_parts.append("agent_id = :agent_id")
+            params["agent_id"] = value or ""
+        elif key == "scheduledAt":
+            scheduled_at = None
+            if value:
+                try:
+                    scheduled_at = datetime.fromisoformat(value)
+                except (ValueError, TypeError):
+                    scheduled_at = None
+            set_parts.append("scheduled_at = :scheduled_at")
+            params["scheduled_at"] = scheduled_at
+        elif key == "startedAt":
+            started_at = None
+            if value:
+                try:
+                    started_at = datetime.fromisoformat(value)
+                except (ValueError, TypeError):
+                    started_at = None
+            set_parts.append("started_at = :started_at")
+            params["started_at"] = started_at
+        elif key == "completedAt":
+            completed_at = None
+            if value:
+                try:
+                    completed_at = datetime.fromisoformat(value)
+                except (ValueError, TypeError):
+                    completed_at = None
+            set_parts.append("completed_at = :completed_at")
+            params["completed_at"] = completed_at
+        elif key == "schedule":
+            _validate_schedule(value)
+            set_parts.append("schedule = :schedule")
+            params["schedule"] = value or None
+        elif key in ("tags",):
+            set_parts.append("tags = :tags")
+            params["tags"] = value or []
+        elif key in ("title", "description", "project", "result", "error", "type"):
+            set_parts.append(f"{key} = :{key}")
+            params[key] = value
+        elif key == "estimatedHours":
+            set_parts.append("estimated_hours = :estimated_hours")
+            params["estimated_hours"] = value
+        elif key == "actualHours":
+            set_parts.append("actual_hours = :actual_hours")
+            params["actual_hours"] = value
+
+    if completing and "completedAt" not in updates:
+        set_parts.append("completed_at = COALESCE(completed_at, now())")
+
+    # The UPDATE doubles as the existence check; edges are written only once
+    # the row is known to be there
+    set_parts.append("updated_at = now()")
+    set_clause = ", ".join(set_parts)
+    async with _write_errors(), _dependency_guard(), async_session() as session:
+        result = await session.execute(
+            text(f"UPDATE mc_tasks SET {set_clause} WHERE id = :id RETURNING *"),
+            params,
+        )
+        row = result.first()
+        if row is None:
+            return None
+
+        # Edges go through the index in both directions, blockers first so a
+        # blocks list that contradicts them is caught as a cycle
+        if payload.blockedBy is not None:
+            edges_changed |= await _set_blockers(session, node, payload.blockedBy)
+        if payload.blocks is not None:
+            edges_changed |= await _set_dependents(session, node, payload.blocks)
+        if completing:
+            edges_changed |= dependency_index.complete(node)
+
+        neighbours = await _persist_edges(session, edges_changed)
+        task = next((t for t in neighbours if t.id == node), None) or _row_to_task(row)
+        await _emit_updated(session, neighbours, skip=node)
+        await _emit_task(
+            session, "tasks:task:updated", task, _task_activity("task.updated", task.id, task.title)
+        )
+        await session.commit()
+        return task
+
+
+async def delete_task(task_id: int) -> bool:
+    """Delete a task with its comments and activity. Returns True if deleted, False if not found.
+
+    The task may be in either tier. The archive dropped the foreign keys
+    that used to cascade comments and activity, so they are deleted in the
+    same statement.
+    """
+    async with _dependency_guard(), async_session() as session:
         result = await session.execute(
             text("""
-                INSERT INTO mc_tasks (
-                    title, description, agent_id, created_by, state, priority,
-                    type, tags, slug, project, schedule, scheduled_at,
-                    blocked_by, estimated_hours
-                ) VALUES (
-                    :title, :description, :agent_id, :created_by, :state, :priority,
-                    :type, :tags, :slug, :project, :schedule, :scheduled_at,
-                    :blocked_by, :estimated_hours
+                WITH hot AS (
+                    DELETE FROM mc_tasks WHERE id = :id RETURNING id
+                ),
+                archived AS (
+                    DELETE FROM mc_tasks_archive WHERE id = :id RETURNING id
+                ),
+                deleted AS (
+                    SELECT id FROM hot UNION SELECT id FROM archived
+                ),
+                comments AS (
+                    DELETE FROM mc_comments WHERE task_id IN (SELECT id FROM deleted)
+                ),
+                activity AS (
+                    DELETE FROM mc_activity WHERE task_id IN (SELECT id FROM deleted)
                 )
+                SELECT id FROM deleted
+            """),
+            {"id": task_id},
+        )
+        if result.first() is None:
+            return False
+        await _emit_updated(
+            session, await _persist_edges(session, dependency_index.discard(str(task_id)))
+        )
+        await enqueue(
+            session,
+            "tasks:task:deleted",
+            {"id": str(task_id)},
+            _task_activity("task.deleted", str(task_id)),
+        )
+        await session.commit()
+        return True
+
+
+async def run_task(task_id: int) -> Task | None:
+    """Mark a task as in-progress (the /run endpoint)."""
+    async with async_session() as session:
+        result = await session.execute(
+            text("""
+                UPDATE mc_tasks
+                SET state = 'in_progress',
+                    started_at = COALESCE(started_at, now()),
+                    updated_at = now()
+                WHERE id = :id
                 RETURNING *
             """),
-            {
-                "title": payload.title,
-                "description": payload.description or "",
-                "agent_id": agent_id,
-                "created_by": "user",
-                "state": state,
-                "priority": priority_int,
-                "type": payload.type or "feature",
-                "tags": payload.tags or [],
-                "slug": slug,
-                "project": payload.project,
-                "schedule": payload.schedule,
-                "scheduled_at": scheduled_at,
-                "blocked_by": blocked_by,
-                "estimated_hours": payload.estimatedHours,
-            },
+            {"id": task_id},
         )
         row = result.first()
+        if row is None:
+            return None
+        task = _row_to_task(row)
+        await _emit_task(session, "tasks:task:updated", task)
         await session.commit()
-        return _row_to_task(row)
+        return task
 
 
-async def update_task(task_id: int, payload: TaskUpdate) -> Task | None:
-    """Update an existing task. Returns None if not found."""
-    updates = payload.model_dump(exclude_none=True)
-    if not updates:
-        return await get_task(task_id)
+# ---------------------------------------------------------------------------
+# Bulk operations
+# ---------------------------------------------------------------------------
+
+
+def _parse_iso(value: str | None) -> datetime | None:
+    """Parse an ISO timestamp from the API, treating empty or malformed input as None."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def _json_default(obj):
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Not JSON serialisable: {type(obj).__name__}")
+
+
+def _recordset(rows: list[dict]) -> str:
+    """Serialise rows for jsonb_to_recordset() — one bind parameter for the whole batch."""
+    return json.dumps(rows, default=_json_default)
+
+
+async def _resolve_slugs(session, titles: list[str]) -> list[str]:
+    """Pick a unique slug per title with one lookup per collision round, not per task."""
+    slugs = [_generate_slug(t) for t in titles]
+    pending = set(range(len(slugs)))
+    while pending:
+        result = await session.execute(
+            text("SELECT slug FROM mc_tasks WHERE slug = ANY(:slugs)"),
+            {"slugs": [slugs[i] for i in pending]},
+        )
+        taken = {row._mapping["slug"] for row in result.all()}
+        settled = {slug for i, slug in enumerate(slugs) if i not in pending}
+        retry: set[int] = set()
+        for i in sorted(pending):
+            if slugs[i] in taken or slugs[i] in settled:
+                slugs[i] = f"{_generate_slug(titles[i], max_len=42)}-{secrets.token_hex(3)}"
+                retry.add(i)
+            else:
+                settled.add(slugs[i])
+        pending = retry
+    return slugs
+
+
+def _bulk_create_row(payload: TaskCreate, slug: str, blocked_by: list[str]) -> dict:
+    priority_int = PRIORITY_STR_TO_INT.get(payload.priority)
+    if priority_int is None:
+        raise ValueError(f"Invalid priority: {payload.priority}")
+    state = status_to_state(payload.status)
+    if state not in VALID_STATES:
+        raise ValueError(f"Invalid status: {payload.status}")
+    _validate_schedule(payload.schedule)
+    return {
+        "title": payload.title,
+        "description": payload.description or "",
+        "agent_id": payload.skill or "",
+        "state": state,
+        "priority": priority_int,
+        "type": payload.type or "feature",
+        "tags": payload.tags or [],
+        "slug": slug,
+        "project": payload.project,
+        "schedule": payload.schedule,
+        "scheduled_at": _parse_iso(payload.scheduledAt),
+        "blocked_by": blocked_by,
+        "estimated_hours": payload.estimatedHours,
+    }
+
+
+def _bulk_update_row(task_id: int, changes: TaskUpdate) -> dict:
+    """Row for the bulk UPDATE — None means "leave unchanged", matching update_task.
+
+    blockedBy/blocks are not columns here; bulk_apply routes them through the
+    dependency index.
+    """
+    priority_int = None
+    if changes.priority is not None:
+        priority_int = PRIORITY_STR_TO_INT.get(changes.priority)
+        if priority_int is None:
+            raise ValueError(f"Invalid priority: {changes.priority}")
+    state = None
+    if changes.status is not None:
+        state = status_to_state(changes.status)
+        if state not in VALID_STATES:
+            raise ValueError(f"Invalid status: {changes.status}")
+    _validate_schedule(changes.schedule)
+    # Empty strings clear these columns, as in update_task; None leaves them alone
+    cleared = {
+        column: getattr(changes, field)
+        for field, column in (
+            ("schedule", "schedule"),
+            ("scheduledAt", "scheduled_at"),
+            ("startedAt", "started_at"),
+            ("completedAt", "completed_at"),
+        )
+    }
+    return {
+        "id": task_id,
+        "clear": [column for column, value in cleared.items() if value is not None and not value],
+        "title": changes.title,
+        "description": changes.description,
+        "priority": priority_int,
+        "state": state,
+        "type": changes.type,
+        "project": changes.project,
+        "tags": changes.tags,
+        "agent_id": changes.skill,
+        "schedule": changes.schedule or None,
+        "scheduled_at": _parse_iso(changes.scheduledAt),
+        "result": changes.result,
+        "error": changes.error,
+        "started_at": _parse_iso(changes.startedAt),
+        "completed_at": _parse_iso(changes.completedAt),
+        "estimated_hours": changes.estimatedHours,
+        "actual_hours": changes.actualHours,
+    }
+
+
+def _text_array(col: str) -> str:
+    """jsonb array column from a recordset -> text[] (NULL stays NULL)."""
+    return (
+        f"CASE WHEN r.{col} IS NULL THEN NULL"
+        f" ELSE ARRAY(SELECT jsonb_array_elements_text(r.{col})) END"
+    )
+
+
+def _cleared(col: str) -> str:
+    """Bulk UPDATE value for a clearable column: NULL if listed in r.clear, else as update_task."""
+    return f"CASE WHEN r.clear @> '[\"{col}\"]' THEN NULL ELSE COALESCE(r.{col}, t.{col}) END"
+
+
+async def bulk_apply(payload: TaskBulkRequest) -> TaskBulkResult:
+    """Apply a batch of create/update/transition operations in one transaction.
+
+    Each phase is a single set-based statement over jsonb_to_recordset(), so
+    500 creates cost one slug lookup round and one INSERT rather than 500
+    request cycles. Any invalid operation, unknown id or dependency cycle
+    rolls back the batch. Tasks unblocked by transitions to done are returned
+    in `updated` alongside the tasks the batch touched directly. The batch
+    queues a single tasks:task:bulk broadcast and one summary activity event.
+    """
+    creates = [op.task for op in payload.operations if isinstance(op, TaskBulkCreate)]
+    updates = [op for op in payload.operations if isinstance(op, TaskBulkUpdate)]
+    transitions = [op for op in payload.operations if isinstance(op, TaskBulkTransition)]
+
+    for label, ops in (("update", updates), ("transition", transitions)):
+        ids = [op.id for op in ops]
+        if len(ids) != len(set(ids)):
+            raise ValueError(f"Duplicate task ids in bulk {label} operations")
+
+    transition_rows = []
+    for op in transitions:
+        state = status_to_state(op.status)
+        if state not in VALID_STATES:
+            raise ValueError(f"Invalid status: {op.status}")
+        transition_rows.append({"id": op.id, "state": state})
+    update_rows = [_bulk_update_row(op.id, op.changes) for op in updates]
+
+    created: list[Task] = []
+    updated: dict[str, Task] = {}
+
+    edges_changed: set[str] = set()
+
+    async with _write_errors(), _dependency_guard(), async_session() as session:
+        if creates:
+            slugs = await _resolve_slugs(session, [c.title for c in creates])
+            wanted = [_dependency_ids(c.blockedBy or [], "blockedBy") for c in creates]
+            open_ids = set(
+                await _open_task_ids(
+                    session, sorted_ids({i for ids in wanted for i in ids}), "blockedBy"
+                )
+            )
+            blockers = [[i for i in ids if i in open_ids] for ids in wanted]
+            rows = [
+                {**_bulk_create_row(c, slug, b), "ord": i}
+                for i, (c, slug, b) in enumerate(zip(creates, slugs, blockers))
+            ]
+            # Slugs taken by a concurrent create since _resolve_slugs are skipped by
+            # ON CONFLICT and retried with a random suffix, as in create_task
+            by_slug: dict[str, Task] = {}
+            for _attempt in range(5):
+                result = await session.execute(
+                    text(f"""
+                        INSERT INTO mc_tasks (
+                            title, description, agent_id, created_by, state, priority,
+                            type, tags, slug, project, schedule, scheduled_at,
+                            blocked_by, estimated_hours
+                        )
+                        SELECT
+                            r.title, r.description, r.agent_id, 'user', r.state, r.priority,
+                            r.type, {_text_array("tags")}, r.slug, r.project, r.schedule,
+                            r.scheduled_at, {_text_array("blocked_by")}, r.estimated_hours
+                        FROM jsonb_to_recordset(CAST(:rows AS jsonb)) AS r(
+                            ord int, title text, description text, agent_id text, state text,
+                            priority int, type text, tags jsonb, slug text, project text,
+                            schedule text, scheduled_at timestamptz, blocked_by jsonb,
+                            estimated_hours float8
+                        )
+                        ORDER BY r.ord
+                        ON CONFLICT (slug) DO NOTHING
+                        RETURNING *
+                    """),
+                    {"rows": _recordset(rows)},
+                )
+                by_slug.update((row._mapping["slug"], _row_to_task(row)) for row in result.all())
+                rows = [r for r in rows if r["slug"] not in by_slug]
+                if not rows:
+                    break
+                for r in rows:
+                    title = creates[r["ord"]].title
+                    r["slug"] = slugs[r["ord"]] = (
+                        f"{_generate_slug(title, max_len=42)}-{secrets.token_hex(3)}"
+                    )
+            else:
+                raise ValueError(
+                    f"Could not allocate a unique slug for {creates[rows[0]['ord']].title!r}"
+                )
+            created = [by_slug[slug] for slug in slugs]
+            for task, b in zip(created, blockers):
+                if b and task.status != "done":
+                    dependency_index.set_blockers(task.id, b)
+                    edges_changed |= set(b)
+
+        if update_rows:
+            result = await session.execute(
+                text(f"""
+                    UPDATE mc_tasks t SET
+                        title = COALESCE(r.title, t.title),
+                        description = COALESCE(r.description, t.description),
+                        priority = COALESCE(r.priority, t.priority),
+                        state = COALESCE(r.state, t.state),
+                        {_end_claim_unless_in_progress("r.state")},
+                        type = COALESCE(r.type, t.type),
+                        project = COALESCE(r.project, t.project),
+                        tags = COALESCE({_text_array("tags")}, t.tags),
+                        agent_id = COALESCE(r.agent_id, t.agent_id),
+                        schedule = {_cleared("schedule")},
+                        scheduled_at = {_cleared("scheduled_at")},
+                        result = COALESCE(r.result, t.result),
+                        error = COALESCE(r.error, t.error),
+                        started_at = {_cleared("started_at")},
+                        completed_at = CASE
+                            WHEN r.clear @> '["completed_at"]' THEN NULL
+                            WHEN r.completed_at IS NOT NULL THEN r.completed_at
+                            WHEN r.state = 'done' THEN COALESCE(t.completed_at, now())
+                            ELSE t.completed_at
+                        END,
+                        estimated_hours = COALESCE(r.estimated_hours, t.estimated_hours),
+                        actual_hours = COALESCE(r.actual_hours, t.actual_hours),
+                        updated_at = now()
+                    FROM jsonb_to_recordset(CAST(:rows AS jsonb)) AS r(
+                        id int, clear jsonb, title text, description text, priority int, state text,
+                        type text, project text, tags jsonb, agent_id text, schedule text,
+                        scheduled_at timestamptz, result text, error text, started_at timestamptz,
+                        completed_at timestamptz, estimated_hours float8, actual_hours float8
+                    )
+                    WHERE t.id = r.id
+                    RETURNING t.*
+                """),
+                {"rows": _recordset(update_rows)},
+            )
+            updated.update({t.id: t for t in map(_row_to_task, result.all())})
+            missing = sorted({str(r["id"]) for r in update_rows} - set(updated))
+            if missing:
+                await session.rollback()
+                raise ValueError(f"Tasks not found: {', '.join(missing)}")
+            for op in updates:
+                if op.changes.blockedBy is not None:
+                    edges_changed |= await _set_blockers(session, str(op.id), op.changes.blockedBy)
+                if op.changes.blocks is not None:
+                    edges_changed |= await _set_dependents(session, str(op.id), op.changes.blocks)
+
+        if transition_rows:
+            result = await session.execute(
+                text(f"""
+                    UPDATE mc_tasks t SET
+                        state = r.state,
+                        {_end_claim_unless_in_progress("r.state")},
+                        started_at = CASE WHEN r.state = 'in_progress'
+                            THEN COALESCE(t.started_at, now()) ELSE t.started_at END,
+                        completed_at = CASE WHEN r.state = 'done'
+                            THEN COALESCE(t.completed_at, now()) ELSE t.completed_at END,
+                        updated_at = now()
+                    FROM jsonb_to_recordset(CAST(:rows AS jsonb)) AS r(id int, state text)
+                    WHERE t.id = r.id
+                    RETURNING t.*
+                """),
+                {"rows": _recordset(transition_rows)},
+            )
+            moved = {t.id: t for t in map(_row_to_task, result.all())}
+            missing = sorted({str(r["id"]) for r in transition_rows} - set(moved))
+            if missing:
+                await session.rollback()
+                raise ValueError(f"Tasks not found: {', '.join(missing)}")
+            updated.update(moved)
+
+        for task in updated.values():
+            if task.status == "done":
+                edges_changed |= dependency_index.complete(task.id)
+        if edges_changed:
+            created_ids = {t.id for t in created}
+            for task in await _persist_edges(session, edges_changed):
+                if task.id in created_ids:
+                    created = [task if t.id == task.id else t for t in created]
+                else:
+                    updated[task.id] = task
+
+        created_ids = [t.id for t in created]
+        updated_ids = list(updated)
+        await enqueue(
+            session,
+            "tasks:task:bulk",
+            {"created": created_ids, "updated": updated_ids},
+            ActivityLogRequest(
+                actor="user",
+                action="task.bulk",
+                resource_type="task",
+                resource_name=f"{len(created_ids)} created, {len(updated_ids)} updated",
+                details={"created": created_ids, "updated": updated_ids},
+                module="tasks",
+            ),
+        )
+        await session.commit()
+
+    return TaskBulkResult(created=created, updated=list(updated.values()))
+
+
+# ---------------------------------------------------------------------------
+# Dependencies
+# ---------------------------------------------------------------------------
+
+
+@contextlib.asynccontextmanager
+async def _dependency_guard():
+    """Rebuild the index if a write fails after mutating it, so it never drifts from the DB."""
+    version = dependency_index.version
+    try:
+        yield
+    except Exception:
+        if dependency_index.version != version:
+            try:
+                await load_dependency_index()
+            except Exception:
+                logger.exception("Dependency index rebuild failed; the periodic resync will retry")
+        raise
+
+
+def _dependency_ids(values: list[str], label: str) -> list[str]:
+    """Normalise a blockedBy/blocks list to unique numeric task ids."""
+    ids: list[str] = []
+    for value in values:
+        task_id = str(value).strip()
+        if not task_id.isdigit():
+            raise ValueError(f"Invalid {label} task id: {value}")
+        if task_id not in ids:
+            ids.append(task_id)
+    return ids
+
+
+async def _open_task_ids(session, ids: list[str], label: str) -> list[str]:
+    """Reject unknown ids; drop tasks already done since they no longer block anything."""
+    if not ids:
+        return []
+    result = await session.execute(
+        text("SELECT id, state FROM mc_tasks WHERE id = ANY(:ids)"),
+        {"ids": [int(i) for i in ids]},
+    )
+    states = {str(row.id): row.state for row in result.all()}
+    unknown = [i for i in ids if i not in states]
+    if unknown:
+        raise ValueError(f"Unknown {label} tasks: {', '.join(unknown)}")
+    return [i for i in ids if states[i] != "done"]
+
+
+async def _set_blockers(session, task_id: str, blocked_by: list[str]) -> set[str]:
+    """Validate and apply a new blockedBy list. Returns task ids whose edges changed."""
+    blockers = await _open_task_ids(session, _dependency_ids(blocked_by, "blockedBy"), "blockedBy")
+    cycle = dependency_index.find_cycle(task_id, blockers)
+    if cycle:
+        raise ValueError(f"Dependency cycle: {' -> '.join(cycle)}")
+    return dependency_index.set_blockers(task_id, blockers) | {task_id}
+
+
+async def _set_dependents(session, task_id: str, blocks: list[str]) -> set[str]:
+    """Validate and apply a new blocks list. Returns task ids whose edges changed."""
+    dependents = await _open_task_ids(session, _dependency_ids(blocks, "blocks"), "blocks")
+    for dep in dependents:
+        cycle = dependency_index.find_cycle(dep, [task_id])
+        if cycle:
+            raise ValueError(f"Dependency cycle: {' -> '.join(cycle)}")
+    return dependency_index.set_dependents(task_id, dependents) | {task_id}
+
+
+async def _persist_edges(session, task_ids: set[str]) -> list[Task]:
+    """Write blocked_by/blocks from the index for open tasks in one statement.
+
+    Finished tasks are skipped so their `blocks` keeps the history of what
+    they held up.
+    """
+    rows = [
+        {
+            "id": int(task_id),
+            "blocked_by": sorted_ids(dependency_index.blockers(task_id)),
+            "blocks": sorted_ids(dependency_index.dependents(task_id)),
+        }
+        for task_id in task_ids
+        if task_id.isdigit()
+    ]
+    if not rows:
+        return []
+    result = await session.execute(
+        text("""
+            UPDATE mc_tasks t SET
+                blocked_by = ARRAY(SELECT jsonb_array_elements_text(r.blocked_by)),
+                blocks = ARRAY(SELECT jsonb_array_elements_text(r.blocks)),
+                updated_at = now()
+            FROM jsonb_to_recordset(CAST(:rows AS jsonb))
+                AS r(id int, blocked_by jsonb, blocks jsonb)
+            WHERE t.id = r.id
+              AND t.state <> 'done'
+              AND (
+                  t.blocked_by IS DISTINCT FROM
+                      ARRAY(SELECT jsonb_array_elements_text(r.blocked_by))
+                  OR t.blocks IS DISTINCT FROM ARRAY(SELECT jsonb_array_elements_text(r.blocks))
+              )
+            RETURNING t.*
+        """),
+        {"rows": _recordset(rows)},
+    )
+    return [_row_to_task(row) for row in result.all()]
+
+
+async def _emit_updated(session, tasks: list[Task], skip: str | None = None) -> None:
+    """Announce neighbours whose edges changed; `skip` is announced by the caller."""
+    for task in tasks:
+        if task.id != skip:
+            await _emit_task(session, "tasks:task:updated", task)
+
+
+async def load_dependency_index() -> int:
+    """(Re)build the index from open tasks' blocked_by.
+
+    Edges pointing at tasks that are already done or were deleted are cleared
+    on the way in, so rows edited outside the API unblock here too. Returns
+    the number of tasks that were unblocked.
+    """
+    async with async_session() as session:
+        result = await session.execute(
+            text("""
+                SELECT id, blocked_by FROM mc_tasks
+                WHERE state <> 'done' AND blocked_by IS NOT NULL AND blocked_by <> '{}'
+            """)
+        )
+        rows = [
+            (str(row.id), [str(b) for b in _ensure_list(row.blocked_by)]) for row in result.all()
+        ]
+        referenced = sorted({b for _, blockers in rows for b in blockers if b.isdigit()})
+        states: dict[str, str] = {}
+        if referenced:
+            result = await session.execute(
+                text("SELECT id, state FROM mc_tasks WHERE id = ANY(:ids)"),
+                {"ids": [int(i) for i in referenced]},
+            )
+            states = {str(row.id): row.state for row in result.all()}
+
+        dependency_index.load(rows)
+        healed: set[str] = set()
+        for blocker in referenced:
+            state = states.get(blocker)
+            if state is None:
+                healed |= dependency_index.discard(blocker)
+            elif state == "done":
+                healed |= dependency_index.complete(blocker)
+        tasks = await _persist_edges(session, healed) if healed else []
+        await _emit_updated(session, tasks)
+        await session.commit()
+
+    if tasks:
+        logger.info("Dependency index cleared finished blockers from %d task(s)", len(tasks))
+    return len(tasks)
+
+
+async def get_task_graph(task_id: int) -> TaskGraph | None:
+    """The task's dependency component in topological order. None if the task is missing."""
+    key = str(task_id)
+    order = dependency_index.topological_order(key)
+    async with async_session() as session:
+        result = await session.execute(
+            text("SELECT * FROM mc_tasks WHERE id = ANY(:ids)"),
+            {"ids": [int(i) for i in order if i.isdigit()]},
+        )
+        tasks = {t.id: t for t in map(_row_to_task, result.all())}
+    if key not in tasks:
+        return None
+    return TaskGraph(
+        id=key,
+        order=order,
+        edges=[TaskEdge(blocker=b, blocked=d) for b, d in dependency_index.edges(order)],
+        tasks=[tasks[i] for i in order if i in tasks],
+    )
+
+
+# ---------------------------------------------------------------------------
+# Scheduling
+# ---------------------------------------------------------------------------
+
+# Advisory lock namespace: (ns, task_id) guards one promotion, (ns, 0) the expansion pass
+_SCHEDULE_LOCK = "mc_tasks_schedule"
 
-    async with async_session() as session:
-        # Check exists
-        check = await session.execute(
-            text("SELECT id FROM mc_tasks WHERE id = :id"),
-            {"id": task_id},
-        )
-        if check.first() is None:
-            return None
+# Cap on instances one template can add per expansion pass (e.g. "* * * * *")
+_MAX_INSTANCES_PER_PASS = 100
 
-        set_parts: list[str] = []
-        params: dict = {"id": task_id}
-
-        for key, value in updates.items():
-            if key == "priority":
-                pri_int = PRIORITY_STR_TO_INT.get(value)
-                if pri_int is None:
-                    raise ValueError(f"Invalid priority: {value}")
-                set_parts.append("priority = :priority")
-                params["priority"] = pri_int
-            elif key == "status":
-                state = status_to_state(value)
-                if state not in VALID_STATES:
-                    raise ValueError(f"Invalid status: {value}")
-                set_parts.append("state = :state")
-                params["state"] = state
-            elif key == "skill":
-                set_parts.append("agent_id = :agent_id")
-                params["agent_id"] = value or ""
-            elif key == "scheduledAt":
-                scheduled_at = None
-                if value:
-                    try:
-                        scheduled_at = datetime.fromisoformat(value)
-                    except (ValueError, TypeError):
-                        scheduled_at = None
-                set_parts.append("scheduled_at = :scheduled_at")
-                params["scheduled_at"] = scheduled_at
-            elif key == "startedAt":
-                started_at = None
-                if value:
-                    try:
-                        started_at = datetime.fromisoformat(value)
-                    except (ValueError, TypeError):
-                        started_at = None
-                set_parts.append("started_at = :started_at")
-                params["started_at"] = started_at
-            elif key == "completedAt":
-                completed_at = None
-                if value:
-                    try:
-                        completed_at = datetime.fromisoformat(value)
-                    except (ValueError, TypeError):
-                        completed_at = None
-                set_parts.append("completed_at = :completed_at")
-                params["completed_at"] = completed_at
-            elif key == "blockedBy":
-                set_parts.append("blocked_by = :blocked_by")
-                params["blocked_by"] = value or []
-            elif key == "blocks":
-                set_parts.append("blocks = :blocks")
-                params["blocks"] = value or []
-            elif key in ("tags",):
-                set_parts.append("tags = :tags")
-                params["tags"] = value or []
-            elif key in ("title", "description", "project", "schedule", "result", "error", "type"):
-                set_parts.append(f"{key} = :{key}")
-                params[key] = value
-            elif key == "estimatedHours":
-                set_parts.append("estimated_hours = :estimated_hours")
-                params["estimated_hours"] = value
-            elif key == "actualHours":
-                set_parts.append("actual_hours = :actual_hours")
-                params["actual_hours"] = value
-
-        if not set_parts:
-            return await get_task(task_id)
-
-        set_parts.append("updated_at = now()")
-        set_clause = ", ".join(set_parts)
 
+async def load_scheduled(within: timedelta) -> list[tuple[int, datetime]]:
+    """(id, scheduled_at) for one-off backlog tasks due within `within`, overdue ones included."""
+    async with async_session() as session:
         result = await session.execute(
-            text(f"UPDATE mc_tasks SET {set_clause} WHERE id = :id RETURNING *"),
-            params,
+            text("""
+                SELECT id, scheduled_at FROM mc_tasks
+                WHERE state = 'backlog' AND scheduled_at IS NOT NULL
+                  AND (schedule IS NULL OR schedule = '')
+                  AND scheduled_at <= now() + :within
+                ORDER BY scheduled_at
+            """),
+            {"within": within},
         )
-        row = result.first()
-        await session.commit()
-        return _row_to_task(row) if row else None
+        return [(row.id, row.scheduled_at) for row in result.all()]
 
 
-async def delete_task(task_id: int) -> bool:
-    """Delete a task. Returns True if deleted, False if not found."""
+async def promote_scheduled(task_ids: list[int]) -> list[Task]:
+    """Move due backlog tasks to todo. Returns the tasks this call promoted.
+
+    The per-task advisory lock and the state re-check make this safe to run
+    from every worker: each task is promoted by exactly one of them, and
+    stale ids (rescheduled, deleted, already moved) are no-ops.
+    """
+    if not task_ids:
+        return []
     async with async_session() as session:
         result = await session.execute(
-            text("DELETE FROM mc_tasks WHERE id = :id"),
-            {"id": task_id},
+            text("""
+                UPDATE mc_tasks SET state = 'todo', updated_at = now()
+                WHERE id = ANY(:ids) AND state = 'backlog'
+                  AND (schedule IS NULL OR schedule = '')
+                  AND scheduled_at <= now() + interval '1 second'
+                  AND pg_try_advisory_xact_lock(hashtext(:ns), id)
+                RETURNING *
+            """),
+            {"ids": task_ids, "ns": _SCHEDULE_LOCK},
         )
+        tasks = [_row_to_task(row) for row in result.all()]
+        for task in tasks:
+            await _emit_task(
+                session,
+                "tasks:task:updated",
+                task,
+                _task_activity("task.promoted", task.id, task.title, actor="system"),
+            )
         await session.commit()
-        return result.rowcount > 0
+        return tasks
 
 
-async def run_task(task_id: int) -> Task | None:
-    """Mark a task as in-progress (the /run endpoint)."""
+async def expand_schedules(lookahead: timedelta, tz: tzinfo) -> list[Task]:
+    """Create backlog instances for every cron template firing within `lookahead`.
+
+    Instances copy the template's fields, carry `schedule_parent_id` and a
+    `scheduled_at` for the scheduler to promote. Expansion resumes after the
+    template's latest instance, so a changed expression takes effect once
+    the already-expanded window has passed. Only one worker expands at a
+    time; the others return immediately.
+    """
     async with async_session() as session:
+        locked = await session.execute(
+            text("SELECT pg_try_advisory_xact_lock(hashtext(:ns), 0)"), {"ns": _SCHEDULE_LOCK}
+        )
+        if not locked.scalar():
+            return []
         result = await session.execute(
             text("""
-                UPDATE mc_tasks
-                SET state = 'in_progress',
-                    started_at = COALESCE(started_at, now()),
-                    updated_at = now()
-                WHERE id = :id
+                SELECT t.*, now() AS db_now,
+                    (SELECT max(i.scheduled_at) FROM mc_tasks i
+                     WHERE i.schedule_parent_id = t.id) AS last_instance
+                FROM mc_tasks t
+                WHERE t.schedule IS NOT NULL AND t.schedule <> ''
+                  AND t.state NOT IN ('done', 'cancelled')
+            """)
+        )
+        rows = []
+        for row in result.all():
+            m = row._mapping
+            try:
+                cron = CronSchedule(m["schedule"])
+            except ValueError:
+                logger.warning("Task %s has an invalid schedule %r; skipping", m["id"], m["schedule"])
+                continue
+            after = max(m["db_now"], m["last_instance"] or m["db_now"])
+            if m["scheduled_at"] is not None and m["scheduled_at"] > after:
+                # A template's own scheduled_at is the first moment it may fire
+                after = m["scheduled_at"] - timedelta(seconds=1)
+            base = (m["slug"] or _generate_slug(m["title"]))[:36]
+            fires = cron.occurrences(after, m["db_now"] + lookahead, tz)
+            for _, at in zip(range(_MAX_INSTANCES_PER_PASS), fires):
+                rows.append({
+                    "parent": m["id"],
+                    "title": m["title"],
+                    "description": m["description"] or "",
+                    "agent_id": m["agent_id"] or "",
+                    "priority": m["priority"],
+                    "type": m["type"] or "feature",
+                    "tags": _ensure_list(m["tags"]),
+                    "slug": f"{base}-{m['id']}-{at:%Y%m%d%H%M}",
+                    "project": m["project"],
+                    "scheduled_at": at,
+                    "estimated_hours": m["estimated_hours"],
+                })
+        if not rows:
+            return []
+
+        result = await session.execute(
+            text(f"""
+                INSERT INTO mc_tasks (
+                    title, description, agent_id, created_by, state, priority, type,
+                    tags, slug, project, scheduled_at, schedule_parent_id, estimated_hours
+                )
+                SELECT
+                    r.title, r.description, r.agent_id, 'scheduler', 'backlog', r.priority,
+                    r.type, {_text_array("tags")}, r.slug, r.project, r.scheduled_at,
+                    r.parent, r.estimated_hours
+                FROM jsonb_to_recordset(CAST(:rows AS jsonb)) AS r(
+                    parent int, title text, description text, agent_id text, priority int,
+                    type text, tags jsonb, slug text, project text, scheduled_at timestamptz,
+                    estimated_hours float8
+                )
+                ON CONFLICT DO NOTHING
                 RETURNING *
             """),
-            {"id": task_id},
+            {"rows": _recordset(rows)},
         )
-        row = result.first()
+        created = [_row_to_task(row) for row in result.all()]
+        if created:
+            created_ids = [t.id for t in created]
+            await enqueue(
+                session,
+                "tasks:task:bulk",
+                {"created": created_ids, "updated": []},
+                ActivityLogRequest(
+                    actor="system",
+                    action="task.scheduled",
+                    resource_type="task",
+                    resource_name=f"{len(created_ids)} scheduled",
+                    details={"created": created_ids},
+                    module="tasks",
+                ),
+            )
         await session.commit()
-        return _row_to_task(row) if row else None
+        return created
 
 
 # ---------------------------------------------------------------------------
@@ -383,24 +1607,266 @@ async def run_task(task_id: int) -> Task | None:
 # ---------------------------------------------------------------------------
 
 
+# Pickup eligibility shared by the queue listing and the batch claim
+_QUEUE_ELIGIBLE = """
+    state = 'todo'
+    AND (picked_up IS NULL OR picked_up = false)
+    AND (blocked_by IS NULL OR blocked_by = '{}')
+"""
+
+# Re-check interval for long-polls when LISTEN is unavailable
+_QUEUE_FALLBACK_POLL = 5.0
+
+
+# A live claim: set by claim; ended by complete, release, the lease reaper and
+# any update that moves the task out of in_progress
+_IN_FLIGHT = "claimed_by IS NOT NULL AND lease_expires_at IS NOT NULL AND state = 'in_progress'"
+
+# Cleared whenever a task leaves in_progress, so its agent's slot frees up
+_CLAIM_COLUMNS = ("claimed_by", "claimed_at", "lease_expires_at")
+
+
+def _end_claim_unless_in_progress(state: str) -> str:
+    """Bulk UPDATE assignments dropping the claim when `state` leaves in_progress.
+
+    A NULL `state` (status unchanged) keeps the claim.
+    """
+    return ",\n".join(
+        f"{col} = CASE WHEN {state} <> 'in_progress' THEN NULL ELSE t.{col} END"
+        for col in _CLAIM_COLUMNS
+    )
+
+
+# Ranking tie-breaks after fair share: aged priority, then oldest first
+_QUEUE_ORDER = "r.share, r.eff_priority, r.created_at, r.id"
+
+
+def _queue_ranking(where: str) -> str:
+    """CTEs ranking tasks matching `where` for pickup, exposed as `ranked`.
+
+    share = (the project's in-flight claims + the task's position within its
+    project) / the project's weight, so every project gets turns in proportion
+    to its weight however many urgent tasks another one has queued. Within a
+    project, priority improves one level per aging interval waited.
+    """
+    return f"""
+        running AS (
+            SELECT project, count(*) AS n FROM mc_tasks
+            WHERE {_IN_FLIGHT}
+            GROUP BY project
+        ),
+        eligible AS (
+            SELECT id, project, created_at,
+                GREATEST(1, priority - CASE WHEN CAST(:aging AS int) > 0
+                    THEN floor(extract(epoch FROM now() - created_at) / CAST(:aging AS int))::int
+                    ELSE 0 END) AS eff_priority
+            FROM mc_tasks
+            WHERE {where}
+        ),
+        ranked AS (
+            SELECT e.id, e.eff_priority, e.created_at,
+                (COALESCE(r.n, 0) + row_number() OVER (
+                    PARTITION BY e.project ORDER BY e.eff_priority, e.created_at, e.id
+                )) / COALESCE(
+                    (CAST(:weights AS jsonb) ->> COALESCE(e.project, ''))::float8, 1.0
+                ) AS share
+            FROM eligible e
+            LEFT JOIN running r ON r.project IS NOT DISTINCT FROM e.project
+        )
+    """
+
+
+def _queue_policy_params() -> dict:
+    return {
+        "weights": json.dumps(settings.task_project_weight_map),
+        "aging": settings.task_priority_aging_seconds,
+    }
+
+
+def _agent_limit(agent_id: str) -> int | None:
+    """In-flight cap for an agent: its override, else the default. None = unlimited."""
+    return settings.task_agent_limit_map.get(agent_id, settings.task_agent_max_in_flight) or None
+
+
+async def _claim_slots(session, agent_id: str, wanted: int) -> int:
+    """How many of `wanted` claims `agent_id` may take before hitting its in-flight cap.
+
+    A per-agent advisory lock, held until the caller's transaction ends,
+    serialises that agent's concurrent claims so they cannot both pass the
+    cap. The count runs as its own statement so it sees claims committed
+    while waiting for the lock.
+    """
+    limit = _agent_limit(agent_id)
+    if limit is None:
+        return wanted
+    await session.execute(
+        text("SELECT pg_advisory_xact_lock(hashtext('mc_tasks_claim:' || :agent_id))"),
+        {"agent_id": agent_id},
+    )
+    result = await session.execute(
+        text(f"SELECT count(*) FROM mc_tasks WHERE claimed_by = :agent_id AND {_IN_FLIGHT}"),
+        {"agent_id": agent_id},
+    )
+    return max(0, min(wanted, limit - result.scalar()))
+
+
 async def get_queue() -> list[Task]:
     """Return pickup-eligible tasks: state=todo, not picked up, not blocked.
 
-    Sorted by priority ASC (1=urgent first), then created_at ASC (oldest first).
+    Sorted in claim order: weighted fair share across projects, then aged
+    priority (1=urgent first), then created_at ASC (oldest first).
     """
     async with async_session() as session:
         result = await session.execute(
-            text("""
-                SELECT * FROM mc_tasks
-                WHERE state = 'todo'
-                  AND (picked_up IS NULL OR picked_up = false)
-                  AND (blocked_by IS NULL OR blocked_by = '{}')
-                ORDER BY priority ASC, created_at ASC
-            """)
+            text(f"""
+                WITH {_queue_ranking(_QUEUE_ELIGIBLE)}
+                SELECT t.* FROM ranked r JOIN mc_tasks t ON t.id = r.id
+                ORDER BY {_QUEUE_ORDER}
+            """),
+            _queue_policy_params(),
         )
         return [_row_to_task(row) for row in result.all()]
 
 
+async def wait_for_queue(timeout: float) -> list[Task]:
+    """Long-poll the queue: return as soon as eligible tasks exist, or [] after `timeout`.
+
+    Wakes on mc_tasks_queue NOTIFY; without a LISTEN connection it re-checks
+    every few seconds instead.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while True:
+        event = queue_notifier.current()
+        tasks = await get_queue()
+        remaining = deadline - loop.time()
+        if tasks or remaining <= 0:
+            return tasks
+        if not queue_notifier.listening:
+            remaining = min(remaining, _QUEUE_FALLBACK_POLL)
+        await queue_notifier.wait(event, remaining)
+
+
+async def claim_next(payload: QueueClaimRequest) -> list[Task]:
+    """Atomically claim up to `payload.limit` eligible tasks for an agent.
+
+    Candidate rows are locked with FOR UPDATE SKIP LOCKED, so concurrent
+    callers each get a disjoint batch instead of racing on the same ids.
+    The batch is cut to the agent's remaining in-flight slots and picked in
+    get_queue order. Returns the claimed tasks in that order (possibly empty).
+    """
+    conditions = [_QUEUE_ELIGIBLE, "claimed_by IS NULL"]
+    params: dict = {
+        "agent_id": payload.agent_id,
+        "lease": _lease_seconds(payload.lease_seconds),
+        **_queue_policy_params(),
+    }
+
+    if payload.project:
+        conditions.append("project = :project")
+        params["project"] = payload.project
+    if payload.tags:
+        conditions.append("tags && :tags")
+        params["tags"] = payload.tags
+    if payload.skill:
+        conditions.append("agent_id = :skill")
+        params["skill"] = payload.skill
+
+    where = " AND ".join(f"({c.strip()})" for c in conditions)
+
+    async with async_session() as session:
+        params["limit"] = await _claim_slots(session, payload.agent_id, payload.limit)
+        if params["limit"] == 0:
+            return []
+        # The outer WHERE is re-checked against the latest row version once locked
+        result = await session.execute(
+            text(f"""
+                WITH {_queue_ranking(where)},
+                picked AS (
+                    SELECT t.id, r.share, r.eff_priority
+                    FROM ranked r JOIN mc_tasks t ON t.id = r.id
+                    WHERE t.claimed_by IS NULL AND t.state = 'todo'
+                    ORDER BY {_QUEUE_ORDER}
+                    LIMIT :limit
+                    FOR UPDATE OF t SKIP LOCKED
+                )
+                UPDATE mc_tasks t
+                SET claimed_by = :agent_id,
+                    claimed_at = now(),
+                    lease_expires_at = now() + make_interval(secs => :lease),
+                    state = 'in_progress',
+                    started_at = COALESCE(t.started_at, now()),
+                    updated_at = now()
+                FROM picked
+                WHERE t.id = picked.id
+                RETURNING t.*, picked.share, picked.eff_priority
+            """),
+            params,
+        )
+        # UPDATE ... RETURNING does not preserve the CTE ordering
+        rows = result.all()
+        rows.sort(
+            key=lambda r: (
+                r._mapping["share"], r._mapping["eff_priority"],
+                r._mapping["created_at"], r._mapping["id"],
+            )
+        )
+        tasks = [_row_to_task(row) for row in rows]
+        for task in tasks:
+            await _emit_task(session, "tasks:task:claimed", task)
+        await session.commit()
+        return tasks
+
+
+async def get_queue_policy() -> QueuePolicy:
+    """Configured queue limits alongside the current in-flight and queued counts."""
+    async with async_session() as session:
+        agents = await session.execute(
+            text(f"""
+                SELECT claimed_by AS agent_id, count(*) AS in_flight FROM mc_tasks
+                WHERE {_IN_FLIGHT}
+                GROUP BY claimed_by
+            """)
+        )
+        projects = await session.execute(
+            text(f"""
+                SELECT project,
+                    count(*) FILTER (WHERE {_IN_FLIGHT}) AS in_flight,
+                    count(*) FILTER (WHERE {_QUEUE_ELIGIBLE} AND claimed_by IS NULL) AS queued
+                FROM mc_tasks
+                WHERE ({_IN_FLIGHT}) OR ({_QUEUE_ELIGIBLE})
+                GROUP BY project
+            """)
+        )
+        agent_rows = agents.all()
+        project_rows = projects.all()
+
+    limits = settings.task_agent_limit_map
+    weights = settings.task_project_weight_map
+    in_flight = {row.agent_id: row.in_flight for row in agent_rows}
+    for agent_id in limits:
+        in_flight.setdefault(agent_id, 0)
+    return QueuePolicy(
+        max_in_flight=settings.task_agent_max_in_flight or None,
+        agent_limits=limits,
+        project_weights=weights,
+        priority_aging_seconds=settings.task_priority_aging_seconds,
+        agents=[
+            QueueAgentLoad(agent_id=a, in_flight=n, max_in_flight=_agent_limit(a))
+            for a, n in sorted(in_flight.items())
+        ],
+        projects=[
+            QueueProjectShare(
+                project=row.project,
+                weight=weights.get(row.project or "", 1.0),
+                in_flight=row.in_flight,
+                queued=row.queued,
+            )
+            for row in sorted(project_rows, key=lambda r: (r.project is None, r.project or ""))
+        ],
+    )
+
+
 async def pickup_task(task_id: int) -> Task | None:
     """Agent picks up a task: set picked_up=true, state=in_progress, started_at=now()."""
     async with async_session() as session:
@@ -417,8 +1883,12 @@ async def pickup_task(task_id: int) -> Task | None:
             {"id": task_id},
         )
         row = result.first()
+        if row is None:
+            return None
+        task = _row_to_task(row)
+        await _emit_task(session, "tasks:task:updated", task)
         await session.commit()
-        return _row_to_task(row) if row else None
+        return task
 
 
 async def complete_task(task_id: int, payload: TaskComplete) -> Task | None:
@@ -431,7 +1901,7 @@ async def complete_task(task_id: int, payload: TaskComplete) -> Task | None:
             "Provide at least one of: pr_url, ci_status, test_output, files_changed"
         )
 
-    async with async_session() as session:
+    async with _write_errors(), _dependency_guard(), async_session() as session:
         proof_json = json.dumps(proof) if proof else None
         result = await session.execute(
             text("""
@@ -440,6 +1910,7 @@ async def complete_task(task_id: int, payload: TaskComplete) -> Task | None:
                     result = :result,
                     error = :error,
                     proof = CAST(:proof AS jsonb),
+                    lease_expires_at = NULL,
                     completed_at = now(),
                     updated_at = now()
                 WHERE id = :id
@@ -453,27 +1924,190 @@ async def complete_task(task_id: int, payload: TaskComplete) -> Task | None:
             },
         )
         row = result.first()
+        if row is None:
+            return None
+        task = _row_to_task(row)
+        await _emit_updated(
+            session, await _persist_edges(session, dependency_index.complete(task.id))
+        )
+        await _emit_task(
+            session,
+            "tasks:task:updated",
+            task,
+            _task_activity("task.completed", task.id, task.title, actor="system"),
+        )
         await session.commit()
-        return _row_to_task(row) if row else None
+        return task
 
 
 # ---------------------------------------------------------------------------
-# Tags
+# Delta sync
 # ---------------------------------------------------------------------------
 
+_CURRENT_CHANGE_VERSION = """
+    SELECT GREATEST(
+        (SELECT COALESCE(max(version), 0) FROM mc_task_changes),
+        (SELECT version FROM mc_task_changes_horizon)
+    )
+"""
+
 
-async def list_tags() -> list[str]:
-    """Return all unique tags across all tasks, sorted."""
+async def list_changes(since: int | None, limit: int = 500) -> TaskChanges:
+    """Tasks changed after version `since`, oldest change first.
+
+    Each task appears once with its current row, or as a tombstone if its
+    latest change was a delete. Without `since` only the current version is
+    returned, for bootstrapping a client after a full list fetch.
+    """
     async with async_session() as session:
+        if since is None:
+            current = (await session.execute(text(_CURRENT_CHANGE_VERSION))).scalar_one()
+            return TaskChanges(version=current)
+
+        horizon = (
+            await session.execute(text("SELECT version FROM mc_task_changes_horizon"))
+        ).scalar_one()
+        if since < horizon:
+            current = (await session.execute(text(_CURRENT_CHANGE_VERSION))).scalar_one()
+            return TaskChanges(version=current, reset=True)
+
         result = await session.execute(
             text("""
-                SELECT DISTINCT unnest(tags) AS tag
-                FROM mc_tasks
-                WHERE tags IS NOT NULL AND tags != '{}'
-                ORDER BY tag
+                WITH latest AS (
+                    SELECT DISTINCT ON (task_id) task_id, version, deleted
+                    FROM mc_task_changes
+                    WHERE version > :since
+                    ORDER BY task_id, version DESC
+                ),
+                page AS (
+                    SELECT * FROM latest ORDER BY version LIMIT :limit
+                )
+                SELECT page.version AS change_version,
+                       page.task_id AS change_task_id,
+                       page.deleted OR t.id IS NULL AS change_deleted,
+                       t.*
+                FROM page
+                LEFT JOIN mc_tasks t ON t.id = page.task_id
+                ORDER BY page.version
+            """),
+            {"since": since, "limit": limit + 1},
+        )
+        rows = result.all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    changes = TaskChanges(version=rows[-1]._mapping["change_version"] if rows else since)
+    changes.has_more = has_more
+    for row in rows:
+        m = row._mapping
+        if m["change_deleted"]:
+            changes.deleted.append(str(m["change_task_id"]))
+        else:
+            changes.changed.append(_row_to_task(row))
+    return changes
+
+
+async def compact_changes(retention_days: int) -> int:
+    """Drop superseded log entries and expired tombstones. Returns rows removed.
+
+    The newest entry per live task is always kept, so compaction never forces
+    a client to resync; only tombstone expiry advances the horizon.
+    """
+    async with async_session() as session:
+        superseded = await session.execute(
+            text("""
+                DELETE FROM mc_task_changes c
+                USING mc_task_changes n
+                WHERE n.task_id = c.task_id AND n.version > c.version
             """)
         )
-        return [row._mapping["tag"] for row in result.all()]
+        expired = await session.execute(
+            text("""
+                WITH gone AS (
+                    DELETE FROM mc_task_changes
+                    WHERE deleted AND changed_at < now() - make_interval(days => :days)
+                    RETURNING version
+                )
+                UPDATE mc_task_changes_horizon
+                SET version = GREATEST(version, (SELECT max(version) FROM gone))
+                WHERE EXISTS (SELECT 1 FROM gone)
+                RETURNING (SELECT count(*) FROM gone)
+            """),
+            {"days": retention_days},
+        )
+        removed = superseded.rowcount + (expired.scalar() or 0)
+        await session.commit()
+        return removed
+
+
+async def archive_tasks(after_days: int, batch_size: int) -> list[str]:
+    """Move one batch of tasks finished over `after_days` ago into mc_tasks_archive.
+
+    Returns the ids moved. Archived tasks have already left the dependency
+    graph when they finished; discarding them again only matters for
+    cancelled tasks that still had edges.
+    """
+    async with _dependency_guard(), async_session() as session:
+        result = await session.execute(
+            text("""
+                SELECT mc_tasks_archive_move(now() - make_interval(days => :days), :batch)
+            """),
+            {"days": after_days, "batch": batch_size},
+        )
+        task_ids = [str(task_id) for task_id in result.scalars().all()]
+        if not task_ids:
+            return []
+        changed: set[str] = set()
+        for task_id in task_ids:
+            changed |= dependency_index.discard(task_id)
+        await _emit_updated(session, await _persist_edges(session, changed - set(task_ids)))
+        await enqueue(session, "tasks:task:archived", {"ids": task_ids})
+        await session.commit()
+        return task_ids
+
+
+# ---------------------------------------------------------------------------
+# Tags
+# ---------------------------------------------------------------------------
+
+
+def _like_prefix(prefix: str) -> str:
+    """LIKE pattern matching values that start with `prefix` literally."""
+    return re.sub(r"([\\%_])", r"\\\1", prefix) + "%"
+
+
+async def list_tags(prefix: str | None = None, limit: int | None = None) -> list[TaskTag]:
+    """Tags in use with open and total task counts, from the mc_task_tags catalog.
+
+    Without a prefix every tag is returned alphabetically. With one, matching
+    tags come most-used first for autocomplete.
+    """
+    conditions = ["total_count > 0"]
+    params: dict = {}
+    order = "tag"
+    if prefix:
+        conditions.append("tag LIKE :pattern")
+        params["pattern"] = _like_prefix(prefix)
+        order = "open_count DESC, total_count DESC, tag"
+    limit_clause = ""
+    if limit is not None:
+        limit_clause = "LIMIT :limit"
+        params["limit"] = limit
+
+    async with async_session() as session:
+        result = await session.execute(
+            text(f"""
+                SELECT tag, open_count, total_count FROM mc_task_tags
+                WHERE {" AND ".join(conditions)}
+                ORDER BY {order}
+                {limit_clause}
+            """),
+            params,
+        )
+        return [
+            TaskTag(tag=row.tag, open=row.open_count, total=row.total_count)
+            for row in result.all()
+        ]
 
 
 # ---------------------------------------------------------------------------
@@ -482,14 +2116,15 @@ async def list_tags() -> list[str]:
 
 
 async def get_stats() -> TaskStats:
-    """Return task stats for the overview widget."""
+    """Return task stats for the overview widget, read from the mc_task_counters rollup."""
     async with async_session() as session:
         result = await session.execute(
             text("""
                 SELECT
-                    COUNT(*) FILTER (WHERE state = 'in_progress') AS in_progress_count,
-                    COUNT(*) FILTER (WHERE state = 'todo') AS todo_count
-                FROM mc_tasks
+                    COALESCE(SUM(n) FILTER (WHERE state = 'in_progress'), 0)::bigint
+                        AS in_progress_count,
+                    COALESCE(SUM(n) FILTER (WHERE state = 'todo'), 0)::bigint AS todo_count
+                FROM mc_task_counters
             """)
         )
         row = result.first()
@@ -508,47 +2143,43 @@ async def get_stats() -> TaskStats:
 # ---------------------------------------------------------------------------
 
 
-async def claim_task(task_id: int, agent_id: str) -> Task | None:
-    """Atomically claim a task for an agent. Returns None if not found, raises ValueError if already claimed."""
-    async with async_session() as session:
-        # SELECT FOR UPDATE SKIP LOCKED — only returns the row if it's unclaimed and not locked
-        result = await session.execute(
-            text("""
-                SELECT id FROM mc_tasks
-                WHERE id = :id AND claimed_by IS NULL
-                FOR UPDATE SKIP LOCKED
-            """),
-            {"id": task_id},
-        )
-        row = result.first()
-        if row is None:
-            # Either task doesn't exist or is already claimed/locked
-            check = await session.execute(
-                text("SELECT id, claimed_by FROM mc_tasks WHERE id = :id"),
-                {"id": task_id},
+async def claim_task(
+    task_id: int, agent_id: str, lease_seconds: int | None = None
+) -> Task | None:
+    """Atomically claim a task for an agent. Returns None if not found.
+
+    Raises ValueError if the task is already claimed or the agent is at its in-flight cap.
+    """
+    async with _write_errors(), async_session() as session:
+        # Only takes the cap's lock and count when a cap is configured
+        if await _claim_slots(session, agent_id, 1) == 0:
+            raise ValueError(
+                f"Agent {agent_id} is at its limit of {_agent_limit(agent_id)} in-flight tasks"
             )
-            existing = check.first()
-            if existing is None:
-                return None  # Task doesn't exist
-            raise ValueError(f"Task already claimed by {existing._mapping['claimed_by']}")
 
-        # Claim it
-        update_result = await session.execute(
-            text("""
-                UPDATE mc_tasks
-                SET claimed_by = :agent_id,
+        result = await session.execute(
+            text(
+                _guarded_update(
+                    """claimed_by = :agent_id,
                     claimed_at = now(),
+                    lease_expires_at = now() + make_interval(secs => :lease),
                     state = 'in_progress',
                     started_at = COALESCE(started_at, now()),
-                    updated_at = now()
-                WHERE id = :id
-                RETURNING *
-            """),
-            {"id": task_id, "agent_id": agent_id},
+                    updated_at = now()""",
+                    "claimed_by IS NULL",
+                )
+            ),
+            {"id": task_id, "agent_id": agent_id, "lease": _lease_seconds(lease_seconds)},
         )
-        updated = update_result.first()
+        row = result.first()
+        if row is None:
+            return None  # Task doesn't exist
+        if row._mapping["id"] is None:
+            raise ValueError(f"Task already claimed by {row._mapping['holder'] or 'another agent'}")
+        task = _row_to_task(row)
+        await _emit_task(session, "tasks:task:claimed", task)
         await session.commit()
-        return _row_to_task(updated) if updated else None
+        return task
 
 
 async def release_task(task_id: int) -> Task | None:
@@ -559,6 +2190,7 @@ async def release_task(task_id: int) -> Task | None:
                 UPDATE mc_tasks
                 SET claimed_by = NULL,
                     claimed_at = NULL,
+                    lease_expires_at = NULL,
                     state = 'todo',
                     updated_at = now()
                 WHERE id = :id AND claimed_by IS NOT NULL
@@ -567,8 +2199,78 @@ async def release_task(task_id: int) -> Task | None:
             {"id": task_id},
         )
         row = result.first()
+        if row is None:
+            return None
+        task = _row_to_task(row)
+        await _emit_task(session, "tasks:task:released", task)
         await session.commit()
-        return _row_to_task(row) if row else None
+        return task
+
+
+async def heartbeat_task(
+    task_id: int, agent_id: str, lease_seconds: int | None = None
+) -> Task | None:
+    """Extend the claim lease held by `agent_id`.
+
+    Returns None if not found, raises ValueError if the task is not currently
+    claimed by that agent.
+    """
+    async with async_session() as session:
+        result = await session.execute(
+            text(
+                _guarded_update(
+                    "lease_expires_at = now() + make_interval(secs => :lease)",
+                    "claimed_by = :agent_id AND state = 'in_progress'",
+                )
+            ),
+            {"id": task_id, "agent_id": agent_id, "lease": _lease_seconds(lease_seconds)},
+        )
+        row = result.first()
+        if row is None:
+            return None
+        if row._mapping["id"] is None:
+            raise ValueError(
+                f"Task is not claimed by {agent_id} (claimed by {row._mapping['holder']})"
+            )
+        await session.commit()
+        return _row_to_task(row)
+
+
+async def reap_expired_leases(batch_size: int) -> list[Task]:
+    """Release up to `batch_size` in-progress claims whose lease has expired.
+
+    The claimed_by IS NOT NULL predicate lets the planner walk the small
+    idx_mc_tasks_claimed partial index rather than the whole table.
+    """
+    async with async_session() as session:
+        result = await session.execute(
+            text("""
+                WITH expired AS (
+                    SELECT id FROM mc_tasks
+                    WHERE claimed_by IS NOT NULL
+                      AND state = 'in_progress'
+                      AND lease_expires_at < now()
+                    ORDER BY lease_expires_at
+                    LIMIT :batch_size
+                    FOR UPDATE SKIP LOCKED
+                )
+                UPDATE mc_tasks t
+                SET claimed_by = NULL,
+                    claimed_at = NULL,
+                    lease_expires_at = NULL,
+                    state = 'todo',
+                    updated_at = now()
+                FROM expired
+                WHERE t.id = expired.id
+                RETURNING t.*
+            """),
+            {"batch_size": batch_size},
+        )
+        tasks = [_row_to_task(row) for row in result.all()]
+        for task in tasks:
+            await _emit_task(session, "tasks:task:released", task)
+        await session.commit()
+        return tasks
 
 
 # ---------------------------------------------------------------------------
@@ -576,38 +2278,59 @@ async def release_task(task_id: int) -> Task | None:
 # ---------------------------------------------------------------------------
 
 
-async def list_comments(task_id: int) -> list[Comment]:
-    """List all comments for a task, newest first."""
+def _row_to_comment(m) -> Comment:
+    return Comment(
+        id=m["id"],
+        taskId=m["task_id"],
+        authorId=m["author_id"],
+        body=m["body"],
+        commentType=m["comment_type"],
+        createdAt=_iso_or_none(m["created_at"]) or "",
+    )
+
+
+async def list_comments(
+    task_id: int, limit: int = 100, cursor: str | None = None
+) -> CommentPage:
+    """One keyset page of a task's comments, newest first, ordered by (created_at, id) DESC."""
+    conditions = ["task_id = :task_id"]
+    params: dict = {"task_id": task_id, "limit": limit + 1}
+    if cursor:
+        try:
+            c_created_at, c_id = _unpack_cursor(cursor)
+            params.update(c_created_at=datetime.fromisoformat(c_created_at), c_id=int(c_id))
+        except (ValueError, TypeError, binascii.Error) as e:
+            raise ValueError("Invalid cursor") from e
+        conditions.append("(created_at, id) < (:c_created_at, :c_id)")
+
     async with async_session() as session:
         result = await session.execute(
-            text("""
+            text(f"""
                 SELECT id, task_id, author_id, body, comment_type, created_at
                 FROM mc_comments
-                WHERE task_id = :task_id
-                ORDER BY created_at DESC
+                WHERE {" AND ".join(conditions)}
+                ORDER BY created_at DESC, id DESC
+                LIMIT :limit
             """),
-            {"task_id": task_id},
+            params,
         )
-        return [
-            Comment(
-                id=r._mapping["id"],
-                taskId=r._mapping["task_id"],
-                authorId=r._mapping["author_id"],
-                body=r._mapping["body"],
-                commentType=r._mapping["comment_type"],
-                createdAt=_iso_or_none(r._mapping["created_at"]) or "",
-            )
-            for r in result.all()
-        ]
+        rows = [r._mapping for r in result.all()]
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = _pack_cursor([last["created_at"].isoformat(), last["id"]])
+    return CommentPage(items=[_row_to_comment(m) for m in rows[:limit]], next_cursor=next_cursor)
 
 
 async def create_comment(task_id: int, payload: CommentCreate) -> Comment:
-    """Create a comment on a task."""
-    async with async_session() as session:
+    """Create a comment on a task, live or archived. Raises ValueError if the task does not exist."""
+    async with _write_errors(), async_session() as session:
         result = await session.execute(
             text("""
                 INSERT INTO mc_comments (task_id, author_id, body, comment_type)
-                VALUES (:task_id, :author_id, :body, :comment_type)
+                SELECT :task_id, :author_id, :body, :comment_type
+                WHERE EXISTS (SELECT 1 FROM mc_tasks_all WHERE id = :task_id)
                 RETURNING id, task_id, author_id, body, comment_type, created_at
             """),
             {
@@ -618,16 +2341,12 @@ async def create_comment(task_id: int, payload: CommentCreate) -> Comment:
             },
         )
         row = result.first()
+        if row is None:
+            raise ValueError(f"Task {task_id} does not exist")
+        comment = _row_to_comment(row._mapping)
+        await enqueue(session, "tasks:comment:created", comment.model_dump(mode="json"))
         await session.commit()
-        m = row._mapping
-        return Comment(
-            id=m["id"],
-            taskId=m["task_id"],
-            authorId=m["author_id"],
-            body=m["body"],
-            commentType=m["comment_type"],
-            createdAt=_iso_or_none(m["created_at"]) or "",
-        )
+        return comment
 
 
 async def delete_comment(comment_id: int) -> bool:
@@ -637,8 +2356,11 @@ async def delete_comment(comment_id: int) -> bool:
             text("DELETE FROM mc_comments WHERE id = :id"),
             {"id": comment_id},
         )
+        if result.rowcount == 0:
+            return False
+        await enqueue(session, "tasks:comment:deleted", {"id": comment_id})
         await session.commit()
-        return result.rowcount > 0
+        return True
 
 
 # ---------------------------------------------------------------------------
@@ -162,3 +162,199 @@ def test_log_event():
         assert event.id  # UUID is set
         mock_append.assert_called_once()
         mock_manager.broadcast.assert_called_once()
+
+
+def test_log_events_single_write(tmp_path):
+    """A batch is written newest-first with one file rewrite."""
+    import asyncio
+    import json
+
+    from modules.activity.models import ActivityLogRequest
+    from modules.activity.service import ActivityService
+
+    service = ActivityService()
+    reqs = [
+        ActivityLogRequest(actor="user", action=f"task.{n}", resource_type="task", module="tasks")
+        for n in ("created", "updated")
+    ]
+
+    with (
+        patch("core.config.settings.dashboard_data_dir", str(tmp_path)),
+        patch.object(service, "_append_sync") as mock_append,
+        patch("modules.activity.service.manager") as mock_manager,
+    ):
+        mock_manager.broadcast = AsyncMock()
+        events = asyncio.run(service.log_events(reqs))
+
+        stored = json.loads((tmp_path / "activity.json").read_text())
+        assert [e["action"] for e in stored] == ["task.updated", "task.created"]
+        assert [e.action for e in events] == ["task.created", "task.updated"]
+        mock_append.assert_not_called()
+        assert mock_manager.broadcast.await_count == 2
+
+
+# ---------------------------------------------------------------------------
+# Outbox
+# ---------------------------------------------------------------------------
+
+
+def _outbox_session(rows, *results):
+    """Fake session whose first execute selects `rows`; later ones return `results`."""
+    from unittest.mock import MagicMock
+
+    selected = MagicMock()
+    selected.all.return_value = rows
+    session = AsyncMock()
+    session.execute.side_effect = [selected, *(results or [MagicMock()])]
+    session_cm = MagicMock()
+    session_cm.__aenter__ = AsyncMock(return_value=session)
+    session_cm.__aexit__ = AsyncMock(return_value=False)
+    return session, session_cm
+
+
+async def test_outbox_dispatch_batch_logs_broadcasts_then_deletes():
+    from types import SimpleNamespace
+
+    from modules.activity import outbox
+
+    activity = {
+        "actor": "user",
+        "action": "task.created",
+        "resource_type": "task",
+        "module": "tasks",
+    }
+    rows = [
+        SimpleNamespace(id=1, topic="tasks:task:created", payload={"id": "7"}, activity=activity),
+        SimpleNamespace(id=2, topic="tasks:task:updated", payload={"id": "8"}, activity=None),
+    ]
+    session, session_cm = _outbox_session(rows)
+    dispatcher = outbox.OutboxDispatcher(batch_size=10)
+
+    with (
+        patch.object(outbox, "async_session", return_value=session_cm),
+        patch.object(outbox.activity_service, "log_events", new_callable=AsyncMock) as mock_log,
+        patch.object(outbox.manager, "broadcast", new_callable=AsyncMock) as mock_broadcast,
+    ):
+        # Record how many statements had run when each broadcast went out
+        sent_after: list[int] = []
+        mock_broadcast.side_effect = lambda *_: sent_after.append(session.execute.await_count)
+        delivered = await dispatcher.drain()
+
+    assert delivered == 2
+    assert [r.action for r in mock_log.await_args.args[0]] == ["task.created"]
+    assert [c.args[0] for c in mock_broadcast.await_args_list] == [
+        "tasks:task:created",
+        "tasks:task:updated",
+    ]
+    delete_params = session.execute.await_args_list[1].args[1]
+    assert delete_params == {"ids": [1, 2]}
+    # Both broadcasts went out after the SELECT and before the DELETE
+    assert sent_after == [1, 1]
+    session.commit.assert_awaited_once()
+
+
+async def test_outbox_defers_rows_when_activity_logging_fails():
+    from types import SimpleNamespace
+    from unittest.mock import MagicMock
+
+    from modules.activity import outbox
+
+    activity = {
+        "actor": "user",
+        "action": "task.created",
+        "resource_type": "task",
+        "module": "tasks",
+    }
+    rows = [
+        SimpleNamespace(id=1, topic="tasks:task:created", payload={}, activity=activity, attempts=0)
+    ]
+    dead = MagicMock()
+    dead.scalars.return_value.all.return_value = []
+    session, session_cm = _outbox_session(rows, MagicMock(), dead)
+
+    with (
+        patch.object(outbox, "async_session", return_value=session_cm),
+        patch.object(outbox.activity_service, "log_events", new_callable=AsyncMock) as mock_log,
+        patch.object(outbox.manager, "broadcast", new_callable=AsyncMock) as mock_broadcast,
+    ):
+        mock_log.side_effect = OSError("disk full")
+        taken = await outbox.OutboxDispatcher().dispatch_batch()
+
+    # Not deleted but pushed back with backoff, so later rows are not held up
+    assert taken == 1
+    statements = [str(c.args[0]) for c in session.execute.await_args_list]
+    assert not any(s.strip().startswith("DELETE FROM mc_outbox WHERE") for s in statements)
+    assert "available_at = now()" in statements[1]
+    assert session.execute.await_args_list[1].args[1]["ids"] == [1]
+    assert "INSERT INTO mc_outbox_dead" in statements[2]
+    session.commit.assert_awaited_once()
+    mock_broadcast.assert_not_awaited()
+
+
+async def test_outbox_isolates_a_poison_row():
+    from types import SimpleNamespace
+    from unittest.mock import MagicMock
+
+    from modules.activity import outbox
+
+    def _activity(action):
+        return {"actor": "user", "action": action, "resource_type": "task", "module": "tasks"}
+
+    rows = [
+        SimpleNamespace(id=1, topic="t:1", payload={}, activity=_activity("ok"), attempts=0),
+        SimpleNamespace(id=2, topic="t:2", payload={}, activity=_activity("bad"), attempts=3),
+        SimpleNamespace(id=3, topic="t:3", payload={}, activity={"actor": "user"}, attempts=0),
+        SimpleNamespace(id=4, topic="t:4", payload={}, activity=None, attempts=0),
+    ]
+    dead = MagicMock()
+    dead.scalars.return_value.all.return_value = [3]
+    session, session_cm = _outbox_session(rows, MagicMock(), MagicMock(), dead)
+
+    async def _log_events(reqs):
+        if any(r.action == "bad" for r in reqs):
+            raise ValueError("unwritable")
+        return []
+
+    with (
+        patch.object(outbox, "async_session", return_value=session_cm),
+        patch.object(outbox.activity_service, "log_events", side_effect=_log_events),
+        patch.object(outbox.manager, "broadcast", new_callable=AsyncMock) as mock_broadcast,
+    ):
+        await outbox.OutboxDispatcher().dispatch_batch()
+
+    calls = session.execute.await_args_list
+    assert calls[1].args[1] == {"ids": [1, 4]}
+    deferred = calls[2].args[1]
+    assert deferred["ids"] == [3, 2]
+    assert deferred["permanent"] == [True, False]
+    assert [c.args[0] for c in mock_broadcast.await_args_list] == ["t:1", "t:4"]
+
+
+async def test_outbox_enqueue_wakes_dispatcher_after_commit():
+    from unittest.mock import MagicMock
+
+    from sqlalchemy import event
+
+    from modules.activity import outbox
+    from modules.activity.models import ActivityLogRequest
+
+    session = AsyncMock()
+    session.sync_session = MagicMock()
+    with (
+        patch.object(event, "listen") as mock_listen,
+        patch.object(event, "contains", return_value=False),
+    ):
+        await outbox.enqueue(
+            session,
+            "tasks:task:created",
+            {"id": "7"},
+            ActivityLogRequest(
+                actor="user", action="task.created", resource_type="task", module="tasks"
+            ),
+        )
+
+    params = session.execute.await_args.args[1]
+    assert params["topic"] == "tasks:task:created"
+    assert '"action":"task.created"' in params["activity"]
+    mock_listen.assert_called_once()
+    assert mock_listen.call_args.args[1] == "after_commit"
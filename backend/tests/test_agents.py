@@ -121,6 +121,30 @@ def test_get_agent_log_empty():
         assert response.json()["entries"] == []
 
 
+def test_export_agent_log_empty_csv_is_header_only():
+    from unittest.mock import MagicMock
+
+    async def _partitions(size):
+        return
+        yield
+
+    result = MagicMock()
+    result.partitions = _partitions
+    result.keys.return_value = ["id", "agent_id", "level", "message", "metadata", "created_at"]
+    session = AsyncMock()
+    session.stream.return_value = result
+    session_cm = MagicMock()
+    session_cm.__aenter__ = AsyncMock(return_value=session)
+    session_cm.__aexit__ = AsyncMock(return_value=False)
+    with patch("core.export.async_session", return_value=session_cm):
+        response = client.get("/api/agents/matron/log/export?format=csv&level=WARNING")
+
+    assert response.status_code == 200
+    assert response.text.strip() == "id,agent_id,level,message,metadata,created_at"
+    assert 'filename="agent_log_matron.csv"' in response.headers["content-disposition"]
+    assert session.stream.await_args.args[1] == {"agent_id": "matron", "level": "warning"}
+
+
 def test_trigger_agent_success():
     """Should trigger agent via gateway."""
     with patch("modules.agents.service.AgentService.trigger_agent", new_callable=AsyncMock) as mock:
@@ -176,6 +200,63 @@ def test_list_agents_detailed():
         assert data[0]["responsibilities"] == ["Orchestration", "User interface"]
 
 
+async def test_list_agents_reads_agent_status():
+    """list_agents reads the per-agent status rows, never the log itself."""
+    from types import SimpleNamespace
+    from unittest.mock import MagicMock
+
+    from core.constants import KNOWN_AGENTS
+    from modules.agents.service import agent_service
+
+    row = SimpleNamespace(
+        agent="matron",
+        total_entries=61,
+        last_activity=datetime.datetime(2026, 2, 14, 9, 31, tzinfo=datetime.UTC),
+        last_message="Urgent check",
+        last_level="WARNING",
+        warning_count=3,
+    )
+    result = MagicMock()
+    result.fetchall.return_value = [row]
+    db = AsyncMock()
+    db.execute.return_value = result
+
+    agents = await agent_service.list_agents(db)
+
+    sql = str(db.execute.await_args.args[0])
+    assert "FROM agent_status" in sql
+    assert "agent_log" not in sql
+    matron = next(a for a in agents if a.agent_id == "matron")
+    assert matron.total_entries == 61
+    assert matron.last_level == "warning"
+    assert matron.warning_count == 3
+    assert len(agents) == len(KNOWN_AGENTS)
+
+
+async def test_office_view_reads_agent_status():
+    """Agents active in the last hour, per agent_status, are working."""
+    from types import SimpleNamespace
+    from unittest.mock import MagicMock
+
+    from modules.agents.service import agent_service
+
+    seen = datetime.datetime(2026, 3, 5, 12, 0, tzinfo=datetime.UTC)
+    result = MagicMock()
+    result.fetchall.return_value = [
+        SimpleNamespace(agent="matron", last_seen=seen, message="Checking emails")
+    ]
+    db = AsyncMock()
+    db.execute.return_value = result
+
+    view = await agent_service.get_office_view(db)
+
+    assert "FROM agent_status" in str(db.execute.await_args.args[0])
+    matron = next(w for w in view.workstations if w.agent_id == "matron")
+    assert matron.status == "working"
+    assert matron.current_task == "Checking emails"
+    assert view.office_stats["active_agents"] == 1
+
+
 # --- Office view tests (merged from Office module) ---
 
 
@@ -4,6 +4,7 @@ from unittest.mock import AsyncMock, patch
 from uuid import uuid4
 from datetime import datetime, timezone
 
+import pytest
 from fastapi.testclient import TestClient
 
 from main import app
@@ -51,7 +52,7 @@ def test_modules_includes_runs():
 
 def test_ingest_creates_run():
     with patch("modules.runs.service.RunsService.ingest", new_callable=AsyncMock) as mock_ingest:
-        mock_ingest.return_value = _SAMPLE_RUN
+        mock_ingest.return_value = (_SAMPLE_RUN, "created")
         response = client.post(
             "/api/runs/ingest",
             json={
@@ -74,6 +75,110 @@ def test_ingest_creates_run():
         mock_ingest.assert_called_once()
 
 
+def test_ingest_retry_updates_without_logging():
+    with (
+        patch("modules.runs.service.RunsService.ingest", new_callable=AsyncMock) as mock_ingest,
+        patch(
+            "modules.activity.service.activity_service.log_event", new_callable=AsyncMock
+        ) as mock_log,
+    ):
+        mock_ingest.return_value = (_SAMPLE_RUN, "updated")
+        response = client.post(
+            "/api/runs/ingest",
+            json={"agent_id": "dev-impl", "session_key": "s-1", "status": "running"},
+            headers={"X-MC-Token": _TOKEN},
+        )
+        assert response.status_code == 200
+        mock_log.assert_not_awaited()
+
+        mock_ingest.return_value = (_SAMPLE_RUN, "completed")
+        response = client.post(
+            "/api/runs/ingest",
+            json={"agent_id": "dev-impl", "session_key": "s-1", "outcome": "success"},
+            headers={"X-MC-Token": _TOKEN},
+        )
+        assert response.status_code == 200
+        mock_log.assert_awaited_once()
+
+
+async def test_ingest_upserts_on_idempotency_key():
+    from unittest.mock import MagicMock
+
+    from modules.runs import service
+    from modules.runs.models import AgentRunCreate
+
+    row = MagicMock()
+    row._mapping = {**_SAMPLE_RUN.model_dump(), "change": "completed"}
+    result = MagicMock()
+    result.fetchone.return_value = row
+    session = AsyncMock()
+    session.execute.return_value = result
+    session_cm = MagicMock()
+    session_cm.__aenter__ = AsyncMock(return_value=session)
+    session_cm.__aexit__ = AsyncMock(return_value=False)
+    with patch.object(service, "async_session", return_value=session_cm):
+        run, change = await service.runs_service.ingest(
+            AgentRunCreate(agent_id="dev-impl", session_key="s-1", outcome="success")
+        )
+
+    assert change == "completed"
+    assert run.id == _SAMPLE_RUN.id
+    sql = str(session.execute.await_args.args[0])
+    params = session.execute.await_args.args[1]
+    assert "agent_run_keys" in sql
+    assert "ON CONFLICT (key)" in sql
+    assert params["key"] == "s-1:task"
+    session.commit.assert_awaited_once()
+
+
+async def test_ingest_gives_up_when_key_never_resolves():
+    from unittest.mock import MagicMock
+
+    from modules.runs import service
+    from modules.runs.models import AgentRunCreate
+
+    result = MagicMock()
+    result.fetchone.return_value = None
+    session = AsyncMock()
+    session.execute.return_value = result
+    session_cm = MagicMock()
+    session_cm.__aenter__ = AsyncMock(return_value=session)
+    session_cm.__aexit__ = AsyncMock(return_value=False)
+    with (
+        patch.object(service, "async_session", return_value=session_cm),
+        pytest.raises(ValueError, match="s-1:task"),
+    ):
+        await service.runs_service.ingest(AgentRunCreate(agent_id="dev-impl", session_key="s-1"))
+
+    # Three ingest attempts plus the stale-key delete before the last one
+    assert session.execute.await_count == 4
+    session.commit.assert_not_awaited()
+
+
+def test_ingest_contended_key_conflicts():
+    with patch("modules.runs.service.RunsService.ingest", new_callable=AsyncMock) as mock_ingest:
+        mock_ingest.side_effect = ValueError("Could not record run for idempotency key 's-1'")
+        response = client.post(
+            "/api/runs/ingest",
+            json={"agent_id": "dev-impl", "session_key": "s-1"},
+            headers={"X-MC-Token": _TOKEN},
+        )
+        assert response.status_code == 409
+
+
+def test_idempotency_key_defaults_to_session_and_type():
+    from modules.runs.models import AgentRunCreate
+    from modules.runs.service import _idempotency_key
+
+    assert _idempotency_key(AgentRunCreate(agent_id="a")) is None
+    assert _idempotency_key(AgentRunCreate(agent_id="a", session_key="s", run_type="cron")) == (
+        "s:cron"
+    )
+    assert _idempotency_key(AgentRunCreate(agent_id="a", session_key="s", idempotency_key="k")) == (
+        "k"
+    )
+
+
 def test_ingest_rejects_bad_token():
     response = client.post(
         "/api/runs/ingest",
@@ -91,6 +196,161 @@ def test_ingest_rejects_missing_token():
     assert response.status_code == 422  # Missing required header
 
 
+def test_ingest_batch_ndjson_reports_rows():
+    ids = [uuid4(), uuid4()]
+    body = (
+        '{"agent_id": "dev-impl", "outcome": "success", "tokens_used": 10}\n'
+        "not json\n"
+        '{"run_type": "task"}\n'
+        '{"agent_id": "builder", "duration_ms": 50}\n'
+        "\n"
+    )
+    with (
+        patch("modules.runs.service.RunsService.ingest_batch", new_callable=AsyncMock) as mock,
+        patch(
+            "modules.activity.service.activity_service.log_event", new_callable=AsyncMock
+        ) as mock_log,
+    ):
+        mock.return_value = (ids, set())
+        response = client.post(
+            "/api/runs/ingest/batch",
+            content=body,
+            headers={"X-MC-Token": _TOKEN, "Content-Type": "application/x-ndjson"},
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["ids"] == [str(ids[0]), None, None, str(ids[1])]
+        assert data["inserted"] == 2
+        assert [e["index"] for e in data["errors"]] == [1, 2]
+        assert "agent_id" in data["errors"][1]["error"]
+        assert [p.agent_id for p in mock.call_args.args[0]] == ["dev-impl", "builder"]
+        mock_log.assert_awaited_once()
+        details = mock_log.call_args.args[0].details
+        assert details["agents"] == {"dev-impl": 1, "builder": 1}
+        assert details["rejected"] == 2
+
+
+def test_ingest_batch_json_array_with_service_rejects():
+    run_id = uuid4()
+    with (
+        patch("modules.runs.service.RunsService.ingest_batch", new_callable=AsyncMock) as mock,
+        patch("modules.activity.service.activity_service.log_event", new_callable=AsyncMock),
+    ):
+        mock.return_value = ([run_id, "status is longer than 20 characters"], set())
+        response = client.post(
+            "/api/runs/ingest/batch",
+            json=[{"agent_id": "a"}, {"agent_id": "b", "status": "x" * 30}],
+            headers={"X-MC-Token": _TOKEN},
+        )
+        assert response.status_code == 200
+        assert response.json()["errors"] == [
+            {"index": 1, "error": "status is longer than 20 characters"}
+        ]
+
+
+def test_ingest_batch_rejects_empty_and_oversized():
+    headers = {"X-MC-Token": _TOKEN}
+    assert client.post("/api/runs/ingest/batch", json=[], headers=headers).status_code == 422
+    assert client.post("/api/runs/ingest/batch", json={}, headers=headers).status_code == 422
+    with patch("core.config.settings.runs_ingest_batch_max", 2):
+        response = client.post(
+            "/api/runs/ingest/batch", json=[{"agent_id": "a"}] * 3, headers=headers
+        )
+        assert response.status_code == 413
+
+
+async def test_ingest_batch_inserts_valid_rows_in_one_statement():
+    from unittest.mock import MagicMock
+
+    from modules.runs import service
+    from modules.runs.models import AgentRunCreate
+
+    session = AsyncMock()
+    session_cm = MagicMock()
+    session_cm.__aenter__ = AsyncMock(return_value=session)
+    session_cm.__aexit__ = AsyncMock(return_value=False)
+    payloads = [
+        AgentRunCreate(agent_id="dev-impl", metadata={"k": 1}, outcome="success"),
+        AgentRunCreate(agent_id="x" * 101),
+        AgentRunCreate(agent_id="builder", tokens_used=2**31),
+        AgentRunCreate(agent_id="builder"),
+    ]
+    with patch.object(service, "async_session", return_value=session_cm):
+        results, duplicates = await service.runs_service.ingest_batch(payloads)
+    assert duplicates == set()
+    assert [type(r).__name__ for r in results] == ["UUID", "str", "str", "UUID"]
+    assert "agent_id" in results[1]
+    session.execute.assert_awaited_once()
+    sql = str(session.execute.await_args.args[0])
+    params = session.execute.await_args.args[1]
+    assert "unnest(" in sql
+    assert params["agent_id"] == ["dev-impl", "builder"]
+    assert params["metadata"] == ['{"k": 1}', None]
+    assert params["completed_at"][1] is None
+    session.commit.assert_awaited_once()
+
+
+async def test_ingest_batch_skips_rows_whose_key_has_a_run():
+    from unittest.mock import MagicMock
+
+    from modules.runs import service
+    from modules.runs.models import AgentRunCreate
+
+    existing = uuid4()
+    session = AsyncMock()
+
+    async def _execute(statement, params=None):
+        result = MagicMock()
+        if "SELECT key, run_id" in str(statement):
+            claimed = _execute.claimed
+            result.fetchall.return_value = [
+                MagicMock(_mapping={"key": "s-1:task", "run_id": existing}),
+                MagicMock(_mapping={"key": "s-2:task", "run_id": claimed["s-2:task"]}),
+            ]
+        elif "agent_run_keys" in str(statement):
+            _execute.claimed = dict(zip(params["keys"], params["ids"], strict=True))
+        return result
+
+    session.execute.side_effect = _execute
+    session_cm = MagicMock()
+    session_cm.__aenter__ = AsyncMock(return_value=session)
+    session_cm.__aexit__ = AsyncMock(return_value=False)
+    payloads = [
+        AgentRunCreate(agent_id="a", session_key="s-1"),
+        AgentRunCreate(agent_id="a", session_key="s-2"),
+        AgentRunCreate(agent_id="b"),
+    ]
+    with patch.object(service, "async_session", return_value=session_cm):
+        results, duplicates = await service.runs_service.ingest_batch(payloads)
+
+    assert duplicates == {0}
+    assert results[0] == existing
+    insert = session.execute.await_args_list[-1].args[1]
+    assert insert["agent_id"] == ["a", "b"]
+    assert insert["id"] == [results[1], results[2]]
+
+
+def test_ingest_batch_counts_duplicates():
+    run_ids = [uuid4(), uuid4()]
+    with (
+        patch("modules.runs.service.RunsService.ingest_batch", new_callable=AsyncMock) as mock,
+        patch(
+            "modules.activity.service.activity_service.log_event", new_callable=AsyncMock
+        ) as mock_log,
+    ):
+        mock.return_value = (run_ids, {0})
+        response = client.post(
+            "/api/runs/ingest/batch",
+            json=[{"agent_id": "a", "session_key": "s"}, {"agent_id": "b"}],
+            headers={"X-MC-Token": _TOKEN},
+        )
+        data = response.json()
+        assert data["inserted"] == 1
+        assert data["duplicates"] == 1
+        assert data["ids"] == [str(i) for i in run_ids]
+        assert mock_log.call_args.args[0].details["duplicates"] == 1
+
+
 # ---------------------------------------------------------------------------
 # List with filters
 # ---------------------------------------------------------------------------
@@ -118,6 +378,115 @@ def test_list_runs_with_filters():
         assert call_kwargs["date_from"] == "2026-03-01"
 
 
+def test_list_runs_invalid_cursor():
+    with patch("modules.runs.service.RunsService.list_runs", new_callable=AsyncMock) as mock_list:
+        mock_list.side_effect = ValueError("Invalid cursor")
+        response = client.get("/api/runs/?cursor=garbage")
+        assert response.status_code == 422
+
+
+def test_run_cursor_round_trip():
+    from modules.runs.service import _decode_cursor, _encode_cursor
+
+    cursor = _encode_cursor({"created_at": _SAMPLE_RUN.created_at, "id": _SAMPLE_RUN.id})
+    assert _decode_cursor(cursor) == (_SAMPLE_RUN.created_at, _SAMPLE_RUN.id)
+
+
+def test_run_filters_use_rollup_only_when_exact():
+    from modules.runs.service import _run_filters
+
+    _, params, rollup = _run_filters("dev-impl", "2026-03-01", "2026-03-31", "success")
+    assert rollup == (["agent_id = :agent_id", "day >= :day_from", "day <= :day_to"], "succeeded")
+    assert params["date_from"] == datetime(2026, 3, 1, tzinfo=timezone.utc)
+    assert params["date_to"] == datetime(2026, 4, 1, tzinfo=timezone.utc)
+
+    assert _run_filters(date_from="2026-03-01T12:00:00")[2] is None
+    assert _run_filters(outcome="partial")[2] is None
+    assert _run_filters(trigger="cron")[2] is None
+    assert _run_filters()[2] == ([], "runs")
+
+
+def test_run_filters_skip_rollup_before_retention_horizon():
+    from modules.runs import service
+
+    with patch.object(service.settings, "runs_retention_months", 3):
+        horizon = service.retention_horizon(3)
+        assert service._run_filters()[2] is None
+        assert service._run_filters(date_from="2000-01-01")[2] is None
+        assert service._run_filters(date_from=horizon.isoformat())[2] is not None
+
+
+async def test_list_runs_pages_by_cursor_with_estimated_total():
+    from types import SimpleNamespace
+    from unittest.mock import MagicMock
+
+    from modules.runs import service
+
+    def _scalar(value):
+        result = MagicMock()
+        result.scalar.return_value = value
+        return result
+
+    rows = MagicMock()
+    rows.fetchall.return_value = [
+        SimpleNamespace(_mapping=_SAMPLE_RUN.model_dump() | {"id": uuid4()}) for _ in range(3)
+    ]
+    session = AsyncMock()
+    session.execute.side_effect = [
+        _scalar(service._EXACT_COUNT_LIMIT),
+        _scalar('[{"Plan": {"Plan Rows": 250000}}]'),
+        rows,
+    ]
+    session_cm = MagicMock()
+    session_cm.__aenter__ = AsyncMock(return_value=session)
+    session_cm.__aexit__ = AsyncMock(return_value=False)
+    cursor = service._encode_cursor({"created_at": _SAMPLE_RUN.created_at, "id": _SAMPLE_RUN.id})
+    with patch.object(service, "async_session", return_value=session_cm):
+        result = await service.runs_service.list_runs(page_size=2, trigger="cron", cursor=cursor)
+    assert (result.total, result.total_exact) == (250000, False)
+    assert len(result.items) == 2
+    assert service._decode_cursor(result.next_cursor)[1] == result.items[1].id
+    page_sql = str(session.execute.await_args.args[0])
+    assert "(created_at, id) < (:c_created_at, :c_id)" in page_sql
+    assert "OFFSET" in page_sql and session.execute.await_args.args[1]["offset"] == 0
+
+
+def test_export_runs_streams_ndjson_in_chunks():
+    import json
+    from types import SimpleNamespace
+    from unittest.mock import MagicMock
+
+    run = _SAMPLE_RUN.model_dump()
+
+    async def _partitions(size):
+        yield [SimpleNamespace(_mapping=run), SimpleNamespace(_mapping=run | {"id": uuid4()})]
+        yield [SimpleNamespace(_mapping=run | {"id": uuid4(), "metadata": {"k": 1}})]
+
+    result = MagicMock()
+    result.partitions = _partitions
+    session = AsyncMock()
+    session.stream.return_value = result
+    session_cm = MagicMock()
+    session_cm.__aenter__ = AsyncMock(return_value=session)
+    session_cm.__aexit__ = AsyncMock(return_value=False)
+    with patch("core.export.async_session", return_value=session_cm):
+        response = client.get("/api/runs/export?agent_id=dev-impl&date_from=2026-03-01")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == 3
+    assert lines[0]["id"] == str(_SAMPLE_RUN.id)
+    assert lines[0]["created_at"] == _SAMPLE_RUN.created_at.isoformat()
+    assert lines[2]["metadata"] == {"k": 1}
+    sql, params = session.stream.await_args.args
+    assert "ORDER BY created_at DESC, id DESC" in str(sql)
+    assert params["agent_id"] == "dev-impl"
+
+    assert client.get("/api/runs/export?date_from=nope").status_code == 422
+    assert client.get("/api/runs/export?format=xml").status_code == 422
+
+
 # ---------------------------------------------------------------------------
 # Single run
 # ---------------------------------------------------------------------------
@@ -143,9 +512,206 @@ def test_get_run_found():
 # ---------------------------------------------------------------------------
 
 
+def test_day_summary():
+    from modules.runs.models import AgentDaySummary, DaySummary
+
+    summary = DaySummary(
+        date="2026-03-01",
+        runs=3,
+        succeeded=2,
+        agents=[
+            AgentDaySummary(
+                agent_id="dev-impl",
+                runs=3,
+                succeeded=2,
+                failed=1,
+                timed_out=0,
+                tokens_used=900,
+                duration_ms=4000,
+            )
+        ],
+    )
+    with patch("modules.runs.service.RunsService.get_day_summary", new_callable=AsyncMock) as mock:
+        mock.return_value = summary
+        response = client.get("/api/runs/day/summary?date=2026-03-01")
+        assert response.status_code == 200
+        assert response.json()["agents"][0]["tokens_used"] == 900
+        mock.side_effect = ValueError("Invalid isoformat string")
+        assert client.get("/api/runs/day/summary?date=nope").status_code == 422
+
+
+async def test_heatmap_reads_rollup_and_caches_past_years():
+    from datetime import date
+    from types import SimpleNamespace
+    from unittest.mock import MagicMock
+
+    from modules.runs import service
+
+    def _rows():
+        result = MagicMock()
+        result.fetchall.return_value = [
+            SimpleNamespace(_mapping={"day": date(2025, 3, 1), "agent_id": "a", "cnt": 2}),
+            SimpleNamespace(_mapping={"day": date(2025, 3, 1), "agent_id": "b", "cnt": 1}),
+        ]
+        return result
+
+    session = AsyncMock()
+    session.execute.side_effect = [_rows(), _rows(), _rows()]
+    session_cm = MagicMock()
+    session_cm.__aenter__ = AsyncMock(return_value=session)
+    session_cm.__aexit__ = AsyncMock(return_value=False)
+    runs = service.RunsService()
+    current = datetime.now(timezone.utc).year
+    with patch.object(service, "async_session", return_value=session_cm):
+        past = await runs.get_heatmap(current - 1)
+        assert await runs.get_heatmap(current - 1) is past
+        await runs.get_heatmap(current)
+        await runs.get_heatmap(current)
+    assert [(d.date, d.count) for d in past] == [("2025-03-01", 3)]
+    assert session.execute.await_count == 3
+    assert "FROM agent_runs_daily" in str(session.execute.await_args.args[0])
+
+
 def test_heatmap():
     with patch("modules.runs.service.RunsService.get_heatmap", new_callable=AsyncMock) as mock:
         mock.return_value = []
         response = client.get("/api/runs/heatmap?year=2026")
         assert response.status_code == 200
         assert response.json() == []
+
+
+# ---------------------------------------------------------------------------
+# Analytics
+# ---------------------------------------------------------------------------
+
+
+def test_sketch_percentiles_within_two_percent():
+    import math
+    import random
+    from collections import Counter
+
+    from modules.runs.service import _SKETCH_GAMMA, _percentiles
+
+    rng = random.Random(7)
+    values = sorted(int(rng.lognormvariate(8, 1.5)) + 1 for _ in range(5000))
+    buckets = Counter(1 + math.ceil(math.log(v) / math.log(_SKETCH_GAMMA)) for v in values)
+    result = _percentiles(buckets)
+    assert result.samples == 5000
+    for name, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+        exact = values[int(q * (len(values) - 1))]
+        assert abs(getattr(result, name) - exact) <= 0.02 * exact + 0.1
+    assert _percentiles(Counter()).p50 is None
+
+
+async def test_analytics_merges_days_per_agent_and_run_type():
+    from types import SimpleNamespace
+    from unittest.mock import MagicMock
+
+    from modules.runs import service
+
+    def _rows(*mappings):
+        result = MagicMock()
+        result.fetchall.return_value = [SimpleNamespace(_mapping=m) for m in mappings]
+        return result
+
+    run = {"agent_id": "dev-impl", "run_type": "task"}
+    session = AsyncMock()
+    session.execute.side_effect = [
+        _rows(
+            run | {"outcome": "success", "n": 3},
+            run | {"outcome": "", "n": 1},
+            {"agent_id": "qa", "run_type": "cron", "outcome": "error", "n": 2},
+        ),
+        _rows(
+            run | {"measure": "duration_ms", "bucket": 100, "n": 2},
+            run | {"measure": "duration_ms", "bucket": 200, "n": 2},
+        ),
+    ]
+    session_cm = MagicMock()
+    session_cm.__aenter__ = AsyncMock(return_value=session)
+    session_cm.__aexit__ = AsyncMock(return_value=False)
+    with patch.object(service, "async_session", return_value=session_cm):
+        result = await service.runs_service.get_analytics("2026-01-01", "2026-03-31")
+
+    assert (result.overall.runs, result.overall.success_rate) == (6, 0.5)
+    assert [a.key for a in result.agents] == ["dev-impl", "qa"]
+    dev = result.agents[0]
+    assert dev.outcomes == {"success": 3, "none": 1}
+    assert dev.duration_ms.samples == 4
+    assert dev.duration_ms.p50 == round(service._bucket_value(100), 1)
+    assert dev.duration_ms.p99 == round(service._bucket_value(200), 1)
+    assert result.agents[1].duration_ms.p50 is None
+    assert [t.key for t in result.run_types] == ["task", "cron"]
+    assert "agent_runs_daily_sketch" in str(session.execute.await_args.args[0])
+
+    with pytest.raises(ValueError):
+        await service.runs_service.get_analytics("2026-03-31", "2026-01-01")
+
+
+def test_analytics_route():
+    from modules.runs.models import RunAnalytics, RunStats
+
+    analytics = RunAnalytics(
+        date_from="2026-03-01", date_to="2026-03-07", overall=RunStats(key="", runs=0)
+    )
+    with patch("modules.runs.service.RunsService.get_analytics", new_callable=AsyncMock) as mock:
+        mock.return_value = analytics
+        response = client.get("/api/runs/analytics?date_from=2026-03-01&agent_id=qa")
+        assert response.status_code == 200
+        assert response.json()["date_to"] == "2026-03-07"
+        mock.assert_awaited_once_with("2026-03-01", None, "qa")
+        mock.side_effect = ValueError("date_from must not be after date_to")
+        assert client.get("/api/runs/analytics?date_from=2027-01-01").status_code == 422
+
+
+# ---------------------------------------------------------------------------
+# Partitions
+# ---------------------------------------------------------------------------
+
+
+def test_retention_horizon():
+    from datetime import date
+
+    from modules.runs.partitions import retention_horizon
+
+    assert retention_horizon(0) is None
+    assert retention_horizon(3, date(2026, 10, 17)) == date(2026, 7, 1)
+    assert retention_horizon(12, date(2026, 2, 28)) == date(2025, 2, 1)
+
+
+async def test_maintain_partitions_creates_ahead_and_retires_by_table():
+    from unittest.mock import MagicMock
+
+    from modules.runs import partitions
+
+    def _names(*names):
+        result = MagicMock()
+        result.scalars.return_value.all.return_value = list(names)
+        return result
+
+    session = AsyncMock()
+    session.execute.side_effect = [
+        _names("agent_runs_2027_01"),
+        _names("agent_runs_legacy", "agent_runs_2026_01"),
+        _names(),
+        MagicMock(),
+    ]
+    session_cm = MagicMock()
+    session_cm.__aenter__ = AsyncMock(return_value=session)
+    session_cm.__aexit__ = AsyncMock(return_value=False)
+    with (
+        patch.object(partitions, "async_session", return_value=session_cm),
+        patch.object(partitions.settings, "runs_retention_months", 6),
+        patch.object(partitions.settings, "agent_log_retention_months", 0),
+    ):
+        created, retired = await partitions.maintain_partitions()
+
+    assert created == ["agent_runs_2027_01"]
+    assert retired == ["agent_runs_legacy", "agent_runs_2026_01"]
+    calls = session.execute.await_args_list
+    assert "mc_drop_month_partitions" in str(calls[1].args[0])
+    assert calls[1].args[1] == {"table": "agent_runs", "keep": 6, "detach_only": False}
+    assert calls[2].args[1]["table"] == "agent_log"
+    assert "mc_month_partitions" in str(calls[2].args[0])
+    assert "DELETE FROM agent_run_keys" in str(calls[3].args[0])
+    session.commit.assert_awaited_once()
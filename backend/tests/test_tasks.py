@@ -63,7 +63,9 @@ def test_list_tasks_filter_by_project():
         mock.return_value = []
         response = client.get("/api/tasks/?project=matron")
         assert response.status_code == 200
-        mock.assert_called_once_with(project="matron", priority=None, tags=None, status=None)
+        mock.assert_called_once_with(
+            project="matron", priority=None, tags=None, status=None, include_archived=False
+        )
 
 
 def test_list_tasks_filter_by_priority():
@@ -71,7 +73,9 @@ def test_list_tasks_filter_by_priority():
         mock.return_value = []
         response = client.get("/api/tasks/?priority=urgent")
         assert response.status_code == 200
-        mock.assert_called_once_with(project=None, priority="urgent", tags=None, status=None)
+        mock.assert_called_once_with(
+            project=None, priority="urgent", tags=None, status=None, include_archived=False
+        )
 
 
 def test_list_tasks_filter_by_status():
@@ -79,7 +83,439 @@ def test_list_tasks_filter_by_status():
         mock.return_value = []
         response = client.get("/api/tasks/?status=in-progress")
         assert response.status_code == 200
-        mock.assert_called_once_with(project=None, priority=None, tags=None, status="in-progress")
+        mock.assert_called_once_with(
+            project=None, priority=None, tags=None, status="in-progress", include_archived=False
+        )
+
+
+def test_list_tasks_paged_sets_next_cursor_header():
+    from modules.tasks.models import TaskPage
+
+    page = TaskPage(items=[{"id": "1", "title": "First"}], next_cursor="abc")
+    with patch("modules.tasks.service.list_tasks_page", new_callable=AsyncMock) as mock:
+        mock.return_value = page
+        response = client.get("/api/tasks/?limit=1&fields=id,title")
+        assert response.status_code == 200
+        assert response.json() == [{"id": "1", "title": "First"}]
+        assert response.headers["X-Next-Cursor"] == "abc"
+        assert mock.call_args.kwargs["limit"] == 1
+        assert mock.call_args.kwargs["fields"] == ["id", "title"]
+
+
+def test_list_tasks_card_view():
+    from modules.tasks.models import TASK_CARD_FIELDS, TaskPage
+
+    with patch("modules.tasks.service.list_tasks_page", new_callable=AsyncMock) as mock:
+        mock.return_value = TaskPage(items=[])
+        response = client.get("/api/tasks/?view=card&status=todo")
+        assert response.status_code == 200
+        assert "X-Next-Cursor" not in response.headers
+        assert mock.call_args.kwargs["fields"] == TASK_CARD_FIELDS
+        assert mock.call_args.kwargs["limit"] == 100
+        assert mock.call_args.kwargs["status"] == "todo"
+
+
+def test_list_tasks_invalid_cursor():
+    with patch("modules.tasks.service.list_tasks_page", new_callable=AsyncMock) as mock:
+        mock.side_effect = ValueError("Invalid cursor")
+        response = client.get("/api/tasks/?cursor=garbage")
+        assert response.status_code == 422
+
+
+def test_list_cursor_round_trip():
+    from datetime import datetime, timezone
+
+    from modules.tasks.service import _decode_cursor, _encode_cursor
+
+    created = datetime(2026, 2, 1, 12, 30, tzinfo=timezone.utc)
+    cursor = _encode_cursor({"priority": 2, "created_at": created, "id": 42})
+    assert _decode_cursor(cursor) == (2, created, 42)
+
+
+# ---------------------------------------------------------------------------
+# Delta sync
+# ---------------------------------------------------------------------------
+
+
+def test_list_changes_returns_rows_and_tombstones():
+    from modules.tasks.models import Task, TaskChanges
+
+    stamp = "2026-02-18T00:00:00+00:00"
+    changes = TaskChanges(
+        version=17,
+        changed=[Task(id="5", title="Edited", createdAt=stamp, updatedAt=stamp)],
+        deleted=["9"],
+    )
+    with patch("modules.tasks.service.list_changes", new_callable=AsyncMock) as mock:
+        mock.return_value = changes
+        response = client.get("/api/tasks/changes?since=12")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["version"] == 17
+        assert [t["id"] for t in data["changed"]] == ["5"]
+        assert data["deleted"] == ["9"]
+        assert data["reset"] is False
+        mock.assert_called_once_with(12, limit=500)
+
+
+def test_list_changes_bootstrap_without_since():
+    from modules.tasks.models import TaskChanges
+
+    with patch("modules.tasks.service.list_changes", new_callable=AsyncMock) as mock:
+        mock.return_value = TaskChanges(version=40)
+        response = client.get("/api/tasks/changes")
+        assert response.status_code == 200
+        assert response.json()["version"] == 40
+        mock.assert_called_once_with(None, limit=500)
+
+
+def test_list_changes_rejects_negative_since():
+    response = client.get("/api/tasks/changes?since=-1")
+    assert response.status_code == 422
+
+
+async def test_list_changes_splits_tombstones_and_pages():
+    from datetime import UTC, datetime
+    from types import SimpleNamespace
+    from unittest.mock import MagicMock
+
+    from modules.tasks import service
+
+    stamp = datetime(2026, 2, 18, tzinfo=UTC)
+
+    def _row(version, task_id, deleted):
+        mapping = {
+            "change_version": version,
+            "change_task_id": task_id,
+            "change_deleted": deleted,
+            "id": None if deleted else task_id,
+            "title": f"Task {task_id}",
+            "created_at": stamp,
+            "updated_at": stamp,
+        }
+        return SimpleNamespace(_mapping=mapping)
+
+    horizon = MagicMock()
+    horizon.scalar_one.return_value = 0
+    rows = MagicMock()
+    rows.all.return_value = [_row(3, 1, False), _row(4, 2, True), _row(6, 3, False)]
+    session = AsyncMock()
+    session.execute.side_effect = [horizon, rows]
+    session_cm = MagicMock()
+    session_cm.__aenter__ = AsyncMock(return_value=session)
+    session_cm.__aexit__ = AsyncMock(return_value=False)
+
+    with patch.object(service, "async_session", return_value=session_cm):
+        changes = await service.list_changes(2, limit=2)
+
+    assert changes.version == 4
+    assert changes.has_more is True
+    assert [t.id for t in changes.changed] == ["1"]
+    assert changes.deleted == ["2"]
+
+
+# ---------------------------------------------------------------------------
+# Search
+# ---------------------------------------------------------------------------
+
+
+def test_search_tasks_returns_ranked_hits():
+    from modules.tasks.models import Task, TaskSearchHit, TaskSearchPage
+
+    stamp = "2026-02-18T00:00:00+00:00"
+    hit = TaskSearchHit(
+        task=Task(id="7", title="Fix login redirect", createdAt=stamp, updatedAt=stamp),
+        rank=0.42,
+        titleHighlight="Fix <mark>login</mark> redirect",
+        snippet="",
+    )
+    with patch("modules.tasks.service.search_tasks", new_callable=AsyncMock) as mock:
+        mock.return_value = TaskSearchPage(items=[hit], next_cursor="abc")
+        response = client.get("/api/tasks/search?q=login&project=web&limit=1")
+        assert response.status_code == 200
+        assert response.headers["X-Next-Cursor"] == "abc"
+        data = response.json()
+        assert data[0]["task"]["id"] == "7"
+        assert data[0]["titleHighlight"] == "Fix <mark>login</mark> redirect"
+        mock.assert_called_once_with(
+            "login",
+            project="web",
+            priority=None,
+            tags=None,
+            status=None,
+            limit=1,
+            cursor=None,
+            include_archived=False,
+        )
+
+
+def test_search_tasks_include_archived():
+    from modules.tasks.models import TaskSearchPage
+
+    with patch("modules.tasks.service.search_tasks", new_callable=AsyncMock) as mock:
+        mock.return_value = TaskSearchPage(items=[])
+        response = client.get("/api/tasks/search?q=login&include_archived=true")
+        assert response.status_code == 200
+        assert mock.call_args.kwargs["include_archived"] is True
+
+
+def test_list_and_export_tasks_pass_include_archived():
+    from modules.tasks.models import TaskPage
+
+    with (
+        patch("modules.tasks.service.list_tasks", new_callable=AsyncMock) as mock_list,
+        patch("modules.tasks.service.list_tasks_page", new_callable=AsyncMock) as mock_page,
+        patch("modules.tasks.service.export_tasks") as mock_export,
+    ):
+        mock_list.return_value = []
+        mock_page.return_value = TaskPage(items=[])
+        mock_export.return_value = iter([b""])
+        assert client.get("/api/tasks/?include_archived=true").status_code == 200
+        assert client.get("/api/tasks/?limit=5&include_archived=true").status_code == 200
+        assert client.get("/api/tasks/export?include_archived=true").status_code == 200
+    assert mock_list.call_args.kwargs["include_archived"] is True
+    assert mock_page.call_args.kwargs["include_archived"] is True
+    assert mock_export.call_args.kwargs["include_archived"] is True
+
+
+async def test_list_tasks_page_reads_archive_only_when_asked():
+    from unittest.mock import MagicMock
+
+    from modules.tasks import service
+
+    session = AsyncMock()
+    session.execute.return_value = MagicMock(all=MagicMock(return_value=[]))
+    session_cm = MagicMock()
+    session_cm.__aenter__ = AsyncMock(return_value=session)
+    session_cm.__aexit__ = AsyncMock(return_value=False)
+    with patch.object(service, "async_session", return_value=session_cm):
+        await service.list_tasks_page(status="done", fields=["id"])
+        assert "FROM mc_tasks\n" in str(session.execute.await_args.args[0])
+        await service.list_tasks_page(status="done", fields=["id"], include_archived=True)
+        assert "FROM mc_tasks_all" in str(session.execute.await_args.args[0])
+
+
+def test_search_tasks_requires_query():
+    response = client.get("/api/tasks/search")
+    assert response.status_code == 422
+
+
+def test_search_tasks_invalid_cursor():
+    with patch("modules.tasks.service.search_tasks", new_callable=AsyncMock) as mock:
+        mock.side_effect = ValueError("Invalid cursor")
+        response = client.get("/api/tasks/search?q=login&cursor=garbage")
+        assert response.status_code == 422
+
+
+def test_search_cursor_round_trip():
+    from modules.tasks.service import _decode_search_cursor, _encode_search_cursor
+
+    cursor = _encode_search_cursor({"rank": 0.123456789, "id": 42})
+    assert _decode_search_cursor(cursor) == (0.123456789, 42)
+
+
+def test_task_fields_cover_task_model():
+    from modules.tasks.models import (
+        TASK_CARD_FIELDS,
+        TASK_COUNT_FIELDS,
+        TASK_FIELD_COLUMNS,
+        Task,
+        TaskListItem,
+    )
+
+    assert set(TASK_FIELD_COLUMNS) == set(Task.model_fields)
+    assert set(TASK_COUNT_FIELDS) == set(TaskListItem.model_fields) - set(Task.model_fields)
+    assert set(TASK_CARD_FIELDS) <= set(TASK_FIELD_COLUMNS) | set(TASK_COUNT_FIELDS)
+
+
+async def test_list_tasks_attaches_batched_counts():
+    from datetime import UTC, datetime
+    from types import SimpleNamespace
+    from unittest.mock import MagicMock
+
+    from modules.tasks import service
+
+    created = datetime(2026, 2, 1, tzinfo=UTC)
+    tasks = MagicMock()
+    tasks.all.return_value = [
+        MagicMock(_mapping={"id": i, "title": f"Task {i}", "created_at": created,
+                            "updated_at": created})
+        for i in (1, 2)
+    ]
+    counts = MagicMock()
+    counts.all.return_value = [
+        SimpleNamespace(id=1, comment_count=3, last_comment_at=created, last_activity_at=None),
+        SimpleNamespace(id=2, comment_count=0, last_comment_at=None, last_activity_at=None),
+    ]
+    session = AsyncMock()
+    session.execute.side_effect = [tasks, counts]
+    session_cm = MagicMock()
+    session_cm.__aenter__ = AsyncMock(return_value=session)
+    session_cm.__aexit__ = AsyncMock(return_value=False)
+    with patch.object(service, "async_session", return_value=session_cm):
+        items = await service.list_tasks()
+    assert [(t.id, t.commentCount) for t in items] == [("1", 3), ("2", 0)]
+    assert items[0].lastCommentAt == created.isoformat()
+    assert session.execute.await_count == 2
+    assert session.execute.await_args.args[1] == {"ids": [1, 2]}
+
+
+def test_get_board_defaults_to_card_view():
+    from modules.tasks.models import BoardColumn, TaskBoard
+
+    board = TaskBoard(
+        columns=[
+            BoardColumn(status="todo", total=3, items=[{"id": "1"}], next_cursor="c1"),
+            BoardColumn(status="done", total=0, items=[]),
+        ]
+    )
+    with patch("modules.tasks.service.get_board", new_callable=AsyncMock) as mock:
+        mock.return_value = board
+        response = client.get("/api/tasks/board?limit=1&project=mc")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["columns"][0] == {
+            "status": "todo", "total": 3, "items": [{"id": "1"}], "next_cursor": "c1"
+        }
+        from modules.tasks.models import TASK_CARD_FIELDS
+
+        assert mock.call_args.kwargs["fields"] == TASK_CARD_FIELDS
+        assert mock.call_args.kwargs["limit"] == 1
+        assert mock.call_args.kwargs["include_archived"] is False
+
+
+async def test_get_board_groups_ranked_rows_by_column():
+    from datetime import UTC, datetime
+    from types import SimpleNamespace
+    from unittest.mock import MagicMock
+
+    from modules.tasks import service
+
+    created = datetime(2026, 2, 1, tzinfo=UTC)
+
+    def _card(i, state):
+        return MagicMock(_mapping={"id": i, "state": state, "title": f"T{i}", "priority": 3,
+                                   "created_at": created})
+
+    totals = MagicMock()
+    totals.all.return_value = [
+        SimpleNamespace(state="todo", n=3),
+        SimpleNamespace(state="done", n=1),
+    ]
+    ranked = MagicMock()
+    ranked.all.return_value = [_card(3, "done"), _card(1, "todo"), _card(2, "todo")]
+    session = AsyncMock()
+    session.execute.side_effect = [totals, ranked]
+    session_cm = MagicMock()
+    session_cm.__aenter__ = AsyncMock(return_value=session)
+    session_cm.__aexit__ = AsyncMock(return_value=False)
+    with patch.object(service, "async_session", return_value=session_cm):
+        board = await service.get_board(limit=1, fields=["id", "title"])
+
+    columns = {c.status: c for c in board.columns}
+    assert [c.status for c in board.columns][:3] == ["backlog", "todo", "in-progress"]
+    assert columns["todo"].items == [{"id": "1", "title": "T1"}]
+    assert columns["todo"].total == 3
+    assert columns["todo"].next_cursor is not None
+    assert columns["done"].next_cursor is None
+    assert columns["backlog"] == service.BoardColumn(status="backlog", total=0, items=[])
+    assert "mc_task_counters" in str(session.execute.await_args_list[0].args[0])
+    assert "PARTITION BY state" in str(session.execute.await_args_list[1].args[0])
+
+
+async def test_get_board_totals_match_the_tier_it_pages():
+    from datetime import UTC, datetime
+    from types import SimpleNamespace
+    from unittest.mock import MagicMock
+
+    from modules.tasks import service
+
+    created = datetime(2026, 2, 1, tzinfo=UTC)
+    hot = [MagicMock(_mapping={"id": 1, "state": "done", "priority": 3, "created_at": created})]
+    archived = [
+        MagicMock(_mapping={"id": i, "state": "done", "priority": 3, "created_at": created})
+        for i in (7, 8, 9)
+    ]
+
+    async def _execute(statement, params=None):
+        # Rollup covers both tiers (4 done); the archive holds 3 of them
+        sql = str(statement)
+        result = MagicMock()
+        if "mc_task_counters" in sql:
+            n = 4 - (3 if "mc_task_archive_counters" in sql else 0)
+            result.all.return_value = [SimpleNamespace(state="done", n=n)]
+        else:
+            result.all.return_value = hot + (archived if "mc_tasks_all" in sql else [])
+        return result
+
+    session = AsyncMock()
+    session.execute.side_effect = _execute
+    session_cm = MagicMock()
+    session_cm.__aenter__ = AsyncMock(return_value=session)
+    session_cm.__aexit__ = AsyncMock(return_value=False)
+    with patch.object(service, "async_session", return_value=session_cm):
+        hot_board = await service.get_board(limit=10, fields=["id"])
+        full_board = await service.get_board(limit=10, fields=["id"], include_archived=True)
+
+    hot_done = next(c for c in hot_board.columns if c.status == "done")
+    assert hot_done.total == len(hot_done.items) == 1
+    full_done = next(c for c in full_board.columns if c.status == "done")
+    assert full_done.total == len(full_done.items) == 4
+
+
+def test_get_task_counts():
+    from modules.tasks.models import TaskCounts
+
+    with patch("modules.tasks.service.get_task_counts", new_callable=AsyncMock) as mock:
+        mock.return_value = [TaskCounts(id="4", commentCount=2), TaskCounts(id="9")]
+        response = client.get("/api/tasks/counts?ids=4,9")
+        assert response.status_code == 200
+        assert [c["commentCount"] for c in response.json()] == [2, 0]
+        mock.assert_awaited_once_with([4, 9])
+
+
+def test_get_task_counts_rejects_bad_ids():
+    assert client.get("/api/tasks/counts?ids=4,x").status_code == 422
+    assert client.get("/api/tasks/counts?ids=" + ",".join(["1"] * 501)).status_code == 422
+
+
+def test_export_tasks_streams_api_fields_as_csv():
+    import csv
+    import io
+    from datetime import UTC, datetime
+    from types import SimpleNamespace
+    from unittest.mock import MagicMock
+
+    stamp = datetime(2026, 2, 1, tzinfo=UTC)
+    rows = [
+        {"id": 42, "title": "Ship export", "state": "in_progress", "priority": 1, "tags": ["io"]},
+        {"id": 43, "title": "Write docs", "state": "todo", "priority": 3, "tags": []},
+    ]
+
+    async def _partitions(size):
+        for row in rows:
+            yield [SimpleNamespace(_mapping=row | {"created_at": stamp, "updated_at": stamp})]
+
+    result = MagicMock()
+    result.partitions = _partitions
+    session = AsyncMock()
+    session.stream.return_value = result
+    session_cm = MagicMock()
+    session_cm.__aenter__ = AsyncMock(return_value=session)
+    session_cm.__aexit__ = AsyncMock(return_value=False)
+    with patch("core.export.async_session", return_value=session_cm):
+        response = client.get("/api/tasks/export?format=csv&project=mc&status=in-progress")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert 'filename="tasks.csv"' in response.headers["content-disposition"]
+    records = list(csv.DictReader(io.StringIO(response.text)))
+    assert [r["id"] for r in records] == ["42", "43"]
+    assert records[0]["status"] == "in-progress"
+    assert records[0]["tags"] == '["io"]'
+    sql, params = session.stream.await_args.args
+    assert "ORDER BY priority ASC, created_at DESC, id DESC" in str(sql)
+    assert params == {"project": "mc", "state": "in_progress"}
 
 
 # ---------------------------------------------------------------------------
@@ -173,6 +609,171 @@ def test_create_task_validation_error():
         assert response.status_code == 422
 
 
+# ---------------------------------------------------------------------------
+# Bulk operations
+# ---------------------------------------------------------------------------
+
+
+def test_bulk_tasks_side_effects_go_through_outbox():
+    from modules.tasks.models import Task, TaskBulkResult
+
+    def _task(i: int, status: str = "backlog") -> Task:
+        return Task(
+            id=str(i),
+            title=f"Task {i}",
+            status=status,
+            createdAt="2026-02-18T00:00:00+00:00",
+            updatedAt="2026-02-18T00:00:00+00:00",
+        )
+
+    result = TaskBulkResult(created=[_task(1), _task(2)], updated=[_task(42, "done")])
+    with (
+        patch("modules.tasks.service.bulk_apply", new_callable=AsyncMock) as mock_bulk,
+        patch(
+            "modules.activity.service.activity_service.log_event", new_callable=AsyncMock
+        ) as mock_log,
+        patch("core.websocket.manager.broadcast", new_callable=AsyncMock) as mock_broadcast,
+    ):
+        mock_bulk.return_value = result
+        response = client.post(
+            "/api/tasks/bulk",
+            json={
+                "operations": [
+                    {"op": "create", "task": {"title": "Task 1"}},
+                    {"op": "create", "task": {"title": "Task 2", "tags": ["plan"]}},
+                    {"op": "transition", "id": 42, "status": "done"},
+                ]
+            },
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert [t["id"] for t in data["created"]] == ["1", "2"]
+        assert data["updated"][0]["status"] == "done"
+        # Side effects are queued in the service transaction and delivered by the outbox
+        mock_log.assert_not_awaited()
+        mock_broadcast.assert_not_awaited()
+
+
+def test_bulk_tasks_rejects_unknown_op():
+    response = client.post("/api/tasks/bulk", json={"operations": [{"op": "explode", "id": 1}]})
+    assert response.status_code == 422
+
+
+def test_bulk_tasks_rejects_empty_batch():
+    response = client.post("/api/tasks/bulk", json={"operations": []})
+    assert response.status_code == 422
+
+
+def test_bulk_tasks_service_error():
+    with patch("modules.tasks.service.bulk_apply", new_callable=AsyncMock) as mock_bulk:
+        mock_bulk.side_effect = ValueError("Tasks not found: 999")
+        response = client.post(
+            "/api/tasks/bulk", json={"operations": [{"op": "update", "id": 999, "changes": {}}]}
+        )
+        assert response.status_code == 422
+        assert "999" in response.json()["detail"]
+
+
+async def test_bulk_slug_resolution_dedupes_batch_and_existing():
+    from unittest.mock import MagicMock
+
+    from modules.tasks.service import _resolve_slugs
+
+    def _rows(slugs):
+        result = MagicMock()
+        result.all.return_value = [MagicMock(_mapping={"slug": s}) for s in slugs]
+        return result
+
+    session = AsyncMock()
+    session.execute.side_effect = [_rows(["fix-login"]), _rows([])]
+    slugs = await _resolve_slugs(session, ["Fix login", "Write docs", "Write docs"])
+    assert len(set(slugs)) == 3
+    assert slugs[0].startswith("fix-login-")
+    assert slugs[1] == "write-docs"
+    assert slugs[2].startswith("write-docs-")
+    assert session.execute.await_count == 2
+
+
+async def test_bulk_create_retries_slugs_taken_since_resolution():
+    import json
+    from datetime import UTC, datetime
+    from unittest.mock import MagicMock
+
+    from modules.tasks import service
+    from modules.tasks.models import TaskBulkRequest
+
+    stamps = dict.fromkeys(("created_at", "updated_at"), datetime(2026, 2, 1, tzinfo=UTC))
+
+    def _inserted(*rows):
+        result = MagicMock()
+        result.all.return_value = [
+            MagicMock(_mapping=stamps | {"id": i, "title": t, "slug": s}) for i, t, s in rows
+        ]
+        return result
+
+    session = AsyncMock()
+    # A concurrent create took "write-docs" between the slug lookup and the INSERT
+    session.execute.side_effect = [
+        _inserted((1, "Fix login", "fix-login")),
+        _inserted((2, "Write docs", "write-docs-abc123")),
+    ]
+    session_cm = MagicMock()
+    session_cm.__aenter__ = AsyncMock(return_value=session)
+    session_cm.__aexit__ = AsyncMock(return_value=False)
+    payload = TaskBulkRequest(
+        operations=[
+            {"op": "create", "task": {"title": "Write docs"}},
+            {"op": "create", "task": {"title": "Fix login"}},
+        ]
+    )
+    with (
+        patch.object(service, "async_session", return_value=session_cm),
+        patch.object(service, "_resolve_slugs", AsyncMock(return_value=["write-docs", "fix-login"])),
+        patch.object(service, "enqueue", new_callable=AsyncMock),
+        patch.object(service.secrets, "token_hex", return_value="abc123"),
+    ):
+        result = await service.bulk_apply(payload)
+    assert [t.id for t in result.created] == ["2", "1"]
+    first, retry = (c.args for c in session.execute.await_args_list)
+    assert "ON CONFLICT (slug) DO NOTHING" in str(first[0])
+    assert [r["slug"] for r in json.loads(retry[1]["rows"])] == ["write-docs-abc123"]
+
+
+async def test_bulk_create_gives_up_after_repeated_slug_conflicts():
+    from unittest.mock import MagicMock
+
+    from modules.tasks import service
+    from modules.tasks.models import TaskBulkRequest
+
+    session = AsyncMock()
+    session.execute.return_value.all = MagicMock(return_value=[])
+    session_cm = MagicMock()
+    session_cm.__aenter__ = AsyncMock(return_value=session)
+    session_cm.__aexit__ = AsyncMock(return_value=False)
+    payload = TaskBulkRequest(operations=[{"op": "create", "task": {"title": "Write docs"}}])
+    with (
+        patch.object(service, "async_session", return_value=session_cm),
+        patch.object(service, "_resolve_slugs", AsyncMock(return_value=["write-docs"])),
+    ):
+        try:
+            await service.bulk_apply(payload)
+        except ValueError as e:
+            assert "unique slug" in str(e)
+        else:
+            raise AssertionError("expected a slug allocation error")
+    assert session.execute.await_count == 5
+
+
+def test_bulk_update_rows_normalise_like_update_task():
+    from modules.tasks.models import TaskUpdate
+    from modules.tasks.service import _bulk_update_row
+
+    row = _bulk_update_row(7, TaskUpdate(status="done", schedule="", completedAt="", title="T"))
+    assert row["schedule"] is None
+    assert row["clear"] == ["schedule", "completed_at"]
+    assert _bulk_update_row(7, TaskUpdate(schedule="0 9 * * *"))["clear"] == []
+
+
 # ---------------------------------------------------------------------------
 # Update task
 # ---------------------------------------------------------------------------
@@ -232,6 +833,57 @@ def test_delete_task():
         assert response.json() == {"ok": True}
 
 
+async def test_delete_task_removes_comments_and_activity():
+    from unittest.mock import MagicMock
+
+    from modules.tasks import service
+
+    deleted = MagicMock()
+    deleted.first.return_value = MagicMock(id=5)
+    missing = MagicMock()
+    missing.first.return_value = None
+    session = AsyncMock()
+    session.execute.side_effect = [deleted, missing]
+    session_cm = MagicMock()
+    session_cm.__aenter__ = AsyncMock(return_value=session)
+    session_cm.__aexit__ = AsyncMock(return_value=False)
+    with (
+        patch.object(service, "async_session", return_value=session_cm),
+        patch.object(service, "enqueue", new_callable=AsyncMock) as mock_enqueue,
+    ):
+        assert await service.delete_task(5) is True
+        assert await service.delete_task(6) is False
+
+    sql = str(session.execute.await_args_list[0].args[0])
+    assert "DELETE FROM mc_comments WHERE task_id IN (SELECT id FROM deleted)" in sql
+    assert "DELETE FROM mc_activity WHERE task_id IN (SELECT id FROM deleted)" in sql
+    assert mock_enqueue.await_args.args[1] == "tasks:task:deleted"
+    session.commit.assert_awaited_once()
+
+
+async def test_delete_task_removes_archived_tasks():
+    from unittest.mock import MagicMock
+
+    from modules.tasks import service
+
+    deleted = MagicMock()
+    deleted.first.return_value = MagicMock(id=5)
+    session = AsyncMock()
+    session.execute.return_value = deleted
+    session_cm = MagicMock()
+    session_cm.__aenter__ = AsyncMock(return_value=session)
+    session_cm.__aexit__ = AsyncMock(return_value=False)
+    with (
+        patch.object(service, "async_session", return_value=session_cm),
+        patch.object(service, "enqueue", new_callable=AsyncMock),
+    ):
+        assert await service.delete_task(5) is True
+
+    sql = str(session.execute.await_args_list[0].args[0])
+    assert "DELETE FROM mc_tasks_archive WHERE id = :id" in sql
+    assert "SELECT id FROM hot UNION SELECT id FROM archived" in sql
+
+
 def test_delete_task_not_found():
     with (
         patch("modules.tasks.service.delete_task", new_callable=AsyncMock) as mock_delete,
@@ -294,6 +946,456 @@ def test_get_queue_returns_sorted_tasks():
         assert data[2]["id"] == "1"  # low last
 
 
+def test_wait_for_queue():
+    from modules.tasks.models import Task
+
+    task = Task(
+        id="5",
+        title="Fresh task",
+        status="todo",
+        createdAt="2026-02-01T00:00:00+00:00",
+        updatedAt="2026-02-01T00:00:00+00:00",
+    )
+    with patch("modules.tasks.service.wait_for_queue", new_callable=AsyncMock) as mock:
+        mock.return_value = [task]
+        response = client.get("/api/tasks/queue/wait?timeout=10")
+        assert response.status_code == 200
+        assert response.json()[0]["id"] == "5"
+        mock.assert_called_once_with(10.0)
+
+
+def test_wait_for_queue_rejects_long_timeout():
+    response = client.get("/api/tasks/queue/wait?timeout=600")
+    assert response.status_code == 422
+
+
+async def test_wait_for_queue_wakes_on_notify():
+    import asyncio
+
+    from modules.tasks import service
+    from modules.tasks.models import Task
+    from modules.tasks.notify import QueueNotifier
+
+    task = Task(
+        id="5",
+        title="Fresh task",
+        status="todo",
+        createdAt="2026-02-01T00:00:00+00:00",
+        updatedAt="2026-02-01T00:00:00+00:00",
+    )
+    notifier = QueueNotifier()
+    notifier._conn = AsyncMock(is_closed=lambda: False)
+    with (
+        patch.object(service, "queue_notifier", notifier),
+        patch("modules.tasks.service.get_queue", new_callable=AsyncMock) as mock_queue,
+        patch("core.websocket.manager.broadcast", new_callable=AsyncMock) as mock_broadcast,
+    ):
+        mock_queue.side_effect = [[], [task]]
+        waiter = asyncio.create_task(service.wait_for_queue(5))
+        await asyncio.sleep(0)
+        notifier._on_notify(None, 0, "mc_tasks_queue", '{"id": 5, "project": null}')
+        result = await asyncio.wait_for(waiter, 1)
+        assert [t.id for t in result] == ["5"]
+        await asyncio.sleep(0.1)
+        mock_broadcast.assert_awaited_once_with("tasks:queue:available", {"ids": ["5"]})
+
+
+async def test_queue_notifier_reconnects_and_wakes_waiters():
+    import asyncio
+    from unittest.mock import MagicMock
+
+    from modules.tasks import notify
+
+    lost = AsyncMock(is_closed=lambda: False)
+    lost.add_termination_listener = MagicMock()
+    fresh = AsyncMock(is_closed=lambda: False)
+    fresh.add_termination_listener = MagicMock()
+    notifier = notify.QueueNotifier()
+    with (
+        patch.object(notify, "asyncpg_dsn", return_value="postgresql://"),
+        patch.object(notify.asyncpg, "connect", new_callable=AsyncMock) as mock_connect,
+        patch.object(notify, "_RECONNECT_DELAY", 0),
+    ):
+        mock_connect.side_effect = [lost, OSError("refused"), fresh]
+        await notifier.start()
+        assert notifier.listening
+
+        dropped = notifier.current()
+        notifier._on_terminate(lost)
+        assert dropped.is_set()
+        assert not notifier.listening
+
+        reconnected = notifier.current()
+        await asyncio.wait_for(reconnected.wait(), 5)
+        assert notifier.listening
+        assert mock_connect.await_count == 3
+        fresh.add_listener.assert_awaited_once_with(notify.QUEUE_CHANNEL, notifier._on_notify)
+
+        await notifier.stop()
+        fresh.close.assert_awaited_once()
+        assert not notifier.listening
+
+
+def test_claim_from_queue():
+    from modules.tasks.models import Task
+
+    claimed = [
+        Task(
+            id=str(i),
+            title=f"Task {i}",
+            status="in-progress",
+            priority="high",
+            claimedBy="dev-impl",
+            createdAt="2026-02-01T00:00:00+00:00",
+            updatedAt="2026-02-18T00:00:00+00:00",
+        )
+        for i in (7, 8)
+    ]
+    with (
+        patch("modules.tasks.service.claim_next", new_callable=AsyncMock) as mock,
+        patch("core.websocket.manager.broadcast", new_callable=AsyncMock) as mock_broadcast,
+    ):
+        mock.return_value = claimed
+        response = client.post(
+            "/api/tasks/queue/claim",
+            json={"agent_id": "dev-impl", "limit": 2, "project": "mc", "tags": ["infra"]},
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert [t["id"] for t in data] == ["7", "8"]
+        assert all(t["claimedBy"] == "dev-impl" for t in data)
+        payload = mock.call_args.args[0]
+        assert payload.limit == 2
+        assert payload.project == "mc"
+        assert payload.tags == ["infra"]
+        mock_broadcast.assert_not_awaited()
+
+
+def test_claim_from_queue_empty():
+    with (
+        patch("modules.tasks.service.claim_next", new_callable=AsyncMock) as mock,
+        patch("core.websocket.manager.broadcast", new_callable=AsyncMock),
+    ):
+        mock.return_value = []
+        response = client.post("/api/tasks/queue/claim", json={"agent_id": "dev-impl"})
+        assert response.status_code == 200
+        assert response.json() == []
+
+
+def test_claim_from_queue_rejects_oversized_batch():
+    response = client.post("/api/tasks/queue/claim", json={"agent_id": "dev-impl", "limit": 500})
+    assert response.status_code == 422
+
+
+def test_get_queue_policy():
+    from modules.tasks.models import QueueAgentLoad, QueuePolicy, QueueProjectShare
+
+    policy = QueuePolicy(
+        max_in_flight=3,
+        agent_limits={"opus-runner": 1},
+        project_weights={"mc": 2.0},
+        priority_aging_seconds=3600,
+        agents=[QueueAgentLoad(agent_id="opus-runner", in_flight=1, max_in_flight=1)],
+        projects=[QueueProjectShare(project="mc", weight=2.0, in_flight=1, queued=4)],
+    )
+    with patch("modules.tasks.service.get_queue_policy", new_callable=AsyncMock) as mock:
+        mock.return_value = policy
+        response = client.get("/api/tasks/queue/policy")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["agents"][0] == {"agent_id": "opus-runner", "in_flight": 1, "max_in_flight": 1}
+        assert data["projects"][0]["queued"] == 4
+
+
+def test_queue_policy_settings_parse_overrides():
+    from core.config import Settings
+
+    settings = Settings(
+        debug=True,
+        task_agent_limits="opus-runner:1, dev-impl:4,",
+        task_project_weights="mc:2,infra:0.5,off:0",
+    )
+    assert settings.task_agent_limit_map == {"opus-runner": 1, "dev-impl": 4}
+    assert settings.task_project_weight_map == {"mc": 2.0, "infra": 0.5}
+
+
+def test_queue_policy_settings_reject_malformed_overrides():
+    from pydantic import ValidationError
+
+    from core.config import Settings
+
+    for field, value in (
+        ("task_agent_limits", "opus-runner:one"),
+        ("task_agent_limits", "opus-runner"),
+        ("task_agent_limits", "dev-impl:-1"),
+        ("task_project_weights", "mc:heavy"),
+    ):
+        try:
+            Settings(debug=True, **{field: value})
+        except ValidationError as e:
+            assert field.upper() in str(e)
+        else:
+            raise AssertionError(f"expected {field}={value!r} to be rejected")
+
+
+async def test_claim_slots_respects_agent_cap():
+    from unittest.mock import MagicMock
+
+    from modules.tasks import service
+
+    def _count(n):
+        result = MagicMock()
+        result.scalar.return_value = n
+        return result
+
+    session = AsyncMock()
+    session.execute.side_effect = [MagicMock(), _count(2), MagicMock(), _count(5)]
+    with (
+        patch("core.config.settings.task_agent_max_in_flight", 0),
+        patch("core.config.settings.task_agent_limits", "opus-runner:3"),
+    ):
+        assert await service._claim_slots(session, "dev-impl", 10) == 10
+        session.execute.assert_not_awaited()
+        assert await service._claim_slots(session, "opus-runner", 10) == 1
+        assert await service._claim_slots(session, "opus-runner", 10) == 0
+        lock_sql = str(session.execute.await_args_list[0].args[0])
+        assert "pg_advisory_xact_lock" in lock_sql
+
+
+async def test_task_moved_to_done_frees_its_agent_slot():
+    from datetime import UTC, datetime
+    from unittest.mock import MagicMock
+
+    from modules.tasks import service
+    from modules.tasks.models import TaskUpdate
+
+    stamp = datetime(2026, 2, 1, tzinfo=UTC)
+    task = {
+        "id": 5,
+        "title": "T",
+        "state": "in_progress",
+        "created_at": stamp,
+        "updated_at": stamp,
+        "claimed_by": "opus-runner",
+        "lease_expires_at": stamp,
+    }
+
+    async def _execute(sql, params=None):
+        # A one-row mc_tasks: apply the PUT's assignments, evaluate the in-flight count
+        sql, result = str(sql), MagicMock()
+        if sql.startswith("UPDATE mc_tasks SET"):
+            task["state"] = params["state"]
+            for col in ("claimed_by", "lease_expires_at"):
+                if f"{col} = NULL" in sql:
+                    task[col] = None
+            result.first.return_value = MagicMock(_mapping=dict(task))
+        elif "count(*)" in sql:
+            assert "state = 'in_progress'" in sql
+            live = task["claimed_by"] == params["agent_id"] and task["lease_expires_at"]
+            result.scalar.return_value = int(bool(live) and task["state"] == "in_progress")
+        return result
+
+    session = AsyncMock()
+    session.execute.side_effect = _execute
+    session_cm = MagicMock()
+    session_cm.__aenter__ = AsyncMock(return_value=session)
+    session_cm.__aexit__ = AsyncMock(return_value=False)
+    with (
+        patch.object(service, "async_session", return_value=session_cm),
+        patch.object(service, "enqueue", new_callable=AsyncMock),
+        patch.object(service, "_persist_edges", AsyncMock(return_value=[])),
+        patch.object(service.dependency_index, "complete", return_value=set()),
+        patch("core.config.settings.task_agent_max_in_flight", 0),
+        patch("core.config.settings.task_agent_limits", "opus-runner:1"),
+    ):
+        assert await service._claim_slots(session, "opus-runner", 1) == 0
+        await service.update_task(5, TaskUpdate(status="done"))
+        assert await service._claim_slots(session, "opus-runner", 1) == 1
+    assert task["claimed_by"] is None and task["lease_expires_at"] is None
+
+
+def test_claim_task_at_agent_cap_conflicts():
+    with patch("modules.tasks.service.claim_task", new_callable=AsyncMock) as mock:
+        mock.side_effect = ValueError("Agent opus-runner is at its limit of 1 in-flight tasks")
+        response = client.post("/api/tasks/5/claim", json={"agent_id": "opus-runner"})
+        assert response.status_code == 409
+        assert "limit" in response.json()["detail"]
+
+
+# ---------------------------------------------------------------------------
+# Single-statement writes
+# ---------------------------------------------------------------------------
+
+
+def _write_session(*results):
+    """A fake async_session() whose execute() returns `results` in turn, then empty results."""
+    from datetime import UTC, datetime
+    from unittest.mock import MagicMock
+
+    stamps = dict.fromkeys(("created_at", "updated_at"), datetime(2026, 2, 1, tzinfo=UTC))
+
+    def _first(row):
+        result = MagicMock()
+        result.first.return_value = None if row is None else MagicMock(_mapping=stamps | row)
+        return result
+
+    session = AsyncMock()
+    session.execute.side_effect = [*(_first(r) for r in results), *(MagicMock() for _ in range(5))]
+    session_cm = MagicMock()
+    session_cm.__aenter__ = AsyncMock(return_value=session)
+    session_cm.__aexit__ = AsyncMock(return_value=False)
+    return session, session_cm
+
+
+async def test_create_task_slug_conflict_retries_insert():
+    from modules.tasks import service
+    from modules.tasks.models import TaskCreate
+
+    row = {"id": 7, "title": "Fix login", "slug": "fix-login-abc123"}
+    session, session_cm = _write_session(None, row)
+    with (
+        patch.object(service, "async_session", return_value=session_cm),
+        patch.object(service, "enqueue", new_callable=AsyncMock) as mock_enqueue,
+    ):
+        task = await service.create_task(TaskCreate(title="Fix login"))
+    assert task.id == "7"
+    statements = [str(c.args[0]) for c in session.execute.await_args_list]
+    assert not any(s.lstrip().startswith("SELECT") for s in statements)
+    assert "ON CONFLICT (slug) DO NOTHING" in statements[0]
+    first, retry = (c.args[1]["slug"] for c in session.execute.await_args_list[:2])
+    assert first == "fix-login"
+    assert retry.startswith("fix-login-")
+    assert session.execute.await_count == 2
+    mock_enqueue.assert_awaited_once()
+    session.commit.assert_awaited_once()
+
+
+async def test_update_task_missing_row_is_one_statement():
+    from modules.tasks import service
+    from modules.tasks.models import TaskUpdate
+
+    session, session_cm = _write_session(None)
+    with patch.object(service, "async_session", return_value=session_cm):
+        assert await service.update_task(99, TaskUpdate(title="New")) is None
+    assert session.execute.await_count == 1
+    assert "UPDATE mc_tasks SET title = :title" in str(session.execute.await_args.args[0])
+    session.commit.assert_not_awaited()
+
+
+async def test_claim_task_reports_conflict_from_one_statement():
+    from modules.tasks import service
+
+    session, session_cm = _write_session(
+        None, {"holder": "builder", "id": None}, {"holder": None, "id": 5, "title": "T"}
+    )
+    with (
+        patch.object(service, "async_session", return_value=session_cm),
+        patch.object(service, "enqueue", new_callable=AsyncMock),
+        patch("core.config.settings.task_agent_max_in_flight", 0),
+        patch("core.config.settings.task_agent_limits", ""),
+    ):
+        assert await service.claim_task(404, "dev-impl") is None
+        try:
+            await service.claim_task(5, "dev-impl")
+        except ValueError as e:
+            assert "claimed by builder" in str(e)
+        else:
+            raise AssertionError("expected a claim conflict")
+        assert (await service.claim_task(5, "dev-impl")).id == "5"
+    claims = [str(c.args[0]) for c in session.execute.await_args_list]
+    assert len(claims) == 3
+    assert all("claimed_by IS NULL" in s and "LEFT JOIN updated" in s for s in claims)
+    session.commit.assert_awaited_once()
+
+
+async def test_write_errors_maps_constraint_violations():
+    from types import SimpleNamespace
+
+    from sqlalchemy.exc import IntegrityError, OperationalError
+
+    from modules.tasks import service
+
+    try:
+        async with service._write_errors():
+            raise IntegrityError("INSERT", {}, SimpleNamespace(sqlstate="23503"))
+    except ValueError as e:
+        assert "does not exist" in str(e)
+    else:
+        raise AssertionError("expected ValueError")
+
+    try:
+        async with service._write_errors():
+            raise OperationalError("SELECT", {}, SimpleNamespace(sqlstate="57P01"))
+    except OperationalError:
+        pass
+    else:
+        raise AssertionError("server faults must propagate unchanged")
+
+
+# ---------------------------------------------------------------------------
+# Claim leases
+# ---------------------------------------------------------------------------
+
+
+def test_heartbeat_extends_lease():
+    from modules.tasks.models import Task
+
+    task = Task(
+        id="42",
+        title="Task",
+        status="in-progress",
+        claimedBy="dev-impl",
+        leaseExpiresAt="2026-02-18T00:15:00+00:00",
+        createdAt="2026-02-01T00:00:00+00:00",
+        updatedAt="2026-02-18T00:00:00+00:00",
+    )
+    with patch("modules.tasks.service.heartbeat_task", new_callable=AsyncMock) as mock:
+        mock.return_value = task
+        response = client.post(
+            "/api/tasks/42/heartbeat", json={"agent_id": "dev-impl", "lease_seconds": 600}
+        )
+        assert response.status_code == 200
+        assert response.json()["leaseExpiresAt"] == "2026-02-18T00:15:00+00:00"
+        mock.assert_called_once_with(42, "dev-impl", 600)
+
+
+def test_heartbeat_wrong_agent():
+    with patch("modules.tasks.service.heartbeat_task", new_callable=AsyncMock) as mock:
+        mock.side_effect = ValueError("Task is not claimed by dev-impl (claimed by builder)")
+        response = client.post("/api/tasks/42/heartbeat", json={"agent_id": "dev-impl"})
+        assert response.status_code == 409
+
+
+def test_heartbeat_not_found():
+    with patch("modules.tasks.service.heartbeat_task", new_callable=AsyncMock) as mock:
+        mock.return_value = None
+        response = client.post("/api/tasks/999/heartbeat", json={"agent_id": "dev-impl"})
+        assert response.status_code == 404
+
+
+async def test_lease_reaper_drains_in_batches():
+    from modules.tasks.leases import reap_expired_leases
+    from modules.tasks.models import Task
+
+    def _task(i: int) -> Task:
+        return Task(
+            id=str(i),
+            title="Stuck",
+            status="todo",
+            createdAt="2026-02-01T00:00:00+00:00",
+            updatedAt="2026-02-18T00:00:00+00:00",
+        )
+
+    with (
+        patch("core.config.settings.task_reaper_batch_size", 2),
+        patch("modules.tasks.service.reap_expired_leases", new_callable=AsyncMock) as mock,
+    ):
+        mock.side_effect = [[_task(1), _task(2)], [_task(3)]]
+        released = await reap_expired_leases()
+        assert released == 3
+        assert mock.await_count == 2
+
+
 # ---------------------------------------------------------------------------
 # Pickup
 # ---------------------------------------------------------------------------
@@ -414,11 +1516,33 @@ def test_complete_task_not_found():
 
 
 def test_list_tags_returns_sorted_list():
+    from modules.tasks.models import TaskTag
+
     with patch("modules.tasks.service.list_tags", new_callable=AsyncMock) as mock:
-        mock.return_value = ["agent", "security", "ui"]
+        mock.return_value = [
+            TaskTag(tag=t, open=n, total=n + 1) for t, n in (("agent", 2), ("security", 0))
+        ]
         response = client.get("/api/tasks/tags")
         assert response.status_code == 200
-        assert response.json() == ["agent", "security", "ui"]
+        assert response.json() == [
+            {"tag": "agent", "open": 2, "total": 3},
+            {"tag": "security", "open": 0, "total": 1},
+        ]
+        mock.assert_awaited_once_with(prefix=None, limit=None)
+
+
+def test_list_tags_prefix_autocomplete():
+    with patch("modules.tasks.service.list_tags", new_callable=AsyncMock) as mock:
+        mock.return_value = []
+        response = client.get("/api/tasks/tags?prefix=sec&limit=10")
+        assert response.status_code == 200
+        mock.assert_awaited_once_with(prefix="sec", limit=10)
+
+
+def test_like_prefix_escapes_wildcards():
+    from modules.tasks.service import _like_prefix
+
+    assert _like_prefix("ops_2%") == "ops\\_2\\%%"
 
 
 # ---------------------------------------------------------------------------
@@ -446,6 +1570,25 @@ def test_get_stats():
         assert data["active_model"] == "unknown"
 
 
+async def test_get_stats_reads_counter_rollup():
+    from unittest.mock import MagicMock
+
+    from modules.tasks import service
+
+    result = MagicMock()
+    result.first.return_value = MagicMock(_mapping={"in_progress_count": 4, "todo_count": 9})
+    session = AsyncMock()
+    session.execute.return_value = result
+    session_cm = MagicMock()
+    session_cm.__aenter__ = AsyncMock(return_value=session)
+    session_cm.__aexit__ = AsyncMock(return_value=False)
+    with patch.object(service, "async_session", return_value=session_cm):
+        stats = await service.get_stats()
+    assert (stats.in_progress_count, stats.todo_count) == (4, 9)
+    sql = str(session.execute.await_args.args[0])
+    assert "FROM mc_task_counters" in sql
+
+
 # ---------------------------------------------------------------------------
 # Slug generation (unit tests for the helper)
 # ---------------------------------------------------------------------------
@@ -550,6 +1693,262 @@ def test_create_task_with_dependencies():
         assert data["blockedBy"] == ["42"]
 
 
+def _chain_index():
+    from modules.tasks.graph import DependencyIndex
+
+    # 3 waits on 2, 2 waits on 1, 4 waits on 1
+    index = DependencyIndex()
+    index.load([("2", ["1"]), ("3", ["2"]), ("4", ["1"])])
+    return index
+
+
+def test_dependency_index_tracks_both_directions():
+    index = _chain_index()
+    assert index.dependents("1") == {"2", "4"}
+    assert index.blockers("3") == {"2"}
+
+    changed = index.set_blockers("3", ["4"])
+    assert changed == {"2", "4"}
+    assert index.dependents("2") == set()
+    assert index.dependents("4") == {"3"}
+
+
+def test_dependency_index_complete_unblocks_dependents():
+    index = _chain_index()
+    assert index.complete("1") == {"2", "4"}
+    assert index.blockers("2") == set()
+    assert index.blockers("4") == set()
+    assert index.blockers("3") == {"2"}
+
+
+def test_dependency_index_detects_cycles():
+    index = _chain_index()
+    assert index.find_cycle("1", ["3"]) == ["1", "3", "2", "1"]
+    assert index.find_cycle("5", ["5"]) == ["5", "5"]
+    assert index.find_cycle("4", ["3"]) is None
+
+
+def test_dependency_index_topological_order():
+    index = _chain_index()
+    assert index.topological_order("3") == ["1", "2", "3", "4"]
+    assert index.edges(["1", "2", "3", "4"]) == [("1", "2"), ("2", "3"), ("1", "4")]
+    assert index.topological_order("99") == ["99"]
+
+
+def test_get_task_graph():
+    from modules.tasks.models import Task, TaskEdge, TaskGraph
+
+    stamp = "2026-02-18T00:00:00+00:00"
+    tasks = [Task(id=i, title=f"Step {i}", createdAt=stamp, updatedAt=stamp) for i in ("1", "2")]
+    graph = TaskGraph(
+        id="2", order=["1", "2"], edges=[TaskEdge(blocker="1", blocked="2")], tasks=tasks
+    )
+    with patch("modules.tasks.service.get_task_graph", new_callable=AsyncMock) as mock:
+        mock.return_value = graph
+        response = client.get("/api/tasks/2/graph")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["order"] == ["1", "2"]
+        assert data["edges"] == [{"blocker": "1", "blocked": "2"}]
+        mock.assert_called_once_with(2)
+
+
+def test_get_task_graph_not_found():
+    with patch("modules.tasks.service.get_task_graph", new_callable=AsyncMock) as mock:
+        mock.return_value = None
+        response = client.get("/api/tasks/999/graph")
+        assert response.status_code == 404
+
+
+def test_update_task_rejects_dependency_cycle():
+    with patch("modules.tasks.service.update_task", new_callable=AsyncMock) as mock:
+        mock.side_effect = ValueError("Dependency cycle: 1 -> 3 -> 2 -> 1")
+        response = client.put("/api/tasks/1", json={"blockedBy": ["3"]})
+        assert response.status_code == 422
+        assert "cycle" in response.json()["detail"]
+
+
+async def test_set_blockers_drops_done_and_rejects_cycles():
+    from types import SimpleNamespace
+    from unittest.mock import MagicMock
+
+    from modules.tasks import service
+
+    def _states(pairs):
+        result = MagicMock()
+        result.all.return_value = [SimpleNamespace(id=i, state=st) for i, st in pairs]
+        return result
+
+    session = AsyncMock()
+    session.execute.side_effect = [
+        _states([(1, "done"), (4, "todo")]),
+        _states([(3, "todo")]),
+    ]
+    with patch.object(service, "dependency_index", _chain_index()) as index:
+        changed = await service._set_blockers(session, "3", ["1", "4"])
+        assert index.blockers("3") == {"4"}
+        assert changed == {"2", "3", "4"}
+
+        index.set_blockers("3", ["2"])
+        try:
+            await service._set_blockers(session, "1", ["3"])
+        except ValueError as e:
+            assert "1 -> 3 -> 2 -> 1" in str(e)
+        else:
+            raise AssertionError("cycle not rejected")
+
+
+# ---------------------------------------------------------------------------
+# Scheduling
+# ---------------------------------------------------------------------------
+
+
+def _fires(expression: str, after: str, until: str) -> list[str]:
+    from datetime import UTC, datetime
+
+    from modules.tasks.cron import CronSchedule
+
+    return [
+        at.strftime("%Y-%m-%d %H:%M")
+        for at in CronSchedule(expression).occurrences(
+            datetime.fromisoformat(after).replace(tzinfo=UTC),
+            datetime.fromisoformat(until).replace(tzinfo=UTC),
+            UTC,
+        )
+    ]
+
+
+def test_cron_steps_ranges_and_lists():
+    assert _fires("*/20 9-10 * * *", "2026-03-02 08:00", "2026-03-02 11:00") == [
+        "2026-03-02 09:00", "2026-03-02 09:20", "2026-03-02 09:40",
+        "2026-03-02 10:00", "2026-03-02 10:20", "2026-03-02 10:40",
+    ]
+    # Strictly after the lower bound
+    assert _fires("0,30 12 * * *", "2026-03-02 12:00", "2026-03-02 23:59") == [
+        "2026-03-02 12:30"
+    ]
+
+
+def test_cron_day_fields_match_either_when_both_restricted():
+    # 2026-03-01 is a Sunday: fires on the 1st and on Fridays (6th, 13th)
+    assert _fires("0 9 1 * 5", "2026-02-28 00:00", "2026-03-14 00:00") == [
+        "2026-03-01 09:00", "2026-03-06 09:00", "2026-03-13 09:00",
+    ]
+    assert _fires("@weekly", "2026-03-01 00:00", "2026-03-16 00:00") == [
+        "2026-03-08 00:00", "2026-03-15 00:00",
+    ]
+
+
+def test_cron_rejects_invalid_expressions():
+    from modules.tasks.cron import CronSchedule
+
+    for expression in ("* * * *", "61 * * * *", "*/0 * * * *", "a b c d e", "5-1 * * * *"):
+        try:
+            CronSchedule(expression)
+        except ValueError:
+            continue
+        raise AssertionError(f"{expression!r} accepted")
+
+
+def test_create_task_rejects_invalid_schedule():
+    with patch("modules.tasks.service.async_session") as mock_session:
+        response = client.post("/api/tasks/", json={"title": "Nightly", "schedule": "every day"})
+        assert response.status_code == 422
+        assert "cron" in response.json()["detail"].lower()
+        mock_session.assert_not_called()
+
+
+def _scheduler():
+    from datetime import UTC, timedelta
+
+    from modules.tasks.scheduler import TaskScheduler
+
+    return TaskScheduler(lookahead=timedelta(hours=24), expand_interval=3600, tz=UTC)
+
+
+def test_scheduler_pops_due_tasks_in_order_and_skips_stale_entries():
+    from datetime import UTC, datetime
+
+    from modules.tasks.models import Task
+
+    scheduler = _scheduler()
+    at = lambda h: datetime(2026, 3, 2, h, tzinfo=UTC)
+    scheduler.push(3, at(12))
+    scheduler.push(1, at(9))
+    scheduler.push(2, at(10))
+    scheduler.push(1, at(11))  # rescheduled: the 09:00 entry is now stale
+    scheduler.observe(
+        Task(id="2", title="Moved on", status="todo",
+             createdAt="2026-03-01T00:00:00+00:00", updatedAt="2026-03-01T00:00:00+00:00")
+    )
+    assert scheduler.next_due() == at(11)
+    assert scheduler.pop_due(at(11)) == [1]
+    assert scheduler.pop_due(at(13)) == [3]
+    assert scheduler.next_due() is None
+
+
+async def test_scheduler_promotes_due_tasks_and_retries_failures():
+    from datetime import UTC, datetime, timedelta
+
+    from modules.tasks import scheduler as scheduler_module
+
+    scheduler = _scheduler()
+    with patch.object(
+        scheduler_module.service, "promote_scheduled", new_callable=AsyncMock
+    ) as mock:
+        mock.side_effect = RuntimeError("db down")
+        assert await scheduler.promote([7]) == []
+        retry_at = scheduler.next_due()
+        assert retry_at is not None
+        assert retry_at > datetime.now(UTC) + timedelta(seconds=20)
+
+
+async def test_scheduler_refresh_expands_then_loads():
+    from datetime import UTC, datetime
+
+    from modules.tasks import scheduler as scheduler_module
+
+    scheduler = _scheduler()
+    due = datetime(2026, 3, 2, 9, tzinfo=UTC)
+    service = scheduler_module.service
+    with (
+        patch.object(service, "expand_schedules", new_callable=AsyncMock) as expand,
+        patch.object(service, "load_scheduled", new_callable=AsyncMock) as load,
+    ):
+        load.return_value = [(5, due)]
+        await scheduler.refresh()
+        expand.assert_awaited_once_with(scheduler.lookahead, scheduler.tz)
+        assert scheduler.pop_due(due) == [5]
+
+
+# ---------------------------------------------------------------------------
+# Comments
+# ---------------------------------------------------------------------------
+
+
+def test_list_comments_paginates_with_cursor_header():
+    from modules.tasks.models import Comment, CommentPage
+
+    page = CommentPage(
+        items=[
+            Comment(id=12, taskId=5, authorId="user", body="LGTM", createdAt="2026-02-02T00:00:00")
+        ],
+        next_cursor="abc",
+    )
+    with patch("modules.tasks.service.list_comments", new_callable=AsyncMock) as mock:
+        mock.return_value = page
+        response = client.get("/api/tasks/5/comments?limit=1")
+        assert response.status_code == 200
+        assert response.headers["X-Next-Cursor"] == "abc"
+        assert [c["id"] for c in response.json()] == [12]
+        mock.assert_awaited_once_with(5, limit=1, cursor=None)
+
+
+def test_list_comments_invalid_cursor():
+    response = client.get("/api/tasks/5/comments?cursor=not-a-cursor")
+    assert response.status_code == 422
+
+
 # ---------------------------------------------------------------------------
 # Get single task
 # ---------------------------------------------------------------------------
@@ -577,6 +1976,47 @@ def test_get_task():
         assert data["title"] == "My Task"
 
 
+def test_get_task_excluding_archive():
+    with patch("modules.tasks.service.get_task", new_callable=AsyncMock) as mock:
+        mock.return_value = None
+        response = client.get("/api/tasks/42?include_archived=false")
+        assert response.status_code == 404
+        mock.assert_called_once_with(42, include_archived=False)
+
+
+async def test_get_task_falls_through_to_archive():
+    from modules.tasks import service
+
+    session, session_cm = _write_session({"id": 42, "title": "Old", "state": "done"}, None)
+    with patch.object(service, "async_session", return_value=session_cm):
+        assert (await service.get_task(42)).id == "42"
+        assert await service.get_task(42, include_archived=False) is None
+    archived, hot = (str(c.args[0]) for c in session.execute.await_args_list)
+    assert "FROM mc_tasks_all" in archived
+    assert "FROM mc_tasks WHERE" in hot
+
+
+async def test_archiver_drains_in_batches():
+    from modules.tasks.lifecycle import archive_finished_tasks
+
+    with (
+        patch("core.config.settings.task_archive_after_days", 30),
+        patch("core.config.settings.task_archive_batch_size", 2),
+        patch("modules.tasks.service.archive_tasks", new_callable=AsyncMock) as mock,
+    ):
+        mock.side_effect = [["1", "2"], ["3"]]
+        assert await archive_finished_tasks() == 3
+        assert mock.await_count == 2
+        mock.assert_awaited_with(30, 2)
+
+    with (
+        patch("core.config.settings.task_archive_after_days", 0),
+        patch("modules.tasks.service.archive_tasks", new_callable=AsyncMock) as mock,
+    ):
+        assert await archive_finished_tasks() == 0
+        mock.assert_not_awaited()
+
+
 def test_get_task_not_found():
     with patch("modules.tasks.service.get_task", new_callable=AsyncMock) as mock:
         mock.return_value = None
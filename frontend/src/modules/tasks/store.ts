@@ -40,6 +40,10 @@ export interface Task {
   updatedAt: string
   estimatedHours: number | null
   actualHours: number | null
+  // Badge counts, present on list responses
+  commentCount?: number
+  lastCommentAt?: string | null
+  lastActivityAt?: string | null
 }
 
 export interface Project {
@@ -59,6 +63,20 @@ export interface AgentInfo {
   warning_count: number
 }
 
+export interface TaskTag {
+  tag: string
+  open: number
+  total: number
+}
+
+export interface TaskChanges {
+  version: number
+  changed: Task[]
+  deleted: string[]
+  has_more: boolean
+  reset: boolean
+}
+
 export type TaskStatus = Task['status']
 export type TaskPriority = Task['priority']
 export type ViewMode = 'list' | 'kanban'
@@ -122,6 +140,11 @@ export const useTasksStore = defineStore('tasks', () => {
   const loading = ref(false)
   const error = ref<string | null>(null)
 
+  // Delta sync — change version the local list is current to (null = never synced)
+  const syncVersion = ref<number | null>(null)
+  let syncing: Promise<void> | null = null
+  let syncAgain = false
+
   // Filters
   const filters = ref<{
     project: string | null
@@ -238,7 +261,10 @@ export const useTasksStore = defineStore('tasks', () => {
     loading.value = true
     error.value = null
     try {
+      // Version first: anything changed during the list fetch is replayed by the next sync
+      const { version } = await api.get<TaskChanges>('/api/tasks/changes')
       tasks.value = await api.get<Task[]>('/api/tasks/')
+      syncVersion.value = version
     } catch (e: unknown) {
       error.value = e instanceof Error ? e.message : 'Failed to load tasks'
     } finally {
@@ -246,6 +272,51 @@ export const useTasksStore = defineStore('tasks', () => {
     }
   }
 
+  function applyChanges(changes: TaskChanges) {
+    const gone = new Set(changes.deleted)
+    const byId = new Map(changes.changed.map((t) => [t.id, t]))
+    const next = tasks.value.filter((t) => !gone.has(t.id)).map((t) => byId.get(t.id) ?? t)
+    const known = new Set(next.map((t) => t.id))
+    for (const t of changes.changed) {
+      if (!known.has(t.id)) next.push(t)
+    }
+    tasks.value = next
+    if (selectedTaskId.value && gone.has(selectedTaskId.value)) selectedTaskId.value = null
+  }
+
+  async function pullChanges() {
+    if (syncVersion.value === null) return fetchTasks()
+    let more = true
+    while (more) {
+      const changes = await api.get<TaskChanges>(`/api/tasks/changes?since=${syncVersion.value}`)
+      if (changes.reset) return fetchTasks()
+      applyChanges(changes)
+      syncVersion.value = changes.version
+      more = changes.has_more
+    }
+  }
+
+  /** Bring the list up to date in O(changes); bursts of calls coalesce into one follow-up pull. */
+  async function syncTasks(): Promise<void> {
+    if (syncing) {
+      syncAgain = true
+      return syncing
+    }
+    syncing = (async () => {
+      try {
+        do {
+          syncAgain = false
+          await pullChanges()
+        } while (syncAgain)
+      } catch (e: unknown) {
+        error.value = e instanceof Error ? e.message : 'Failed to sync tasks'
+      } finally {
+        syncing = null
+      }
+    })()
+    return syncing
+  }
+
   async function fetchProjects() {
     try {
       projects.value = await api.get<Project[]>('/api/projects/')
@@ -256,7 +327,8 @@ export const useTasksStore = defineStore('tasks', () => {
 
   async function fetchTags() {
     try {
-      availableTags.value = await api.get<string[]>('/api/tasks/tags')
+      const tags = await api.get<TaskTag[]>('/api/tasks/tags')
+      availableTags.value = tags.map((t) => t.tag)
     } catch {
       availableTags.value = []
     }
@@ -369,6 +441,7 @@ export const useTasksStore = defineStore('tasks', () => {
     agents,
     // Actions
     fetchTasks,
+    syncTasks,
     fetchProjects,
     fetchTags,
     fetchAgents,
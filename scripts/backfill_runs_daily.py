@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Backfill the agent_runs_daily rollup from agent_runs.
+
+The analytics outcome counts and sketches (agent_runs_daily_outcomes and
+agent_runs_daily_sketch) are rebuilt alongside it.
+
+The rollups are kept current by triggers on agent_runs; this rebuilds a range
+of UTC days from the raw runs, e.g. after a restore or a bulk import with
+triggers disabled. Without --from/--to the whole table is rebuilt. Restart
+the API afterwards if past years changed, since their heatmaps are cached.
+
+Run from repo root:
+    python3 scripts/backfill_runs_daily.py
+    python3 scripts/backfill_runs_daily.py --from 2026-01-01 --to 2026-03-31
+"""
+
+import argparse
+import asyncio
+import sys
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from sqlalchemy import text
+
+from core.database import async_session, engine
+from modules.runs.service import runs_service
+
+
+async def run(date_from: date | None, date_to: date | None):
+    if date_from is None or date_to is None:
+        async with async_session() as session:
+            result = await session.execute(
+                text("""
+                    SELECT min(created_at AT TIME ZONE 'UTC')::date,
+                           max(created_at AT TIME ZONE 'UTC')::date
+                    FROM agent_runs
+                """)
+            )
+            first, last = result.one()
+        if first is None:
+            print("agent_runs is empty; nothing to backfill")
+            return
+        date_from = date_from or first
+        date_to = date_to or last
+
+    try:
+        rows = await runs_service.rebuild_daily(date_from, date_to)
+    finally:
+        await engine.dispose()
+    print(f"Rebuilt agent_runs_daily for {date_from}..{date_to}: {rows} (day, agent) rows")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the agent_runs_daily rollup")
+    parser.add_argument("--from", dest="date_from", type=date.fromisoformat, default=None)
+    parser.add_argument("--to", dest="date_to", type=date.fromisoformat, default=None)
+    args = parser.parse_args()
+    asyncio.run(run(args.date_from, args.date_to))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for task write round trips.
+
+Drives the tasks service directly against the configured database and
+reports, per operation, the SQL statements sent (round trips, including the
+outbox insert) and the median latency. Every task it creates is deleted
+again at the end.
+
+Run from repo root:
+    python3 scripts/bench_task_writes.py
+    python3 scripts/bench_task_writes.py --iterations 200 --agent bench-runner
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from sqlalchemy import event
+
+from core.database import engine
+from modules.tasks import service
+from modules.tasks.models import TaskComplete, TaskCreate, TaskUpdate
+
+
+class StatementCounter:
+    """Counts statements sent on the engine's connections."""
+
+    def __init__(self):
+        self.count = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *_args):
+        self.count += 1
+
+
+async def run(iterations: int, agent: str):
+    counter = StatementCounter()
+    statements = defaultdict(list)
+    latencies = defaultdict(list)
+
+    async def measure(op, call):
+        before = counter.count
+        start = time.perf_counter()
+        result = await call
+        latencies[op].append((time.perf_counter() - start) * 1000)
+        statements[op].append(counter.count - before)
+        return result
+
+    await service.load_dependency_index()
+    created = []
+    try:
+        for i in range(iterations):
+            # Same title every time, so later creates exercise the slug conflict path
+            task = await measure("create", service.create_task(TaskCreate(title="Bench task")))
+            created.append(int(task.id))
+            task_id = int(task.id)
+            await measure("update", service.update_task(task_id, TaskUpdate(priority="high")))
+            await measure("update (missing)", service.update_task(-1 - i, TaskUpdate(title="x")))
+            await measure("claim", service.claim_task(task_id, agent))
+            await measure("heartbeat", service.heartbeat_task(task_id, agent))
+            await measure("release", service.release_task(task_id))
+            await measure("complete", service.complete_task(task_id, TaskComplete(result="ok")))
+    finally:
+        for task_id in created:
+            await measure("delete", service.delete_task(task_id))
+        await engine.dispose()
+
+    print(f"{'operation':<18} {'statements':>10} {'p50 ms':>8}")
+    for op in statements:
+        print(
+            f"{op:<18} {statistics.median(statements[op]):>10g} "
+            f"{statistics.median(latencies[op]):>8.2f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark task write round trips")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--agent", default="bench-runner")
+    args = parser.parse_args()
+    asyncio.run(run(args.iterations, args.agent))
+
+
+if __name__ == "__main__":
+    main()